@@ -0,0 +1,201 @@
+"""Compiled resource effects against the original keyword checks.
+
+Runs the Chief lines from the CSV examples in the game rules through the
+original `update_resources` (kept here verbatim as the reference), the
+compiled EffectTable one decision at a time, and the EffectTable batch path.
+Reports nanoseconds per decision and the lines where the two matchers fire
+different resources. The compiled table matches at word starts, so those
+differences are intended ("stattdessen" is no food). On the game's four
+rules both take about the same time: most of a decision is call overhead
+and the random draw, and the table checks the few keywords with substring
+tests first, like the original.
+
+Two more runs show how the costs scale. A larger synthetic table (--rules)
+is compared with the same rules checked one substring at a time, the way
+the original function does. A large batch (--batch) shows the NumPy draw
+the simulators use.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_effects --repeat 2000 --output effects.json
+    python -m benchmarks.bench_effects --rules 40 --batch 100000
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+
+import numpy as np
+
+from realm_stories.effects import EffectTable
+from realm_stories.rules import GAME_RULES, RESOURCE_BOUNDS
+
+
+def legacy_update_resources(decision_text, resources):
+    """The original hard-coded rules"""
+    changes = {}
+
+    if "geld" in decision_text.lower() or "münzen" in decision_text.lower():
+        change = random.randint(-10, 5)
+        resources['wealth'] = max(0, min(100, resources['wealth'] + change))
+        changes['wealth'] = change
+
+    if "essen" in decision_text.lower() or "nahrung" in decision_text.lower():
+        change = random.randint(-5, 10)
+        resources['food'] = max(0, min(100, resources['food'] + change))
+        changes['food'] = change
+
+    if "waffen" in decision_text.lower() or "rüstung" in decision_text.lower():
+        change = random.randint(-5, 10)
+        resources['weapons'] = max(0, min(100, resources['weapons'] + change))
+        changes['weapons'] = change
+
+    if "fest" in decision_text.lower() or "feiern" in decision_text.lower():
+        change = random.randint(5, 15)
+        resources['happiness'] = max(0, min(100, resources['happiness'] + change))
+        changes['happiness'] = change
+
+    return changes
+
+
+def chief_lines(rules=GAME_RULES):
+    """DIALOG of every Chief row in the CSV examples of the rules text"""
+    section = rules.split("# Textbeispiele (CSV-Format)", 1)[1]
+    rows = csv.DictReader(io.StringIO(section.strip()))
+    return [row['DIALOG'] for row in rows if row.get('CHARAKTER') == 'Chief']
+
+
+def synthetic_rules(count, bounds=RESOURCE_BOUNDS):
+    """`count` rules with four made-up German-looking keywords each"""
+    syllables = ["ber", "gan", "dor", "lin", "mar", "tes", "ku", "wal", "fen", "ro"]
+    resources = list(bounds)
+    rules = []
+    for index in range(count):
+        stems = [
+            syllables[index % 10] + syllables[(index // 10 + k) % 10] + syllables[(index + k * 3) % 10]
+            for k in range(4)
+        ]
+        rules.append({
+            'resource': resources[index % len(resources)],
+            'range': (-5, 10),
+            'keywords': {'*' + stem if k % 2 else stem: 1.0 for k, stem in enumerate(stems)},
+        })
+    return rules
+
+
+def substring_hits(rules, text):
+    """The original approach generalized: every keyword of every rule is searched separately"""
+    return [
+        index for index, rule in enumerate(rules)
+        if any(keyword.lstrip('*') in text.lower() for keyword in rule['keywords'])
+    ]
+
+
+def time_per_item(fn, items, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(items)
+    return (time.perf_counter() - started) * 1e9 / (repeat * len(items))
+
+
+def run(args):
+    lines = chief_lines()
+    table = EffectTable()
+    resources = {'wealth': 50, 'food': 50, 'weapons': 50, 'happiness': 50}
+
+    def legacy(items):
+        for line in items:
+            legacy_update_resources(line, dict(resources))
+
+    def compiled(items):
+        for line in items:
+            table.apply(line, dict(resources))
+
+    def compiled_match(items):
+        for line in items:
+            table.hits(line)
+
+    rng = np.random.default_rng(args.seed)
+    state = np.tile([resources[name] for name in table.resources], (len(lines), 1))
+
+    def batch(items):
+        table.apply_batch(items, state, rng)
+
+    weights = table.match(lines)
+
+    def batch_draw_only(items):
+        table.clamp(state + table.draw(weights, rng))
+
+    timings = {
+        'legacy_ns': time_per_item(legacy, lines, args.repeat),
+        'compiled_ns': time_per_item(compiled, lines, args.repeat),
+        'compiled_match_only_ns': time_per_item(compiled_match, lines, args.repeat),
+        'batch_ns': time_per_item(batch, lines, args.repeat),
+        'batch_draw_only_ns': time_per_item(batch_draw_only, lines, args.repeat),
+    }
+
+    differences = []
+    for line in lines:
+        before = set(legacy_update_resources(line, dict(resources)))
+        after = set(table.apply(line, dict(resources)))
+        if before != after:
+            differences.append({'line': line, 'legacy': sorted(before), 'compiled': sorted(after)})
+
+    rules = synthetic_rules(args.rules)
+    large = EffectTable(rules)
+    # Chief lines with some of the synthetic keywords mixed in
+    mixed = [
+        f"{line} {stem}" if i % 3 == 0 else line
+        for i, (line, stem) in enumerate(zip(lines, (k.lstrip('*') for r in rules * 10 for k in r['keywords'])))
+    ]
+    scaling = {
+        'rules': args.rules,
+        'substring_ns': time_per_item(lambda items: [substring_hits(rules, t) for t in items], mixed, args.repeat),
+        'compiled_ns': time_per_item(lambda items: [large.hits(t) for t in items], mixed, args.repeat),
+    }
+    scaling['speedup'] = scaling['substring_ns'] / scaling['compiled_ns']
+
+    games = np.tile(table.match(lines), (max(1, args.batch // len(lines)), 1))
+    games_state = np.tile(state[:1], (len(games), 1))
+    started = time.perf_counter()
+    table.clamp(games_state + table.draw(games, rng))
+    batch_draw = {
+        'rows': len(games),
+        'ns_per_row': (time.perf_counter() - started) * 1e9 / len(games),
+    }
+
+    return {
+        'lines': len(lines),
+        'lines_with_keyword': sum(1 for line in lines if table.hits(line)),
+        'substring_prefilter': table._prefilter is not None,
+        'repeat': args.repeat,
+        'per_decision': timings,
+        'speedup': timings['legacy_ns'] / timings['compiled_ns'],
+        'differences': differences,
+        'scaling': scaling,
+        'large_batch_draw': batch_draw,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=1000, help="passes over all Chief lines")
+    parser.add_argument("--rules", type=int, default=40, help="size of the synthetic table")
+    parser.add_argument("--batch", type=int, default=100000, help="rows of the large batch draw")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    report = json.dumps(run(args), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
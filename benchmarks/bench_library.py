@@ -0,0 +1,174 @@
+"""Situation library: ANN search, deduplication and serving, fully offline.
+
+Fills a SituationLibrary in a temporary directory with synthetic situations
+and reports:
+
+- add and take latency per call,
+- recall@k and latency of the inverted-file search against an exact scan,
+- how many reworded copies of stored situations were caught as duplicates,
+  and how many fresh situations were wrongly rejected,
+- that no simulated player was ever served the same situation twice.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_library --entries 5000 --players 200 --output library.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from realm_stories.situation_library import SituationLibrary
+
+CHARACTERS = ["Mary", "Gunnar", "Rita", "Andre", "Sigmund", "Fleur", "Logan", "Bahri", "Regina", "Clive"]
+SUBJECTS = ["die Ernte", "der Schmied", "die Wache", "ein Händler", "die Bauern", "der Tempel", "die Schatzkammer",
+            "ein Bote", "die Fischer", "der Müller", "die Stadtmauer", "ein Fremder", "die Kinder", "der Brunnen"]
+EVENTS = ["ist in Gefahr", "verlangt mehr Münzen", "braucht neue Waffen", "plant ein Fest", "hat Nahrung gestohlen",
+          "bittet um Hilfe", "droht mit Streik", "bringt schlechte Nachrichten", "bietet einen Handel an",
+          "ist krank geworden", "will die Steuern senken", "hat Rüstungen gefunden"]
+REASONS = ["seit dem Sturm", "wegen des langen Winters", "nach dem Überfall", "seit der letzten Ernte",
+           "weil die Händler ausbleiben", "nach dem Fest", "wegen der Gerüchte im Norden"]
+SYNONYMS = {"Chief": "Anführer", "braucht": "benötigt", "verlangt": "fordert", "schlechte": "üble",
+            "bittet": "fleht", "neue": "frische", "sollen": "müssen", "Hilfe": "Unterstützung"}
+
+
+def situation(rng):
+    sentences = [
+        f"Chief, {rng.choice(SUBJECTS)} {rng.choice(EVENTS)} {rng.choice(REASONS)}.",
+        f"Außerdem {rng.choice(EVENTS)} {rng.choice(SUBJECTS)}.",
+        f"Was sollen wir tun, bevor {rng.choice(SUBJECTS)} {rng.choice(EVENTS)}?",
+    ]
+    return " ".join(sentences)
+
+
+def reworded(text, rng):
+    """The same situation with a few words swapped for synonyms"""
+    words = text.split()
+    for i, word in enumerate(words):
+        if word.strip(",.?") in SYNONYMS and rng.random() < 0.7:
+            words[i] = word.replace(word.strip(",.?"), SYNONYMS[word.strip(",.?")])
+    return " ".join(words)
+
+
+def response(character, text):
+    return f"SITUATION: **{character}**: {text}\n\nOPTIONEN:\nA) Ja\nB) Nein\n"
+
+
+def resources(rng):
+    return {name: rng.randint(0, 100) for name in ('wealth', 'food', 'weapons', 'happiness')}
+
+
+def timed(fn, items):
+    started = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, (time.perf_counter() - started) * 1e3 / max(1, len(items))
+
+
+def run(args, folder):
+    rng = random.Random(args.seed)
+    library = SituationLibrary(
+        os.path.join(folder, "library.sqlite"), max_entries=args.entries, train_size=args.train_size
+    )
+
+    stored = []
+
+    def add(_):
+        character, text = rng.choice(CHARACTERS), situation(rng)
+        if library.add(character, text, response(character, text), resources(rng)):
+            stored.append((character, text))
+
+    _, add_ms = timed(add, range(args.entries))
+
+    # Deduplication: reworded copies should be rejected, fresh situations kept
+    copies = [(character, reworded(text, rng)) for character, text in rng.sample(stored, min(500, len(stored)))]
+    fresh = [(rng.choice(CHARACTERS), situation(rng)) for _ in range(500)]
+    caught = sum(not library.add(c, t, response(c, t), resources(rng)) for c, t in copies)
+    rejected = sum(not library.add(c, t, response(c, t), resources(rng)) for c, t in fresh)
+
+    # Inverted-file search against the exact scan
+    queries = [library.embedder.embed(f"{c}: {situation(rng)}") for c in rng.choices(CHARACTERS, k=200)]
+    index = library.index
+    exact, exact_ms = timed(lambda q: [row for row, _ in index.search(q, args.k, probes=len(index._lists) or 1)], queries)
+    if index.centroids is None:
+        approximate, approximate_ms = exact, exact_ms
+    else:
+        approximate, approximate_ms = timed(lambda q: [row for row, _ in index.search(q, args.k)], queries)
+    recall = float(np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approximate, exact) if e]))
+
+    # Serving: every player asks until the library has nothing left for them
+    served = {}
+    repeats = 0
+    take_times = []
+    for player in range(args.players):
+        seen = set()
+        for turn in range(args.turns):
+            started = time.perf_counter()
+            text = library.take(
+                f"player-{player}", resources(rng), query=situation(rng) if turn % 2 else None, reason="bench"
+            )
+            take_times.append((time.perf_counter() - started) * 1e3)
+            if text is None:
+                break
+            repeats += text in seen
+            seen.add(text)
+        served[player] = len(seen)
+
+    return {
+        'entries': args.entries,
+        'stats': library.stats(),
+        'add_ms': add_ms,
+        'take_ms': {
+            'p50': float(np.percentile(take_times, 50)),
+            'p95': float(np.percentile(take_times, 95)),
+        },
+        'search': {
+            'lists': len(index._lists),
+            'probes': index.probes,
+            'k': args.k,
+            'recall': recall,
+            'exact_ms': exact_ms,
+            'approximate_ms': approximate_ms,
+        },
+        'deduplication': {
+            'reworded_copies': len(copies),
+            'caught': caught,
+            'fresh': len(fresh),
+            'wrongly_rejected': rejected,
+        },
+        'serving': {
+            'players': args.players,
+            'mean_served': float(np.mean(list(served.values()))),
+            'repeats': repeats,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=5000, help="situations to add (also the library size)")
+    parser.add_argument("--train-size", type=int, default=1024, help="rows before the index is clustered")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=50, help="library turns per player")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        report = run(args, folder)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if report['serving']['repeats']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Repeat check for generated situations: speed and accuracy of the MinHash/LSH index.
+
+Indexes half of the example situations from the rules plus a synthetic
+game history of --history situations, then checks:
+
+- reworded, shortened, extended and verbatim copies of indexed situations
+  (should be found),
+- the other half of the examples (should not be found).
+
+Every check also runs as an exact scan over all shingle sets with the same
+thresholds, so the report shows what the LSH banding misses and how much
+time it saves. Latencies are in microseconds per check.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_novelty --history 1000 --output novelty.json
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from realm_stories import novelty
+
+
+def exact_duplicate(index, text):
+    """The same decision as index.duplicate_of, by comparing with every stored text"""
+    shingle_set = novelty.shingles(text)
+    while index is not None:
+        for other in index._shingles:
+            overlap = len(shingle_set & other)
+            jaccard = overlap / (len(shingle_set) + len(other) - overlap)
+            if jaccard >= index.threshold or overlap / min(len(shingle_set), len(other)) >= index.containment:
+                return True
+        index = index.base
+    return False
+
+
+def mutations(text, rng, vocabulary):
+    words = text.split()
+    sentences = [s for s in text.split(". ") if s]
+    reworded = list(words)
+    for i in rng.sample(range(len(words)), max(1, len(words) // 10)):
+        reworded[i] = rng.choice(vocabulary)
+    return {
+        'verbatim': text,
+        'reworded': " ".join(reworded),
+        'shortened': ". ".join(sentences[:-1]) if len(sentences) > 1 else " ".join(words[:-2]),
+        'extended': text + " Was sollen wir jetzt tun, Chief?",
+    }
+
+
+def synthetic_history(count, vocabulary, rng):
+    return [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(15, 40))) for _ in range(count)]
+
+
+def timed(fn, items):
+    times = []
+    results = []
+    for item in items:
+        started = time.perf_counter()
+        results.append(fn(item))
+        times.append((time.perf_counter() - started) * 1e6)
+    return results, {'p50': float(np.percentile(times, 50)), 'p95': float(np.percentile(times, 95))}
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    examples = novelty.example_situations()
+    rng.shuffle(examples)
+    indexed, held_out = examples[:len(examples) // 2], examples[len(examples) // 2:]
+    vocabulary = sorted({word for text in examples for word in text.split()})
+
+    base = novelty.NearDuplicateIndex(args.threshold).extend(indexed)
+    session = base.child().extend(synthetic_history(args.history, vocabulary, rng))
+
+    planted = {}
+    for text in indexed:
+        for kind, variant in mutations(text, rng, vocabulary).items():
+            planted.setdefault(kind, []).append(variant)
+
+    accuracy = {}
+    for kind, texts in planted.items():
+        found, _ = timed(lambda t: session.duplicate_of(t) is not None, texts)
+        exact = [exact_duplicate(session, t) for t in texts]
+        accuracy[kind] = {
+            'texts': len(texts),
+            'found': sum(found),
+            'found_by_exact_scan': sum(exact),
+            'missed_by_lsh': sum(e and not f for f, e in zip(found, exact)),
+        }
+    false_positives, lsh_us = timed(lambda t: session.duplicate_of(t) is not None, held_out)
+    exact_positives, exact_us = timed(lambda t: exact_duplicate(session, t), held_out)
+
+    return {
+        'indexed': len(base) + len(session),
+        'threshold': args.threshold,
+        'planted': accuracy,
+        'held_out': {
+            'texts': len(held_out),
+            'false_positives': sum(false_positives),
+            'false_positives_exact_scan': sum(exact_positives),
+        },
+        'check_us': lsh_us,
+        'exact_scan_us': exact_us,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--history", type=int, default=200, help="synthetic situations of the session")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(run(args), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Hybrid retrieval: which queries BM25 answers alone, and the time that saves.
+
+Builds the knowledge base from the rules with the fake embeddings (each call
+sleeps --embed-latency seconds, like a provider round trip) and runs a set of
+player queries twice, bypassing the retrieval cache:
+
+- through the hybrid search (BM25 first, the vector search only when BM25 is
+  not decisive, reciprocal rank fusion otherwise),
+- through the plain vector search.
+
+Per query the report lists the path taken, the BM25 confidence, both
+latencies and the latency saved, and how many of the k chunks the two
+searches share. Queries are character names, keywords from the rules, the
+Chief answers of the CSV examples and the "new situation" request.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_retrieval --embed-latency 0.15 --output retrieval.json
+    python -m benchmarks.bench_retrieval --threshold 0.8 --per-query
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from realm_stories import economy
+from realm_stories.fakes import FakeEmbeddings
+from realm_stories.knowledge_base import KnowledgeBaseRegistry, search_chunks
+from realm_stories.lexical_index import HybridRetriever
+from realm_stories.rules import GAME_RULES, NEW_SITUATION_REQUEST
+from realm_stories.tracing import trace_turn
+
+KEYWORDS = ["Steuern", "Tribut", "Hexe", "Fieber", "Getreide", "Waffen kaufen", "Flüchtlinge", "Schmied", "Fest"]
+TEMPLATES = ["{}", "Was ist mit {}?", "Erzähl mir von {}", "{} braucht Hilfe"]
+
+
+def player_queries(knowledge_base, count, rng):
+    characters = sorted({knowledge_base.metadata(i)['character'] for i in range(len(knowledge_base))
+                         if 'character' in knowledge_base.metadata(i)})
+    answers = [answer for pair in economy.example_situations(GAME_RULES) for answer in pair]
+    queries = [NEW_SITUATION_REQUEST]
+    queries += [rng.choice(TEMPLATES).format(name) for name in characters + KEYWORDS]
+    queries += rng.sample(answers, min(len(answers), max(0, count - len(queries))))
+    return queries[:count]
+
+
+def run(args, folder):
+    rng = random.Random(args.seed)
+    embeddings = FakeEmbeddings(latency=args.embed_latency)
+    registry = KnowledgeBaseRegistry(
+        os.path.join(folder, "db"), os.path.join(folder, "hash.txt"),
+        embeddings_factory=lambda: embeddings, hybrid=False
+    )
+    knowledge_base = registry.get(GAME_RULES)
+    started = time.perf_counter()
+    retriever = HybridRetriever(knowledge_base, threshold=args.threshold)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = []
+    for query in player_queries(knowledge_base, args.queries, rng):
+        # The search records its path on the "lexical" span, as in a traced game turn
+        with trace_turn("retrieval") as trace:
+            started = time.perf_counter()
+            hybrid = search_chunks(knowledge_base, query, args.k, retriever=retriever)
+            hybrid_ms = (time.perf_counter() - started) * 1000
+        lexical = next(span for span in trace.spans if span.name == "lexical").attrs
+        started = time.perf_counter()
+        vector = search_chunks(knowledge_base, query, args.k)
+        vector_ms = (time.perf_counter() - started) * 1000
+        results.append({
+            'query': query,
+            'path': lexical['path'],
+            'confidence': lexical['confidence'],
+            'hybrid_ms': round(hybrid_ms, 3),
+            'vector_ms': round(vector_ms, 3),
+            'saved_ms': round(vector_ms - hybrid_ms, 3),
+            'saved_ms_estimated': lexical.get('saved_ms'),
+            'shared_with_vector': len({c[0] for c in hybrid} & {c[0] for c in vector}),
+            'chunks': [c[2].get('character') or c[2].get('arc') or c[2].get('section') for c in hybrid],
+        })
+
+    def summary(rows):
+        if not rows:
+            return {'queries': 0}
+        return {
+            'queries': len(rows),
+            'hybrid_ms_p50': float(np.percentile([r['hybrid_ms'] for r in rows], 50)),
+            'vector_ms_p50': float(np.percentile([r['vector_ms'] for r in rows], 50)),
+            'saved_ms_total': float(sum(r['saved_ms'] for r in rows)),
+            'mean_shared_with_vector': float(np.mean([r['shared_with_vector'] for r in rows])),
+        }
+
+    report = {
+        'chunks': len(knowledge_base),
+        'k': args.k,
+        'threshold': args.threshold,
+        'embed_latency_s': args.embed_latency,
+        'bm25_build_ms': build_ms,
+        'lexical': summary([r for r in results if r['path'] == "lexical"]),
+        'hybrid': summary([r for r in results if r['path'] == "hybrid"]),
+        'retriever': retriever.stats(),
+    }
+    if args.per_query:
+        report['per_query'] = results
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.9, help="BM25 term coverage for the lexical path")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="seconds per embedding call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-query", action="store_true", help="include every query in the report")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        report = run(args, folder)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Startup time: import breakdown of the entry points and time to first /health.
+
+Imports every module given with --module in a fresh interpreter under
+`python -X importtime` and reports, per module:
+
+- the wall time of the import (best of --repeat runs),
+- which heavy packages (langchain, openai, streamlit, ...) the import pulled in,
+- the slowest imports by cumulative and by self time, and the self time
+  summed per top-level package.
+
+It also starts the game server and measures the time until /health answers,
+and the time to read the content pack. Run it against an earlier build with
+--baseline to see the difference per module.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_startup --output startup.json
+    python -m benchmarks.bench_startup --module app --top 30 --baseline startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+
+MODULES = ["realm_stories.server", "realm_stories.engine", "app"]
+HEAVY_PACKAGES = ["langchain", "openai", "streamlit", "aiohttp", "requests", "tiktoken", "numpy", "pyarrow"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, sorted(name for name in {heavy!r} if name in sys.modules)]))
+"""
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def repo_env():
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+    # Keep the run independent from .env settings of the developer machine
+    env.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    return env
+
+
+def parse_importtime(stderr):
+    """(module, depth, self_us, cumulative_us) for every line `-X importtime` printed"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_import(module, repeat, top):
+    runs = []
+    for _ in range(repeat):
+        finished = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_PACKAGES)],
+            capture_output=True, text=True, env=repo_env()
+        )
+        if finished.returncode != 0:
+            return {'error': finished.stderr.strip().splitlines()[-1:]}
+        elapsed, heavy = json.loads(finished.stdout.strip().splitlines()[-1])
+        runs.append((elapsed, heavy, parse_importtime(finished.stderr)))
+    elapsed, heavy, rows = min(runs, key=lambda run: run[0])
+
+    by_package = Counter()
+    for name, _, self_us, _ in rows:
+        by_package[name.split(".", 1)[0]] += self_us
+    ms = lambda us: round(us / 1000, 2)  # noqa: E731
+    return {
+        'wall_ms': round(elapsed * 1000, 1),
+        'wall_ms_runs': [round(run[0] * 1000, 1) for run in runs],
+        'modules_imported': len(rows),
+        'heavy_packages_loaded': heavy,
+        'top_cumulative_ms': {name: ms(cum) for name, _, _, cum in sorted(rows, key=lambda r: -r[3])[:top]},
+        'top_self_ms': {name: ms(own) for name, _, own, _ in sorted(rows, key=lambda r: -r[2])[:top]},
+        'self_ms_by_package': {name: ms(us) for name, us in by_package.most_common(top)},
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_first_health(timeout):
+    """Seconds from starting the server process until /health answers, and that answer"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "realm_stories.server", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=repo_env()
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=timeout) as response:
+                    body = json.load(response)
+                return {'first_health_ms': round((time.perf_counter() - started) * 1000, 1),
+                        'content': body.get('content')}
+            except OSError:
+                if server.poll() is not None:
+                    return {'error': f"server exited with {server.returncode}"}
+                time.sleep(0.02)
+        return {'error': f"no /health answer within {timeout}s"}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def content_pack_load():
+    try:
+        from realm_stories import content_packs
+    except ImportError:
+        return None  # a build from before content packs, e.g. for a baseline
+    started = time.perf_counter()
+    pack = content_packs.read_pack(content_packs.pack_path(os.getenv("REALM_STORIES_CONTENT_PACK", "base")))
+    return {**pack.describe(), 'load_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def run(args):
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'imports': {module: measure_import(module, args.repeat, args.top) for module in args.module or MODULES},
+        'server': server_first_health(args.timeout) if args.server else None,
+        'content_pack': content_pack_load(),
+    }
+
+
+def compare(result, baseline):
+    """Print the import wall time of every module against an earlier run"""
+    print(f"{'module':<24}{'ms':>10}{'baseline':>10}{'ratio':>8}", file=sys.stderr)
+    rows = [(module, stats.get('wall_ms'), baseline['imports'].get(module, {}).get('wall_ms'))
+            for module, stats in result['imports'].items()]
+    if result.get('server') and (baseline.get('server') or {}).get('first_health_ms'):
+        rows.append(("server /health", result['server'].get('first_health_ms'), baseline['server']['first_health_ms']))
+    for name, now, before in rows:
+        if now is None or not before:
+            continue
+        print(f"{name:<24}{now:>10.1f}{before:>10.1f}{now / before:>8.2f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", action="append", help=f"module to import, repeatable (default: {', '.join(MODULES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module; the fastest run counts")
+    parser.add_argument("--top", type=int, default=15, help="entries in the top lists")
+    parser.add_argument("--no-server", dest="server", action="store_false", help="skip the /health measurement")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the server")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            compare(result, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
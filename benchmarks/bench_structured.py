@@ -0,0 +1,200 @@
+"""Structured response validation against the free text parser, with fuzzing.
+
+Builds a deterministic corpus of game master responses: valid JSON turns
+and broken ones (cut off, fields dropped, options too long, code fences,
+German keys, chatter around the object, the old line format, flipped bytes,
+unusual unicode). Each response is run through `structured.validate` and,
+for comparison, through the line parser of the free text mode.
+
+Reports responses per second for both, how the responses end up (valid,
+repairable with a field request, accepted in the old line format, or
+regenerated) and the number of
+exceptions, which has to be 0: validation must never raise, whatever the
+model sends.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_structured --responses 5000 --output structured.json
+    python -m benchmarks.bench_structured --corpus-out fuzz.jsonl
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+
+from realm_stories import structured
+from realm_stories.engine import is_parse_failure, parse_ai_response
+
+CHARACTERS = ["Mary", "Bauer Jon", "Schmied Torvald", "Händlerin Éowyn", "Ältester Björn"]
+TOPICS = ["die Ernte", "ein Fest", "neue Waffen", "die Münzen im Lager", "eine Rüstung für die Wache"]
+
+
+def valid_turn(rng):
+    topic = rng.choice(TOPICS)
+    return {
+        'character': rng.choice(CHARACTERS),
+        'situation': f"Chief, wir müssen über {topic} reden. " * rng.randint(1, 4),
+        'options': [f"Ja, {topic} hat Vorrang.", f"Nein, {rng.choice(['Geld', 'Essen', 'Zeit'])} fehlt."],
+    }
+
+
+def _flip_bytes(text, rng):
+    chars = list(text)
+    for _ in range(rng.randint(1, 5)):
+        chars[rng.randrange(len(chars))] = rng.choice('{}[]",:\\\x00�')
+    return "".join(chars)
+
+
+def _mutations():
+    def truncated(turn, rng):
+        text = json.dumps(turn, ensure_ascii=False)
+        return text[:rng.randint(1, len(text) - 1)]
+
+    def dropped_field(turn, rng):
+        turn = dict(turn)
+        del turn[rng.choice(structured.FIELDS)]
+        return json.dumps(turn, ensure_ascii=False)
+
+    def long_option(turn, rng):
+        turn = dict(turn, options=[turn['options'][0] * 4, turn['options'][1]])
+        return json.dumps(turn, ensure_ascii=False)
+
+    def code_fence(turn, rng):
+        return "```json\n" + json.dumps(turn, ensure_ascii=False, indent=2) + "\n```"
+
+    def german_keys(turn, rng):
+        return json.dumps(
+            {'Charakter': turn['character'], 'Beschreibung': turn['situation'], 'Optionen': turn['options']},
+            ensure_ascii=False,
+        )
+
+    def chatter(turn, rng):
+        return "Hier ist die nächste Situation:\n" + json.dumps(turn) + "\nViel Spaß beim Spielen!"
+
+    def legacy_format(turn, rng):
+        return structured.to_text(turn)
+
+    def flipped_bytes(turn, rng):
+        return _flip_bytes(json.dumps(turn, ensure_ascii=False), rng)
+
+    def unicode(turn, rng):
+        turn = dict(turn, situation=turn['situation'] + " ​\U0001f3f0 \\u00e4 \ud800"[:rng.randint(2, 16)])
+        return json.dumps(turn, ensure_ascii=rng.random() < 0.5)
+
+    def wrong_types(turn, rng):
+        turn = dict(turn, options=rng.choice([None, "A) Ja B) Nein", {'A': "Ja", 'B': "Nein"}, [1, 2]]))
+        return json.dumps(turn, ensure_ascii=False)
+
+    def deep_nesting(turn, rng):
+        return "[" * 5000 + json.dumps(turn) + "]" * 5000
+
+    def empty(turn, rng):
+        return rng.choice(["", "{}", "null", "{", "}{", "\"\\"])
+
+    return [
+        truncated, dropped_field, long_option, code_fence, german_keys, chatter,
+        legacy_format, flipped_bytes, unicode, wrong_types, deep_nesting, empty,
+    ]
+
+
+def fuzz_corpus(size, seed=0, valid_share=0.3):
+    """`size` responses as (kind, text); deterministic for a seed"""
+    rng = random.Random(seed)
+    mutations = _mutations()
+    corpus = []
+    for _ in range(size):
+        turn = valid_turn(rng)
+        if rng.random() < valid_share:
+            corpus.append(('valid', json.dumps(turn, ensure_ascii=False)))
+        else:
+            mutation = rng.choice(mutations)
+            corpus.append((mutation.__name__, mutation(turn, rng)))
+    return corpus
+
+
+def outcome(text):
+    """What the engine does with a response in structured mode"""
+    fields, problems = structured.validate(text)
+    if structured.is_valid(fields, problems):
+        return 'valid'
+    if len(problems) < len(structured.FIELDS):
+        return 'repair_fields'
+    if not is_parse_failure(*parse_ai_response(text)[:2]):
+        return 'line_format'
+    return 'regenerate'
+
+
+def throughput(fn, texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return repeat * len(texts) / (time.perf_counter() - started)
+
+
+def run(args):
+    corpus = fuzz_corpus(args.responses, args.seed)
+    texts = [text for _, text in corpus]
+    valid_json = [text for kind, text in corpus if kind == 'valid']
+    valid_lines = [structured.to_text(json.loads(text)) for text in valid_json]
+
+    outcomes = Counter()
+    by_kind = {}
+    exceptions = []
+    for kind, text in corpus:
+        try:
+            result = outcome(text)
+        except Exception as e:
+            result = 'exception'
+            exceptions.append({'kind': kind, 'error': repr(e), 'text': repr(text[:200])})
+        outcomes[result] += 1
+        by_kind.setdefault(kind, Counter())[result] += 1
+
+    line_parser_failures = sum(is_parse_failure(*parse_ai_response(text)[:2]) for text in texts)
+
+    return {
+        'responses': len(corpus),
+        'seed': args.seed,
+        'responses_per_second': {
+            'validate_valid': throughput(structured.validate, valid_json, args.repeat),
+            'line_parser_valid': throughput(parse_ai_response, valid_lines, args.repeat),
+            'validate_fuzz': throughput(structured.validate, texts, args.repeat),
+            'line_parser_fuzz': throughput(parse_ai_response, texts, args.repeat),
+        },
+        'outcomes': dict(outcomes),
+        'outcomes_by_kind': {kind: dict(counts) for kind, counts in sorted(by_kind.items())},
+        'line_parser_failures_on_fuzz': line_parser_failures,
+        'exceptions': len(exceptions),
+        'exception_samples': exceptions[:10],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--responses", type=int, default=5000, help="size of the fuzz corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus for the throughput")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus-out", help="also write the corpus as JSON lines (kind, text)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.corpus_out:
+        with open(args.corpus_out, 'w', encoding='utf-8') as f:
+            for kind, text in fuzz_corpus(args.responses, args.seed):
+                # ASCII escapes keep the lone surrogates of the unicode cases writable
+                f.write(json.dumps({'kind': kind, 'text': text}) + "\n")
+
+    report = run(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if report['exceptions']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""Stage-level benchmark of a game turn, fully offline.
+
+Drives the real game code (knowledge base build/load, similarity search,
+prompt assembly, parse_ai_response, update_resources and the whole
+process_user_input path) with the deterministic fakes from
+realm_stories.fakes instead of OpenAI. Reports wall time percentiles and
+memory allocations per stage as JSON.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_turn --iterations 50 --output bench.json
+    python -m benchmarks.bench_turn --llm-latency 0.4 --embed-latency 0.05
+    python -m benchmarks.bench_turn --baseline bench.json   # compare with an earlier build
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Keep the benchmark independent from .env settings of the developer machine
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ["REALM_STORIES_CAMPAIGN_MEMORY"] = "0"
+os.environ["REALM_STORIES_LIBRARY"] = "0"
+# The fake model answers from one template, which the repeat check would reject
+os.environ["REALM_STORIES_NOVELTY_THRESHOLD"] = "0"
+
+import app  # noqa: E402
+from realm_stories import engine as game_engine, llm_client  # noqa: E402
+from realm_stories.embedding_cache import CachedEmbeddings, QueryEmbeddingCache  # noqa: E402
+from realm_stories.fakes import FakeChatModel, FakeEmbeddings  # noqa: E402
+from realm_stories.knowledge_base import KnowledgeBaseRegistry  # noqa: E402
+from realm_stories.rules import GAME_RULES  # noqa: E402
+
+QUERIES = [
+    app.NEW_SITUATION_REQUEST,
+    "Ja, wir kaufen Waffen.",
+    "Nein, das ist zu riskant.",
+    "Bezahle den Schmied.",
+    "Sigmund soll die Steuern senken.",
+    "Wir feiern ein Fest für die Stadt.",
+]
+
+
+class SessionState(dict):
+    """Attribute-style stand-in for st.session_state outside of `streamlit run`"""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(fn, iterations, setup=None, alloc_iterations=5, warmup=1):
+    """Time `fn` over `iterations` runs, then trace allocations over a few more.
+
+    The first `warmup` runs are discarded, so lazy imports and first-use
+    initialization do not end up in the timed samples.
+    """
+    for i in range(warmup):
+        fn(*(setup(i) if setup else ()))
+
+    durations = []
+    for i in range(iterations):
+        args = setup(i) if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        durations.append(time.perf_counter() - started)
+
+    peaks, nets = [], []
+    for i in range(min(alloc_iterations, iterations)):
+        args = setup(i) if setup else ()
+        tracemalloc.start()
+        fn(*args)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        nets.append(current)
+
+    ms = [d * 1000 for d in durations]
+    return {
+        'n': iterations,
+        'warmup': warmup,
+        'mean_ms': sum(ms) / len(ms),
+        'p50_ms': percentile(ms, 0.50),
+        'p95_ms': percentile(ms, 0.95),
+        'p99_ms': percentile(ms, 0.99),
+        'min_ms': min(ms),
+        'max_ms': max(ms),
+        'alloc_peak_kib': percentile(peaks, 0.5) / 1024 if peaks else None,
+        'alloc_net_kib': percentile(nets, 0.5) / 1024 if nets else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_session():
+    app.st.session_state = SessionState()
+    app.initialize_session_state()
+    return app.st.session_state
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="realm-bench-")
+    embeddings = FakeEmbeddings(latency=args.embed_latency)
+    chat_model = FakeChatModel(first_token_latency=args.llm_latency, token_latency=args.token_latency)
+
+    def registry_in(folder, cached=False):
+        factory = lambda: embeddings  # noqa: E731
+        if cached:
+            cache = QueryEmbeddingCache(os.path.join(folder, "cache.sqlite"))
+            factory = lambda: CachedEmbeddings(embeddings, cache)  # noqa: E731
+        return KnowledgeBaseRegistry(
+            os.path.join(folder, "db"), os.path.join(folder, "hash.txt"), embeddings_factory=factory
+        )
+
+    stages = {}
+    n = args.iterations
+
+    # Knowledge base: full build, cold load from disk, warm lookup
+    stages['kb_build'] = measure(
+        lambda registry: registry.get(GAME_RULES), n, warmup=args.warmup,
+        setup=lambda i: (registry_in(tempfile.mkdtemp(dir=workdir)),)
+    )
+    shared = tempfile.mkdtemp(dir=workdir)
+    registry = registry_in(shared, cached=True)
+    registry.get(GAME_RULES)
+    stages['kb_load'] = measure(
+        lambda registry: registry.get(GAME_RULES), n, warmup=args.warmup,
+        setup=lambda i: (registry_in(shared),)
+    )
+    stages['kb_get_warm'] = measure(lambda: registry.get(GAME_RULES), n, warmup=args.warmup)
+
+    # Retrieval: raw vector search (embeds every query) and the memoized path
+    knowledge_base = registry_in(shared).get(GAME_RULES)
+    stages['similarity_search'] = measure(
+        lambda query: knowledge_base.similarity_search(query, k=3), n, warmup=args.warmup,
+        setup=lambda i: (QUERIES[i % len(QUERIES)],)
+    )
+    stages['retrieval_cached'] = measure(
+        lambda query: registry.search(GAME_RULES, query, k=3), n, warmup=args.warmup,
+        setup=lambda i: (QUERIES[i % len(QUERIES)],)
+    )
+
+    # Prompt formatting, parsing and resource updates
+    llm_client._client = llm_client.LLMClient(llm=chat_model, hedge=False)
+    engine = game_engine._engine = game_engine.GameEngine(
+        registry=registry, campaign_memory=False, novelty_threshold=0
+    )
+    game = new_session().game
+    responses = [chat_model.respond(query) for query in QUERIES]
+    history = [QUERIES[1], QUERIES[2], QUERIES[3]]
+    stages['prompt_build'] = measure(
+        lambda query: engine.build_prompt(query, history, responses[:3], game.resources), n, warmup=args.warmup,
+        setup=lambda i: (QUERIES[i % len(QUERIES)],)
+    )
+    stages['parse_ai_response'] = measure(
+        game_engine.parse_ai_response, n, warmup=args.warmup, setup=lambda i: (responses[i % len(responses)],)
+    )
+    stages['update_resources'] = measure(
+        lambda decision: game_engine.update_resources(decision, dict(game.resources)), n, warmup=args.warmup,
+        setup=lambda i: (QUERIES[i % len(QUERIES)],)
+    )
+
+    # The whole turn, blocking and streamed
+    new_session()
+    stages['process_user_input'] = measure(
+        app.process_user_input, n, warmup=args.warmup, setup=lambda i: (QUERIES[i % len(QUERIES)],)
+    )
+    new_session()
+    stages['stream_user_input'] = measure(
+        lambda query: app.stream_user_input(query, lambda parser: None), n, warmup=args.warmup,
+        setup=lambda i: (QUERIES[i % len(QUERIES)],)
+    )
+    llm_client._client.close()
+
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': n,
+            'warmup': args.warmup,
+            'embed_latency_s': args.embed_latency,
+            'llm_first_token_latency_s': args.llm_latency,
+            'llm_token_latency_s': args.token_latency,
+        },
+        'stages': stages,
+    }
+
+
+def compare(result, baseline):
+    """Print the p50 ratio of every stage against an earlier run"""
+    print(f"{'stage':<22}{'p50 ms':>10}{'baseline':>10}{'ratio':>8}", file=sys.stderr)
+    for name, stats in result['stages'].items():
+        before = baseline['stages'].get(name)
+        if not before:
+            continue
+        ratio = stats['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('nan')
+        print(f"{name:<22}{stats['p50_ms']:>10.3f}{before['p50_ms']:>10.3f}{ratio:>8.2f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before each stage")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds until the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per streamed token")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            compare(result, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Core building blocks of Realm Stories that live outside the Streamlit script"""
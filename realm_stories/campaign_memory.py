@@ -0,0 +1,103 @@
+"""Bounded long-term memory of a campaign.
+
+The prompt only carries the last three turns. Older turns are folded into a
+running summary by a background job, and every past decision is embedded into
+a small per-session vector store so the decisions relevant to the current
+request can be pulled back into the prompt. Both parts have a fixed size in
+the prompt, however long the game runs.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SUMMARY_PROMPT = """Du führst das Gedächtnis des Game Masters von Realm Stories.
+
+Bisherige Zusammenfassung:
+{summary}
+
+Neue Ereignisse (Charakter: Situation -> Entscheidung des Chiefs):
+{events}
+
+Fasse alle Ereignisse in höchstens 5 kurzen Sätzen zusammen. Behalte vor allem
+Entscheidungen des Chiefs, auf die Charaktere später reagieren könnten.
+
+Zusammenfassung:"""
+
+# Shared by all sessions of this server process
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="campaign-memory")
+
+
+def event_line(event):
+    return f"{event.character}: {event.situation} -> Chief: {event.decision}"
+
+
+class CampaignMemory:
+    """Running summary plus an embedding index of past decisions for one session"""
+
+    def __init__(self, summarize, embeddings, recent_turns=3, fold_batch=3,
+                 max_summary_chars=1000, relevant_decisions=2):
+        self.summarize = summarize
+        self.embeddings = embeddings
+        self.recent_turns = recent_turns
+        self.fold_batch = fold_batch
+        self.max_summary_chars = max_summary_chars
+        self.relevant_decisions = relevant_decisions
+        self.summary = ""
+        self.folded = 0
+        self._decisions = []
+        self._vectors = None
+        self._job = None
+        self._lock = threading.Lock()
+
+    def update(self, events, is_decision=lambda event: True):
+        """Fold turns that dropped out of the prompt window, in the background"""
+        end = len(events) - self.recent_turns
+        if end - self.folded < self.fold_batch or (self._job is not None and not self._job.done()):
+            return
+        lines = [event_line(event) for event in events[self.folded:end] if event.decision and is_decision(event)]
+        self._job = executor.submit(self._fold, lines, end)
+
+    def _fold(self, lines, end):
+        try:
+            summary = self.summary
+            if lines:
+                summary = self.summarize(SUMMARY_PROMPT.format(
+                    summary=summary or "(noch keine)", events="\n".join(lines)
+                )).strip()[:self.max_summary_chars]
+                vectors = np.array(self.embeddings.embed_documents(lines), dtype=np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+            with self._lock:
+                self.summary = summary
+                if lines:
+                    self._decisions.extend(lines)
+                    self._vectors = vectors if self._vectors is None else np.vstack([self._vectors, vectors])
+                self.folded = end
+        except Exception as e:
+            # Retried on the next turn; the game continues with the old summary
+            print(f"Updating the campaign memory failed: {e}")
+
+    def relevant(self, query_embedding):
+        """Past decisions most similar to the embedded query (cosine similarity)"""
+        with self._lock:
+            decisions, vectors = self._decisions, self._vectors
+        if vectors is None or not len(decisions):
+            return []
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+        scores = vectors @ (embedding / (np.linalg.norm(embedding) + 1e-12))
+        best = np.argsort(-scores)[:self.relevant_decisions]
+        return [decisions[i] for i in sorted(best)]
+
+    def prompt_sections(self, query_embedding=None):
+        """Memory texts for the prompt: the summary and the relevant past decisions.
+
+        The query embedding is the one the retrieval computed; when the retrieval
+        got by without one (cache hit, BM25), only the summary is used, so the
+        memory never adds an embedding call to the turn.
+        """
+        sections = []
+        if self.summary:
+            sections.append(f"Bisher: {self.summary}")
+        if query_embedding is not None:
+            sections.extend(f"Frühere Entscheidung: {line}" for line in self.relevant(query_embedding))
+        return sections
@@ -0,0 +1,119 @@
+"""Structure-aware splitting of the game rules.
+
+GAME_RULES is markdown with three kinds of content: character sheets
+(`## Andre` with `###` subsections), story arcs (`## Liebeszauber`) and CSV
+dialog rows (`KEY,CHARAKTER,DIALOG`). Instead of cutting fixed-size windows
+through all of them, every character, every arc and every dialog situation
+becomes exactly one chunk with metadata that retrieval can filter on.
+"""
+import csv
+import io
+import re
+
+# Bump when the chunk boundaries or metadata change, so existing indexes are rebuilt
+CHUNKING_VERSION = "sections-v3"
+
+CHARACTERS_SECTION = "# Charaktere"
+STORY_SECTION = "# Die Geschichte bisher"
+DIALOG_SECTION = "# Textbeispiele"
+CSV_HEADER = "KEY,CHARAKTER,DIALOG"
+
+_LINE_SUFFIX = re.compile(r"_\d+$")
+
+
+def situation_key(key):
+    """Base key of a dialog row, e.g. 'bahri_gambles_1' -> 'bahri_gambles'"""
+    base = _LINE_SUFFIX.sub("", key)
+    if base == key and "_" in key:
+        # Answer rows like '..._yes' / '..._no' belong to the base situation
+        base = key.rsplit("_", 1)[0]
+    return base
+
+
+def _split_sections(text, prefix):
+    """Split text into (heading, lines) at lines starting with exactly `prefix`"""
+    sections = []
+    heading, lines = None, []
+    for line in text.split("\n"):
+        if line.startswith(prefix) and not line.startswith(prefix + "#"):
+            sections.append((heading, lines))
+            heading, lines = line, []
+        else:
+            lines.append(line)
+    sections.append((heading, lines))
+    return sections
+
+
+def dialog_groups(lines):
+    """Group the CSV dialog rows of `lines` into situations keyed by `situation_key`.
+
+    Returns dicts with the key, the first non-Chief character (or None) and the
+    rows (KEY, CHARAKTER, DIALOG), in the order of the rules. Chunking, the
+    repeat check and the economy model all read the examples through this.
+    """
+    groups = {}
+    for row in csv.reader(line for line in lines if line.strip()):
+        if len(row) < 3 or row[0] == "KEY":
+            continue
+        key, character = situation_key(row[0]), row[1]
+        group = groups.setdefault(key, {"key": key, "character": None, "rows": []})
+        if group["character"] is None and character != "Chief":
+            group["character"] = character
+        group["rows"].append(row)
+    return list(groups.values())
+
+
+def dialog_examples(rules):
+    """`dialog_groups` of the CSV examples section of a rules text"""
+    for heading, lines in _split_sections(rules, "# "):
+        if heading is not None and heading.startswith(DIALOG_SECTION):
+            return dialog_groups(lines)
+    return []
+
+
+def _dialog_chunks(lines, heading):
+    chunks = []
+    for group in dialog_groups(lines):
+        body = "\n".join(_csv_line(row) for row in group["rows"])
+        metadata = {"type": "dialog", "situation": group["key"]}
+        if group["character"]:
+            metadata["character"] = group["character"]
+        chunks.append((f"{heading}\n{CSV_HEADER}\n{body}", metadata))
+    return chunks
+
+
+def _csv_line(row):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(row)
+    return buffer.getvalue()
+
+
+def split_game_rules(game_content):
+    """Return (texts, metadatas) with one chunk per logical section of the rules"""
+    chunks = []
+    for heading, lines in _split_sections(game_content, "# "):
+        body = "\n".join(lines).strip()
+        if heading is None:
+            continue
+        if heading.startswith(CHARACTERS_SECTION) or heading.startswith(STORY_SECTION):
+            is_characters = heading.startswith(CHARACTERS_SECTION)
+            for sub_heading, sub_lines in _split_sections(body, "## "):
+                sub_body = "\n".join(sub_lines).strip()
+                if sub_heading is None:
+                    if sub_body:
+                        chunks.append((f"{heading}\n{sub_body}", {"type": "section"}))
+                    continue
+                name = sub_heading[3:].strip()
+                if is_characters:
+                    metadata = {"type": "character", "character": name}
+                else:
+                    metadata = {"type": "arc", "arc": name}
+                chunks.append((f"{heading}\n{sub_heading}\n{sub_body}", metadata))
+        elif heading.startswith(DIALOG_SECTION):
+            chunks.extend(_dialog_chunks(lines, heading))
+        elif body:
+            chunks.append((f"{heading}\n{body}", {"type": "section", "section": heading[2:].strip()}))
+
+    texts = [text for text, _ in chunks]
+    metadatas = [metadata for _, metadata in chunks]
+    return texts, metadatas
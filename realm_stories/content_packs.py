@@ -0,0 +1,88 @@
+"""Versioned content packs: the lore the game master works from.
+
+The rules text (characters, the city, the CSV dialog examples) used to be
+a 700-line string literal in rules.py that every import of the engine
+parsed. It now lives in a pack directory next to this module:
+
+    realm_stories/content/base/
+        pack.json    {"name": "base", "version": "1.0.0", "format": 1, "rules": "rules.md"}
+        rules.md     the rules text, read as is (the knowledge base hash depends on every byte)
+
+Packs are read on first use and cached per process. REALM_STORIES_CONTENT_PACK
+selects a pack by name (a directory under realm_stories/content) or by path,
+so a new campaign or a translation ships as a folder without a code change.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content")
+DEFAULT_PACK = "base"
+PACK_FORMAT = 1
+
+
+class ContentPackError(ValueError):
+    """A content pack that is missing or cannot be read"""
+
+
+@dataclass(frozen=True)
+class ContentPack:
+    name: str
+    version: str
+    path: str
+    rules: str
+
+    def describe(self):
+        return {'name': self.name, 'version': self.version, 'path': self.path, 'rules_chars': len(self.rules)}
+
+
+def pack_path(name_or_path):
+    """Directory of a pack given by name or path"""
+    if os.sep in name_or_path or (os.altsep and os.altsep in name_or_path) or os.path.isdir(name_or_path):
+        return os.path.abspath(name_or_path)
+    return os.path.join(CONTENT_DIR, name_or_path)
+
+
+def read_pack(path):
+    """Load the pack in directory `path` (uncached)"""
+    manifest_file = os.path.join(path, "pack.json")
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ContentPackError(f"Content pack {path!r} has no readable pack.json: {e}") from e
+    if manifest.get('format', PACK_FORMAT) > PACK_FORMAT:
+        raise ContentPackError(f"Content pack {path!r} needs format {manifest['format']}, this version reads {PACK_FORMAT}")
+    try:
+        # newline='' keeps the text byte for byte as it was written
+        with open(os.path.join(path, manifest.get('rules', "rules.md")), encoding='utf-8', newline='') as f:
+            rules = f.read()
+    except OSError as e:
+        raise ContentPackError(f"Content pack {path!r}: {e}") from e
+    return ContentPack(
+        name=manifest.get('name', os.path.basename(path)),
+        version=str(manifest.get('version', "0")),
+        path=path,
+        rules=rules,
+    )
+
+
+_packs = {}
+_packs_lock = threading.Lock()
+
+
+def load_pack(name_or_path=None):
+    """The pack given by name or path (default: REALM_STORIES_CONTENT_PACK or "base"), read once per process"""
+    if name_or_path is None:
+        name_or_path = os.getenv("REALM_STORIES_CONTENT_PACK", DEFAULT_PACK)
+    path = pack_path(name_or_path)
+    with _packs_lock:
+        if path not in _packs:
+            _packs[path] = read_pack(path)
+        return _packs[path]
+
+
+def default_rules():
+    """Rules text of the configured pack"""
+    return load_pack().rules
@@ -0,0 +1,311 @@
+"""Vectorized Monte Carlo model of the resource economy.
+
+Advances many games at once as NumPy arrays: every turn each game meets a
+situation with two options, a decision policy picks one for all games in one
+call, and the effect table draws the resource changes of the whole batch.
+No model calls are involved, so a balancing sweep over 100k games takes
+seconds instead of LLM-driven playthroughs.
+
+    python -m realm_stories.economy --games 100000 --turns 50 --policy random --policy greedy
+    python -m realm_stories.economy --sweep wealth=-10:5,-5:5,0:5 --plots economy.html
+    python -m realm_stories.economy --effects effects.json --recording responses.jsonl
+
+Situations default to the Chief answer pairs of the CSV examples in the game
+rules; `--recording` uses the options of responses recorded by the self-play
+simulator instead. Policies are the names in POLICIES or any
+"module:function" with the signature of `random_policy`.
+"""
+import argparse
+import functools
+import importlib
+import json
+import time
+
+import numpy as np
+
+from realm_stories.chunking import dialog_examples
+from realm_stories.effects import EffectTable
+from realm_stories.content_packs import default_rules
+from realm_stories.rules import INITIAL_RESOURCES, RESOURCE_BOUNDS, RESOURCE_EFFECTS
+
+
+def example_situations(rules=None):
+    """Option pairs from the Chief lines of the CSV examples (default: of the content pack), per situation"""
+    situations = []
+    for group in dialog_examples(default_rules() if rules is None else rules):
+        options = [dialog for _, character, dialog, *_ in group['rows'] if character == 'Chief']
+        if len(options) >= 2:
+            situations.append(tuple(options[:2]))
+    return situations
+
+
+def recorded_situations(path):
+    """Option pairs of the responses in a recording of the self-play simulator"""
+    from realm_stories.engine import is_parse_failure, parse_ai_response
+
+    situations = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                character, situation, options = parse_ai_response(json.loads(line)['response'])
+                if not is_parse_failure(character, situation):
+                    situations.append(tuple(options))
+    return situations
+
+
+def initial_state(games, rng, table, ranges=INITIAL_RESOURCES):
+    """Vectorized engine.initial_resources, columns in `table.resources` order"""
+    missing = [name for name in table.resources if name not in ranges]
+    if missing:
+        raise ValueError(f"No initial range for resources {missing}")
+    state = np.empty((games, len(table.resources)), dtype=np.int64)
+    for column, name in enumerate(table.resources):
+        low, high = ranges[name]
+        state[:, column] = rng.integers(low, high + 1, size=games) if low != high else low
+    return state
+
+
+# -- policies ----------------------------------------------------------------
+# policy(state, options, rng, table) -> chosen option per game. `options` holds
+# the rule weights of both options of every game's situation, shape
+# (games, 2, rules); `state` the resources, shape (games, resources).
+
+def always_a(state, options, rng, table):
+    return np.zeros(len(state), dtype=np.int64)
+
+
+def always_b(state, options, rng, table):
+    return np.ones(len(state), dtype=np.int64)
+
+
+def random_policy(state, options, rng, table):
+    return rng.integers(0, options.shape[1], size=len(state))
+
+
+def expected_changes(options, table):
+    """Mean resource change of every option, shape (games, options, resources)"""
+    return (options * ((table.low + table.high) / 2)) @ table.rule_resource
+
+
+def greedy(state, options, rng, table):
+    """The option whose expected effect leaves the weakest resource strongest"""
+    after = np.clip(state[:, None, :] + expected_changes(options, table), table.lower, table.upper)
+    # The noise only breaks ties, so equal options are picked at random
+    score = after.min(axis=2) + rng.random(after.shape[:2]) * 1e-3
+    return score.argmax(axis=1)
+
+
+def reckless(state, options, rng, table):
+    """The opposite of greedy, for finding how fast a careless Chief goes broke"""
+    after = np.clip(state[:, None, :] + expected_changes(options, table), table.lower, table.upper)
+    score = after.min(axis=2) + rng.random(after.shape[:2]) * 1e-3
+    return score.argmin(axis=1)
+
+
+POLICIES = {
+    'a': always_a,
+    'b': always_b,
+    'random': random_policy,
+    'greedy': greedy,
+    'reckless': reckless,
+}
+
+
+def load_policy(name):
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, function = name.partition(':')
+    if not function:
+        raise ValueError(f"Unknown policy {name!r}, expected one of {sorted(POLICIES)} or module:function")
+    return getattr(importlib.import_module(module), function)
+
+
+# -- simulation --------------------------------------------------------------
+
+class EconomyResult:
+    """Per-resource statistics of one simulation, collected turn by turn"""
+
+    def __init__(self, table, games, turns):
+        self.resources = table.resources
+        self.games = games
+        self.turns = turns
+        resources = len(table.resources)
+        self.first_zero = np.full((games, resources), -1, dtype=np.int32)
+        self.turns_at_zero = np.zeros((games, resources), dtype=np.int32)
+        self.turns_at_max = np.zeros((games, resources), dtype=np.int32)
+        self.total = np.zeros((games, resources))
+        self.total_squared = np.zeros((games, resources))
+        self.quantiles = np.zeros((turns + 1, resources, 3))
+        self.final = None
+        self.seconds = None
+
+    def record(self, turn, state, table):
+        if turn:
+            at_zero = state == table.lower
+            self.first_zero[at_zero & (self.first_zero < 0)] = turn
+            self.turns_at_zero += at_zero
+            self.turns_at_max += state == table.upper
+            self.total += state
+            self.total_squared += np.square(state, dtype=np.float64)
+        self.quantiles[turn] = np.percentile(state, [5, 50, 95], axis=0).T
+
+    def to_dict(self):
+        mean = self.total / self.turns
+        within_game_variance = self.total_squared / self.turns - np.square(mean)
+        stats = {}
+        for column, name in enumerate(self.resources):
+            final = self.final[:, column]
+            first_zero = self.first_zero[:, column]
+            broke = first_zero[first_zero >= 0]
+            stats[name] = {
+                'final': {
+                    'mean': float(final.mean()),
+                    'variance': float(final.var()),
+                    'p5': float(np.percentile(final, 5)),
+                    'p50': float(np.percentile(final, 50)),
+                    'p95': float(np.percentile(final, 95)),
+                },
+                'within_game_variance': float(within_game_variance[:, column].mean()),
+                'time_to_zero': {
+                    'share_of_games': float(len(broke) / self.games),
+                    'p10_turn': float(np.percentile(broke, 10)) if len(broke) else None,
+                    'median_turn': float(np.median(broke)) if len(broke) else None,
+                },
+                'saturation': {
+                    'share_of_turns_at_max': float(self.turns_at_max[:, column].sum() / (self.games * self.turns)),
+                    'share_of_games_reaching_max': float((self.turns_at_max[:, column] > 0).mean()),
+                    'share_of_turns_at_zero': float(self.turns_at_zero[:, column].sum() / (self.games * self.turns)),
+                },
+            }
+        return stats
+
+
+def simulate(games=100000, turns=50, policy=random_policy, table=None, situations=None, seed=0,
+             initial=initial_state):
+    """Play `games` games of `turns` decisions each; returns an EconomyResult"""
+    started = time.perf_counter()
+    table = table or EffectTable()
+    situations = situations or example_situations()
+    rng = np.random.default_rng(seed)
+    # Rule weights of every option of every situation, matched once
+    weights = np.stack([table.match(list(options)) for options in situations])
+
+    result = EconomyResult(table, games, turns)
+    state = initial(games, rng, table)
+    result.record(0, state, table)
+    rows = np.arange(games)
+    for turn in range(1, turns + 1):
+        options = weights[rng.integers(0, len(weights), size=games)]
+        choice = policy(state, options, rng, table)
+        state = table.clamp(state + table.draw(options[rows, choice], rng))
+        result.record(turn, state, table)
+    result.final = state
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+# -- plots -------------------------------------------------------------------
+
+def save_plots(runs, path):
+    """Write the distributions of all runs as one HTML page of Altair charts"""
+    import altair as alt
+    import pandas as pd
+
+    trajectories, finals, zeros = [], [], []
+    for label, result in runs:
+        for column, name in enumerate(result.resources):
+            for turn, (p5, p50, p95) in enumerate(result.quantiles[:, column]):
+                trajectories.append({'run': label, 'resource': name, 'turn': turn, 'p5': p5, 'p50': p50, 'p95': p95})
+            values, counts = np.unique(result.final[:, column], return_counts=True)
+            finals.extend(
+                {'run': label, 'resource': name, 'value': int(v), 'share': c / result.games}
+                for v, c in zip(values, counts)
+            )
+            turns, counts = np.unique(result.first_zero[:, column], return_counts=True)
+            zeros.extend(
+                {'run': label, 'resource': name, 'turn': int(t), 'share': c / result.games}
+                for t, c in zip(turns, counts) if t >= 0
+            )
+
+    trajectory = alt.Chart(pd.DataFrame(trajectories))
+    bands = alt.layer(
+        trajectory.mark_area(opacity=0.2).encode(x='turn:Q', y='p5:Q', y2='p95:Q', color='run:N'),
+        trajectory.mark_line().encode(x='turn:Q', y=alt.Y('p50:Q', title="median (band: p5-p95)"), color='run:N'),
+    ).facet(column='resource:N').properties(title="Resources over the game")
+    final = alt.Chart(pd.DataFrame(finals)).mark_line(interpolate='step').encode(
+        x=alt.X('value:Q', title="value at the end"), y=alt.Y('share:Q', title="share of games"), color='run:N'
+    ).facet(column='resource:N').properties(title="Final distribution")
+    charts = [bands, final]
+    if zeros:
+        charts.append(alt.Chart(pd.DataFrame(zeros)).mark_bar(opacity=0.6).encode(
+            x=alt.X('turn:O', title="turn the resource first hit zero"), y=alt.Y('share:Q', stack=None), color='run:N'
+        ).facet(column='resource:N').properties(title="Time to zero"))
+    alt.vconcat(*charts).save(path)
+
+
+# -- command line ------------------------------------------------------------
+
+def parse_sweep(value):
+    """"wealth=-10:5,-5:5" -> ('wealth', [(-10, 5), (-5, 5)])"""
+    resource, _, ranges = value.partition('=')
+    if resource not in RESOURCE_BOUNDS or not ranges:
+        raise argparse.ArgumentTypeError(f"expected RESOURCE=LOW:HIGH[,LOW:HIGH...], got {value!r}")
+    try:
+        return resource, [tuple(int(x) for x in item.split(':')) for item in ranges.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ranges must be LOW:HIGH integers, got {ranges!r}")
+
+
+def with_range(rules, resource, new_range):
+    """Copy of `rules` with the range of every rule of `resource` replaced"""
+    return [dict(rule, range=new_range) if rule['resource'] == resource else rule for rule in rules]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--policy", action='append', help="repeat to compare policies (default: random)")
+    parser.add_argument("--effects", help="JSON file with {\"rules\": [...], \"bounds\": {...}, "
+                                          "\"initial\": {...}} like rules.py")
+    parser.add_argument("--recording", help="take the situations from recorded responses (JSON lines)")
+    parser.add_argument("--sweep", type=parse_sweep, action='append', default=[],
+                        help="RESOURCE=LOW:HIGH,...: rerun with these ranges for the rules of RESOURCE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plots", help="write the distribution plots to this HTML file")
+    args = parser.parse_args(argv)
+
+    rules, bounds, initial = RESOURCE_EFFECTS, RESOURCE_BOUNDS, INITIAL_RESOURCES
+    if args.effects:
+        with open(args.effects, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        rules, bounds = config['rules'], config.get('bounds', bounds)
+        initial = config.get('initial', initial)
+    situations = recorded_situations(args.recording) if args.recording else example_situations()
+    variants = [("base", rules)] + [
+        (f"{resource}={low}:{high}", with_range(rules, resource, (low, high)))
+        for resource, ranges in args.sweep for low, high in ranges
+    ]
+
+    runs = []
+    report = {'games': args.games, 'turns': args.turns, 'situations': len(situations), 'runs': []}
+    for policy_name in args.policy or ['random']:
+        policy = load_policy(policy_name)
+        for variant, variant_rules in variants:
+            result = simulate(
+                args.games, args.turns, policy, EffectTable(variant_rules, bounds), situations, args.seed,
+                initial=functools.partial(initial_state, ranges=initial)
+            )
+            label = policy_name if len(variants) == 1 else f"{policy_name} {variant}"
+            runs.append((label, result))
+            report['runs'].append({
+                'policy': policy_name, 'effects': variant, 'seconds': round(result.seconds, 3),
+                'resources': result.to_dict(),
+            })
+    if args.plots:
+        save_plots(runs, args.plots)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
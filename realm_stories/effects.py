@@ -0,0 +1,165 @@
+"""Resource effects of decisions, compiled from the declarative table in rules.py.
+
+The keywords of all rules go into one regular expression, so a decision is
+lower-cased and scanned once however many rules there are. At each position
+the longest keyword wins and brings along the rules of the keywords that are
+prefixes of it. Small tables like the game's own check a decision with plain
+substring tests first, since most decisions contain no keyword at all; on
+them the table costs about as much as the hard-coded checks it replaced, and
+it pulls ahead as rules are added.
+
+For the simulators the table also works on whole batches. `match` turns many
+texts into a rule-weight matrix, matching each distinct text once (in Python;
+the option texts of a simulation repeat), and `draw` samples the resource
+changes of any number of games from it with NumPy.
+"""
+import random
+import re
+
+import numpy as np
+
+from realm_stories.rules import RESOURCE_BOUNDS, RESOURCE_EFFECTS
+
+
+# Tables with at most this many distinct keywords get the substring check
+# (measured with benchmarks/bench_effects.py --rules)
+PREFILTER_KEYWORDS = 12
+
+
+def _is_word_start(text, position):
+    return position == 0 or not (text[position - 1].isalnum() or text[position - 1] == '_')
+
+
+class EffectTable:
+    """Keyword → resource effect rules, compiled into a single-pass matcher"""
+
+    def __init__(self, rules=RESOURCE_EFFECTS, bounds=RESOURCE_BOUNDS):
+        self.resources = tuple(bounds)
+        self.bounds = dict(bounds)
+        self.rules = []
+        keywords = {}
+        for index, rule in enumerate(rules):
+            if rule['resource'] not in self.bounds:
+                raise ValueError(f"Effect rule {index} changes unknown resource {rule['resource']!r}")
+            low, high = rule['range']
+            if low > high:
+                raise ValueError(f"Effect rule {index} has an empty range {rule['range']}")
+            self.rules.append((rule['resource'], low, high))
+            for keyword, weight in rule['keywords'].items():
+                anywhere = keyword.startswith('*')
+                keyword = keyword.lstrip('*').lower()
+                if not keyword:
+                    raise ValueError(f"Effect rule {index} has an empty keyword")
+                keywords.setdefault((keyword, anywhere), []).append((index, float(weight)))
+
+        # Per keyword: the effects that always apply when it matches, and those
+        # of word-start prefixes that only apply if the match starts a word
+        anywhere = {keyword for keyword, is_anywhere in keywords if is_anywhere}
+        self._effects = {}
+        for keyword, _ in keywords:
+            if keyword in self._effects:
+                continue
+            always, at_word_start = [], []
+            for (other, other_anywhere), effects in keywords.items():
+                if keyword.startswith(other):
+                    # A match without "*" is at a word start anyway
+                    (always if other_anywhere or keyword not in anywhere else at_word_start).extend(effects)
+            self._effects[keyword] = (always, at_word_start)
+        self._positional = any(at_word_start for _, at_word_start in self._effects.values())
+        # Any match of the pattern contains one of these, so texts without them are skipped
+        self._prefilter = tuple(self._effects) if len(self._effects) <= PREFILTER_KEYWORDS else None
+        # The word start is checked behind the keyword ("fest(?<!\wfest)"): with
+        # every alternative starting with a literal, the regex engine can skip
+        # ahead to candidate characters instead of trying each position
+        self.pattern = re.compile("|".join(
+            re.escape(keyword) if keyword in anywhere else fr"{re.escape(keyword)}(?<!\w{re.escape(keyword)})"
+            for keyword in sorted(self._effects, key=len, reverse=True)
+        ))
+
+        self.low = np.array([low for _, low, _ in self.rules], dtype=np.int64)
+        self.high = np.array([high for _, _, high in self.rules], dtype=np.int64)
+        # Sums the changes of all rules per resource with one matrix product
+        self.rule_resource = np.zeros((len(self.rules), len(self.resources)), dtype=np.int64)
+        for index, (resource, _, _) in enumerate(self.rules):
+            self.rule_resource[index, self.resources.index(resource)] = 1
+        self.lower = np.array([self.bounds[name][0] for name in self.resources], dtype=np.int64)
+        self.upper = np.array([self.bounds[name][1] for name in self.resources], dtype=np.int64)
+
+    def _matched_effects(self, text):
+        if not self._positional:
+            return [self._effects[keyword][0] for keyword in self.pattern.findall(text)]
+        matched = []
+        for match in self.pattern.finditer(text):
+            always, at_word_start = self._effects[match.group()]
+            matched.append(always + at_word_start if _is_word_start(text, match.start()) else always)
+        return matched
+
+    def hits(self, text):
+        """Weight of the strongest matching keyword per fired rule index"""
+        text = text.lower()
+        if self._prefilter is not None:
+            for keyword in self._prefilter:
+                if keyword in text:
+                    break
+            else:
+                return {}
+        hits = {}
+        for effects in self._matched_effects(text):
+            for rule, weight in effects:
+                if weight > hits.get(rule, 0.0):
+                    hits[rule] = weight
+        return hits
+
+    def changes(self, text, rng=random):
+        """Draw the resource changes of one decision (rules in table order)"""
+        hits = self.hits(text)
+        if not hits:
+            return {}
+        changes = {}
+        for rule, weight in sorted(hits.items()):
+            resource, low, high = self.rules[rule]
+            change = rng.randint(low, high)
+            if weight != 1.0:
+                change = round(change * weight)
+            changes[resource] = changes.get(resource, 0) + change
+        return changes
+
+    def apply(self, text, resources, rng=random):
+        """Change `resources` in place within their bounds; returns the drawn changes"""
+        changes = self.changes(text, rng)
+        for resource, change in changes.items():
+            low, high = self.bounds[resource]
+            resources[resource] = max(low, min(high, resources[resource] + change))
+        return changes
+
+    # -- batches -------------------------------------------------------------
+
+    def match(self, texts):
+        """Rule weights of many texts, shape (len(texts), rules); 0 where a rule does not fire"""
+        distinct = {}
+        rows = np.fromiter(
+            (distinct.setdefault(text, len(distinct)) for text in texts), dtype=np.intp, count=len(texts)
+        )
+        weights = np.zeros((len(distinct), len(self.rules)))
+        for row, text in enumerate(distinct):
+            for rule, weight in self.hits(text).items():
+                weights[row, rule] = weight
+        return weights[rows]
+
+    def draw(self, weights, rng=None):
+        """Resource changes for every row of `weights`, shape (rows, resources)"""
+        rng = rng if rng is not None else np.random.default_rng()
+        draws = rng.integers(self.low, self.high + 1, size=weights.shape)
+        return np.rint(draws * weights).astype(np.int64) @ self.rule_resource
+
+    def clamp(self, resources):
+        """Clip an array of resources (columns in `self.resources` order) to the bounds"""
+        return np.clip(resources, self.lower, self.upper)
+
+    def apply_batch(self, texts, resources, rng=None):
+        """Apply one decision per row of `resources`; returns (new resources, changes)"""
+        changes = self.draw(self.match(texts), rng)
+        return self.clamp(np.asarray(resources) + changes), changes
+
+
+default_table = EffectTable()
@@ -0,0 +1,133 @@
+"""Two-level cache for query embeddings.
+
+Player inputs repeat a lot (the "new situation" request, short button texts),
+so most retrieval queries have been embedded before. Lookups go to an
+in-memory LRU first and then to a sqlite file that is shared by all sessions
+and processes and survives restarts. Only real misses reach the provider.
+"""
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+CACHE_FILENAME = "realm_stories_cache.sqlite"
+
+
+def normalize_query(text):
+    """Normalize a query so trivially different spellings share a cache entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class QueryEmbeddingCache:
+    """In-memory LRU in front of a persistent sqlite store, keyed by (model, text)"""
+
+    def __init__(self, path=CACHE_FILENAME, max_entries=2048):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _db(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " model TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text))"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model, text):
+        """Return the cached vector or None; counts hits and misses"""
+        key = (model, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+            try:
+                row = self._db().execute(
+                    "SELECT vector FROM query_embeddings WHERE model = ? AND text = ?", key
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Embedding cache lookup failed: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            vector = array('f')
+            vector.frombytes(row[0])
+            vector = vector.tolist()
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector
+
+    def put(self, model, text, vector):
+        """Store a vector in memory and on disk"""
+        key = (model, text)
+        with self._lock:
+            self._remember(key, list(vector))
+            try:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, text, vector) VALUES (?, ?, ?)",
+                    (model, text, array('f', vector).tobytes())
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"Embedding cache write failed: {e}")
+
+    def stats(self):
+        """Return hit/miss counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings:
+    """Wraps an embeddings model and serves repeated queries from the cache.
+
+    Implements the two methods of langchain's Embeddings interface without
+    subclassing it, which would import langchain with this module.
+    """
+
+    def __init__(self, embeddings, cache, model=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, 'model', type(embeddings).__name__)
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self.cache.get(self.model, key)
+        if vector is None:
+            vector = self.embeddings.embed_query(key)
+            self.cache.put(self.model, key, vector)
+        return vector
+
+
+# Shared by all sessions of this server process
+query_embedding_cache = QueryEmbeddingCache()
@@ -0,0 +1,831 @@
+"""UI-agnostic game core.
+
+A GameEngine holds everything the players of one process share (knowledge
+base, LLM client, prompt assembler, situation pool, situation library) and
+creates GameSessions,
+which hold the state of one game. `GameSession.next_turn` is the async entry
+point used by the HTTP/WebSocket server in realm_stories.server;
+`GameSession.play_turn` is its blocking twin for the Streamlit app and worker
+threads. Nothing in here touches Streamlit.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+
+from realm_stories import novelty, structured
+from realm_stories.campaign_memory import CampaignMemory
+from realm_stories.content_packs import load_pack
+from realm_stories.effects import default_table
+from realm_stories.history import RAW_HISTORY_LIMIT, record_turn
+from realm_stories.knowledge_base import registry as default_registry
+from realm_stories.llm_client import get_client
+from realm_stories.prompting import get_assembler
+from realm_stories.rate_limiter import BACKGROUND, INTERACTIVE, PREFETCH
+from realm_stories.rules import (
+    GAME_PROMPT_TEMPLATE, INITIAL_RESOURCES, NEW_SITUATION_REQUEST, STRUCTURED_PROMPT_TEMPLATE
+)
+from realm_stories.situation_library import arace, get_library, library_writer, race
+from realm_stories.situation_pool import get_pool, pool_key
+from realm_stories.speculation import SpeculativeTurns
+from realm_stories.streaming import IncrementalSituationParser, astream_response, stream_response
+from realm_stories.tracing import span, trace_turn
+
+
+# What parse_ai_response returns when the model ignored the format, or parsing crashed
+PARSE_FALLBACK = ("Ein unbekannter Bote", "Es ist etwas unvorhergesehenes passiert.", ["Weiter", "Ignorieren"])
+ERROR_FALLBACK = ("Ein Charakter", "möchte mit dir sprechen.", ["Anhören", "Später"])
+
+
+def openai_callback():
+    """langchain's token and cost counter; langchain.callbacks is imported on the first turn, not at startup"""
+    from langchain.callbacks import get_openai_callback
+    return get_openai_callback()
+
+
+def _warm_client():
+    """Build the shared LLM client and import what the first turn needs"""
+    try:
+        get_client()
+        import langchain.callbacks  # noqa: F401 (openai_callback)
+    except Exception as e:
+        print(f"Warming the LLM client failed: {e}")
+
+
+def parse_ai_response(response):
+    """Parse AI response to extract character, situation and options"""
+    try:
+        lines = response.strip().split('\n')
+        situation = ""
+        character = "Ein Charakter" # Default value
+        options = []
+
+        parsing_situation = False
+
+        for line in lines:
+            line = line.strip()
+            if line.startswith('SITUATION:'):
+                parsing_situation = True
+                full_situation_line = line.replace('SITUATION:', '').strip()
+
+                # Versuche, den Charakter und die Situation zu extrahieren
+                if '**:' in full_situation_line:
+                    parts = full_situation_line.split('**:', 1)
+                    character = parts[0].replace('**', '').strip()
+                    situation = parts[1].strip()
+                else:
+                    situation = full_situation_line # Fallback
+                continue
+
+            if line.startswith('OPTIONEN:'):
+                parsing_situation = False
+                continue
+
+            if parsing_situation:
+                situation += line
+
+            if line.startswith(('A)', 'B)')):
+                option_text = line[2:].strip()
+                options.append(option_text)
+
+        # Fallback, wenn das Parsen fehlschlägt
+        if not situation or len(options) < 2:
+            return PARSE_FALLBACK[0], PARSE_FALLBACK[1], list(PARSE_FALLBACK[2])
+
+        return character, situation, options[:2]  # Max 2 options
+
+    except Exception as e:
+        # Finaler Fallback bei einem Fehler
+        return ERROR_FALLBACK[0], ERROR_FALLBACK[1], list(ERROR_FALLBACK[2])
+
+
+def update_resources(decision_text, resources):
+    """Simulate resource changes based on decisions (rules in rules.RESOURCE_EFFECTS)"""
+    return default_table.apply(decision_text, resources)
+
+
+def is_parse_failure(character, situation):
+    return (character, situation) in {PARSE_FALLBACK[:2], ERROR_FALLBACK[:2]}
+
+
+def initial_resources():
+    # Fixed amounts draw nothing, so seeded self-play games keep their random sequence
+    return {
+        name: random.randint(low, high) if low != high else low
+        for name, (low, high) in INITIAL_RESOURCES.items()
+    }
+
+
+def is_decision(event):
+    """False for "new situation" requests, which are not decisions of the Chief"""
+    return not event.decision.startswith("Erzähle mir")
+
+
+def _merge_usage(usage, other):
+    return {key: usage[key] + other[key] for key in usage}
+
+
+def _marking_first_token(llm_span, on_update):
+    """Wrap `on_update` so the first streamed chunk is recorded on the LLM span"""
+    def update(parser):
+        if 'first_token_ms' not in llm_span.attrs:
+            llm_span.mark('first_token_ms')
+        if on_update is not None:
+            return on_update(parser)
+    return update
+
+
+# The logic of a turn is written once, as generators that yield I/O requests
+# ('complete', prompt, ...) and receive their results. _drive runs them with
+# blocking calls for the Streamlit app and worker threads, _adrive on the event
+# loop of the game server, so only the I/O differs between the two.
+
+def _drive(steps, io):
+    """Run a generator of I/O requests with the blocking methods of `io`; returns its result"""
+    value, error = None, None
+    try:
+        while True:
+            try:
+                name, *args = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as done:
+                return done.value
+            try:
+                value, error = getattr(io, name)(*args), None
+            except Exception as e:
+                value, error = None, e
+    finally:
+        steps.close()
+
+
+async def _adrive(steps, io):
+    """`_drive` with the coroutine methods of `io`"""
+    value, error = None, None
+    try:
+        while True:
+            try:
+                name, *args = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as done:
+                return done.value
+            try:
+                value, error = await getattr(io, name)(*args), None
+            except Exception as e:
+                value, error = None, e
+    finally:
+        steps.close()
+
+
+class _BlockingIO:
+    """The I/O requests of the turn steps, for blocking callers"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def call(self, function, *args):
+        return function(*args)
+
+    def stream(self, prompt, parser, on_update, stop_event, scheduling):
+        return stream_response(self.engine.llm.stream(prompt, **scheduling), parser, on_update, stop_event)
+
+    def predict(self, prompt, callbacks, scheduling):
+        return self.engine.llm.predict(prompt, callbacks=callbacks, **scheduling)
+
+    def complete(self, prompt, prompt_tokens, stream, on_update, scheduling):
+        return self.engine.complete(prompt, prompt_tokens, stream, on_update, **scheduling)
+
+    def sample(self, prompt, prompt_tokens, scheduling):
+        """Start a blocking generation in parallel with the turn; returns its future"""
+        return novelty.executor.submit(
+            contextvars.copy_context().run, self.engine.complete, prompt, prompt_tokens, False, **scheduling
+        )
+
+    def wait(self, future):
+        return future.result()
+
+    def race(self, prompt, prompt_tokens, stream, on_update, scheduling, timeout, fallback):
+        return race(
+            lambda update, cancel_event: self.engine.complete(
+                prompt, prompt_tokens, stream, update, cancel_event, **scheduling
+            ),
+            on_update, timeout, fallback
+        )
+
+
+class _AsyncIO:
+    """The same requests for the event loop of the game server"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def call(self, function, *args):
+        # Retrieval may call the embeddings API and the library writes sqlite, so
+        # they run off the event loop
+        return await asyncio.to_thread(function, *args)
+
+    async def stream(self, prompt, parser, on_update, stop_event, scheduling):
+        return await astream_response(
+            self.engine.llm.stream_from_loop(prompt, **scheduling), parser, on_update, stop_event
+        )
+
+    async def predict(self, prompt, callbacks, scheduling):
+        return await self.engine.llm.predict_from_loop(prompt, callbacks=callbacks, **scheduling)
+
+    async def complete(self, prompt, prompt_tokens, stream, on_update, scheduling):
+        return await self.engine.acomplete(prompt, prompt_tokens, stream, on_update, **scheduling)
+
+    async def sample(self, prompt, prompt_tokens, scheduling):
+        return asyncio.ensure_future(self.engine.acomplete(prompt, prompt_tokens, False, **scheduling))
+
+    async def wait(self, future):
+        return await future
+
+    async def race(self, prompt, prompt_tokens, stream, on_update, scheduling, timeout, fallback):
+        return await arace(
+            lambda update: self.complete(prompt, prompt_tokens, stream, update, scheduling),
+            on_update, timeout, fallback
+        )
+
+
+class InvalidDecision(ValueError):
+    """A decision that is not one of the options of the current situation"""
+
+
+@dataclass
+class TurnResult:
+    """What a client needs to render a turn"""
+    character: str
+    situation: str
+    options: list
+    resource_changes: dict
+    resources: dict
+    turn: int
+    cost: float = 0.0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class GameEngine:
+    """Services shared by all sessions of this process, and the sessions played on them"""
+
+    def __init__(self, rules=None, template=None, registry=None, llm=None,
+                 pool=None, prompt_budget=4000, campaign_memory=True, speculation=False,
+                 speculation_budget=20, trace_turns=20, session_ttl=3600, structured=False,
+                 library=None, library_timeout=0.0, cost_budget=0.0, novelty_threshold=0.5,
+                 novelty_retries=1, novelty_samples=0):
+        # Default: the rules text of the content pack (REALM_STORIES_CONTENT_PACK)
+        self.content_pack = load_pack() if rules is None else None
+        self.rules = self.content_pack.rules if rules is None else rules
+        self.registry = registry or default_registry
+        # With `structured` the model answers in JSON (realm_stories.structured)
+        self.structured = structured
+        if template is None:
+            template = STRUCTURED_PROMPT_TEMPLATE if structured else GAME_PROMPT_TEMPLATE
+        self.assembler = get_assembler(template, budget=prompt_budget)
+        self.pool = pool or get_pool()
+        self.campaign_memory = campaign_memory
+        self.speculation = speculation
+        self.speculation_budget = speculation_budget
+        self.trace_turns = trace_turns
+        self.session_ttl = session_ttl
+        # Outcomes of structured responses (valid, line_format, repaired, repair_failed)
+        # and of the repeat check (repeated, sampled, regenerated, repeat_kept, ...)
+        self.response_stats = Counter()
+        # Situations nearly repeating an example or an earlier one of the session
+        # (realm_stories.novelty) are replaced by one of `novelty_samples` parallel
+        # samples, or regenerated up to `novelty_retries` times; threshold 0 disables it
+        self.novelty = novelty.example_index(novelty_threshold) if novelty_threshold > 0 else None
+        self.novelty_retries = novelty_retries
+        self.novelty_samples = novelty_samples
+        # SituationLibrary shared across players, or None. A stored situation is served
+        # instead of a new one if the model has sent nothing after `library_timeout`
+        # seconds (0: never) or the session has spent `cost_budget` USD (0: no budget)
+        self.library = library
+        self.library_timeout = library_timeout
+        self.cost_budget = cost_budget
+        self._llm = llm
+        self._io = _BlockingIO(self)
+        self._aio = _AsyncIO(self)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def llm(self):
+        # Resolved per call so the shared client can be swapped, e.g. by the benchmarks
+        return self._llm or get_client()
+
+    # -- shared services -----------------------------------------------------
+
+    def llm_stats(self):
+        """Stats of the LLM client; None while the shared client is still being built"""
+        client = self._llm or get_client(create=False)
+        return client.stats() if client is not None else None
+
+    def warm(self):
+        """Load the knowledge base and build the shared LLM client in the background"""
+        if self._llm is None:
+            threading.Thread(target=_warm_client, name="llm-client-warmup", daemon=True).start()
+        return self.registry.warm(self.rules)
+
+    def knowledge_base(self):
+        return self.registry.get(self.rules)
+
+    def create_memory(self, session_id=None):
+        """Long-term memory for a new session, or None if disabled"""
+        if not self.campaign_memory:
+            return None
+        return CampaignMemory(
+            summarize=lambda prompt: self.llm.predict(prompt, priority=BACKGROUND, session=session_id),
+            embeddings=self.registry.embeddings_factory()
+        )
+
+    def build_prompt(self, user_input, question_history, answer_history, resources, memory=None):
+        """Retrieve context and fill the game prompt for the given game state.
+
+        Returns the prompt and its per-section token counts.
+        """
+        docs, query_embedding = self.registry.search_with_embedding(self.rules, user_input, k=3)
+        memory_texts = ()
+        if memory is not None:
+            with span("memory"):
+                memory_texts = memory.prompt_sections(query_embedding)
+
+        with span("prompt_build") as active:
+            prompt, token_counts = self.assembler.assemble(
+                [doc.page_content for doc in docs],
+                list(zip(question_history[-3:], answer_history[-3:])),
+                resources,
+                user_input,
+                memory_texts=memory_texts
+            )
+            active.attrs['prompt_tokens'] = token_counts['total']
+        return prompt, token_counts
+
+    def _usage(self, callback, prompt_tokens, response):
+        # Provider counts where available (not for streamed responses), local counts otherwise
+        return {
+            'prompt': callback.prompt_tokens or prompt_tokens['total'],
+            'completion': callback.completion_tokens or self.assembler.count(response),
+            'cost_usd': callback.total_cost,
+        }
+
+    def _stream_parser(self):
+        return structured.IncrementalJsonParser() if self.structured else IncrementalSituationParser()
+
+    def _check_structured(self, response):
+        """(usable response in the line format, None), or (None, (fields, problems)) to repair"""
+        fields, problems = structured.validate(response)
+        if not problems:
+            self.response_stats['valid'] += 1
+            return structured.to_text(fields), None
+        # The model may have fallen back to the line format of the free text mode
+        if not is_parse_failure(*parse_ai_response(response)[:2]):
+            self.response_stats['line_format'] += 1
+            return response, None
+        return None, (fields, problems)
+
+    def _merge_repair(self, response, fields, problems, repair_response):
+        fields, problems = structured.merge_repair(fields, problems, repair_response)
+        if problems:
+            self.response_stats['repair_failed'] += 1
+            print(f"Structured response could not be repaired: {problems}")
+            # parse_ai_response turns it into the fallback situation as before
+            return response
+        self.response_stats['repaired'] += 1
+        return structured.to_text(fields)
+
+    def complete(self, prompt, prompt_tokens, stream=True, on_update=None, stop_event=None,
+                 **scheduling):
+        """Run the model on a prompt; returns (response, token usage).
+
+        Streamed calls stop reading once option B is complete. `scheduling`
+        (priority, session, coalesce) is passed on to the rate limiter. In
+        structured mode, invalid fields are repaired with a second, short request.
+        """
+        return _drive(self._completion(prompt, prompt_tokens, stream, on_update, stop_event, scheduling), self._io)
+
+    async def acomplete(self, prompt, prompt_tokens, stream=True, on_update=None, **scheduling):
+        """`complete` for async callers; `on_update` may be a coroutine function"""
+        return await _adrive(self._completion(prompt, prompt_tokens, stream, on_update, None, scheduling), self._aio)
+
+    def _completion(self, prompt, prompt_tokens, stream, on_update, stop_event, scheduling):
+        """Steps of `complete` (see _drive)"""
+        with span("llm", streamed=stream) as llm_span, openai_callback() as cb:
+            if stream:
+                response = yield (
+                    'stream', prompt, self._stream_parser(), _marking_first_token(llm_span, on_update),
+                    stop_event, scheduling
+                )
+            else:
+                response = yield ('predict', prompt, [cb], scheduling)
+        if self.structured and not (stop_event is not None and stop_event.is_set()):
+            checked, broken = self._check_structured(response)
+            if broken is None:
+                response = checked
+            else:
+                with span("repair", fields=",".join(broken[1])), openai_callback() as repair_cb:
+                    try:
+                        repair_response = yield (
+                            'predict', structured.repair_prompt(*broken, response), [repair_cb], scheduling
+                        )
+                    except Exception as e:
+                        print(f"Repair request failed: {e}")
+                        repair_response = ""
+                response = self._merge_repair(response, *broken, repair_response)
+                cb.total_cost += repair_cb.total_cost
+        return response, self._usage(cb, prompt_tokens, response)
+
+    def generate(self, user_input, question_history, answer_history, resources, cancel_event=None,
+                 memory=None, session=None, coalesce=True):
+        """Generate (raw response, prompt token counts) for a snapshot of a game state.
+
+        Safe to call from worker threads; returns None if cancelled. Runs at
+        prefetch priority, below interactive turns.
+        """
+        # Logged only; the turn that commits the result is traced in its session
+        with trace_turn("background", input=user_input[:80]) as trace:
+            prompt, prompt_tokens = self.build_prompt(
+                user_input, question_history, answer_history, resources, memory
+            )
+            response, usage = self.complete(
+                prompt, prompt_tokens, stop_event=cancel_event,
+                priority=PREFETCH, session=session, coalesce=coalesce
+            )
+            trace.attrs['cancelled'] = cancel_event is not None and cancel_event.is_set()
+            if trace.attrs['cancelled']:
+                return None
+            trace.add_tokens(**usage)
+        return response, prompt_tokens
+
+    # -- sessions ------------------------------------------------------------
+
+    def new_session(self, session_id=None, resources=None, player=None):
+        """A session that is not tracked by the engine (e.g. one owned by Streamlit)"""
+        return GameSession(self, session_id=session_id, resources=resources, player=player)
+
+    def create_session(self, resources=None, player=None):
+        """A new tracked session, for clients that look sessions up by id"""
+        self.expire_sessions()
+        session = self.new_session(resources=resources, player=player)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get_session(self, session_id):
+        """Return a tracked session; raises KeyError for unknown or expired ids"""
+        with self._lock:
+            session = self._sessions[session_id]
+        session.last_active = time.monotonic()
+        return session
+
+    def close_session(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.speculation.discard()
+        return session is not None
+
+    def expire_sessions(self):
+        """Drop sessions idle for longer than `session_ttl` seconds"""
+        cutoff = time.monotonic() - self.session_ttl
+        with self._lock:
+            expired = [key for key, session in self._sessions.items() if session.last_active < cutoff]
+        for key in expired:
+            self.close_session(key)
+        return len(expired)
+
+    @property
+    def session_count(self):
+        return len(self._sessions)
+
+
+class GameSession:
+    """State of one game, independent of the client that renders it"""
+
+    def __init__(self, engine, session_id=None, resources=None, player=None):
+        self.engine = engine
+        self.id = session_id or uuid.uuid4().hex
+        # Library situations are never served twice to the same player, across their games
+        self.player = player or self.id
+        self.resources = resources or initial_resources()
+        # The inputs and raw responses of the last RAW_HISTORY_LIMIT turns, for the prompt
+        self.question_history = []
+        self.answer_history = []
+        # One parsed TurnEvent per generated situation
+        self.events = []
+        self.current_character = None
+        self.current_situation = None
+        self.decision_options = []
+        self.memory = engine.create_memory(self.id)
+        # Every situation shown in this game, for the repeat check
+        self.shown_situations = engine.novelty.child() if engine.novelty is not None else None
+        self.speculation = SpeculativeTurns(max_turns=engine.speculation_budget)
+        self.traces = deque(maxlen=engine.trace_turns)
+        self.total_cost = 0.0
+        self.last_active = time.monotonic()
+        self._turn_lock = asyncio.Lock()
+
+    @property
+    def turn(self):
+        return len(self.events)
+
+    def state(self):
+        """Snapshot of the session for clients"""
+        return {
+            'session_id': self.id,
+            'turn': self.turn,
+            'character': self.current_character,
+            'situation': self.current_situation,
+            'options': list(self.decision_options),
+            'resources': dict(self.resources),
+            'cost': self.total_cost,
+        }
+
+    def build_prompt(self, user_input):
+        return self.engine.build_prompt(
+            user_input, self.question_history, self.answer_history, self.resources, self.memory
+        )
+
+    def apply_response(self, user_input, response, prompt_tokens=None, cost=0.0, store=True):
+        """Parse the model response and make it the current situation"""
+        # GEÄNDERT: Charakter, Situation und Optionen werden jetzt geparst
+        with span("parse"):
+            character, situation, options = parse_ai_response(response)
+        if not is_parse_failure(character, situation):
+            if self.shown_situations is not None:
+                self.shown_situations.add(situation)
+            if store and self.engine.library is not None:
+                with span("library_add"):
+                    self.engine.library.add(character, situation, response, self.resources, player=self.player)
+
+        self.question_history.append(user_input)
+        self.answer_history.append(response)
+        del self.question_history[:-RAW_HISTORY_LIMIT]
+        del self.answer_history[:-RAW_HISTORY_LIMIT]
+        record_turn(self.events, user_input, character, situation, options, prompt_tokens)
+
+        self.current_character = character
+        self.current_situation = situation
+        self.decision_options = options
+        self.total_cost += cost
+
+        resource_changes = {}
+        if not user_input.startswith("Erzähle mir"):
+            with span("resources"):
+                resource_changes = update_resources(user_input, self.resources)
+            if len(self.events) > 1:
+                self.events[-2].resource_delta = resource_changes
+        if self.memory is not None:
+            self.memory.update(self.events, is_decision=is_decision)
+        return TurnResult(
+            character, situation, list(options), resource_changes, dict(self.resources), self.turn, cost
+        )
+
+    def check_decision(self, decision):
+        """`decision` if it answers the current situation; None asks for a new one"""
+        if decision is None or decision == NEW_SITUATION_REQUEST:
+            return None
+        if decision not in self.decision_options:
+            raise InvalidDecision("decision is not one of the current options")
+        return decision
+
+    @property
+    def over_budget(self):
+        return 0 < self.engine.cost_budget <= self.total_cost
+
+    def take_from_library(self, user_input, reason, trace=None):
+        """Commit a stored situation instead of generating one; None if none fits"""
+        library = self.engine.library
+        if library is None:
+            return None
+        with span("library", reason=reason):
+            response = library.take(
+                self.player,
+                self.resources,
+                [event.character for event in self.events[-3:]],
+                query=None if user_input == NEW_SITUATION_REQUEST else user_input,
+                reason=reason,
+                accept=lambda response: self._repeated(response) is None
+            )
+        if response is None:
+            return None
+        if trace is not None:
+            trace.attrs['library'] = reason
+        return self.apply_response(user_input, response, store=False)
+
+    def _keep_late(self, resources, generation, store=True):
+        """Account for a generation that was not used, and store it for other players"""
+        if generation.cancelled() or generation.exception() is not None:
+            return
+        response, usage = generation.result()
+        self.total_cost += usage['cost_usd']
+        if not store:
+            return
+        character, situation, _ = parse_ai_response(response)
+        if self.engine.library is not None and not is_parse_failure(character, situation):
+            # Runs as a done callback, possibly on the event loop
+            library_writer.submit(self.engine.library.add, character, situation, response, resources)
+
+    # -- repeats -------------------------------------------------------------
+
+    def _repeated(self, response):
+        """The shown or example situation that `response` nearly repeats, or None"""
+        if self.shown_situations is None:
+            return None
+        character, situation, _ = parse_ai_response(response)
+        if is_parse_failure(character, situation):
+            return None
+        with span("novelty"):
+            return self.shown_situations.duplicate_of(situation)
+
+    def _avoid_repeat(self, prompt, prompt_tokens, stream, on_update, response, usage, samples, resources):
+        """Steps: `response`, or if it repeats a situation: the first sample that does not,
+        else a regeneration told to avoid the repeat. Returns (response, usage)."""
+        stats = self.engine.response_stats
+        repeated = self._repeated(response)
+        if repeated is not None:
+            stats['repeated'] += 1
+        for sample in samples:
+            if repeated is None:
+                sample.add_done_callback(functools.partial(self._keep_late, resources))
+                continue
+            try:
+                candidate, sample_usage = yield ('wait', sample)
+            except Exception as e:
+                print(f"Sampling a situation failed: {e}")
+                continue
+            usage = _merge_usage(usage, sample_usage)
+            if self._repeated(candidate) is None:
+                response, repeated = candidate, None
+                stats['sampled'] += 1
+        for _ in range(self.engine.novelty_retries if repeated is not None else 0):
+            response, retry_usage = yield (
+                'complete', novelty.avoid_prompt(prompt, repeated), prompt_tokens, stream, on_update,
+                self._scheduling(INTERACTIVE)
+            )
+            usage = _merge_usage(usage, retry_usage)
+            repeated = self._repeated(response)
+            if repeated is None:
+                stats['regenerated'] += 1
+                break
+        if repeated is not None:
+            stats['repeat_kept'] += 1
+        return response, usage
+
+    def _scheduling(self, priority, **options):
+        return {'priority': priority, 'session': self.id, **options}
+
+    def _generate_turn(self, user_input, on_update, stream, trace):
+        """Steps of a generated turn: retrieval, the model (raced against the library),
+        the repeat check and the commit"""
+        prompt, prompt_tokens = yield ('call', self.build_prompt, user_input)
+        resources = dict(self.resources)
+        # Blocking generations of the same prompt, run in parallel with the turn
+        samples = []
+        if self.shown_situations is not None:
+            for _ in range(self.engine.novelty_samples):
+                samples.append((yield (
+                    'sample', prompt, prompt_tokens, self._scheduling(PREFETCH, coalesce=False)
+                )))
+
+        scheduling = self._scheduling(INTERACTIVE)
+        if self.engine.library is None or self.engine.library_timeout <= 0:
+            response, usage = yield ('complete', prompt, prompt_tokens, stream, on_update, scheduling)
+        else:
+            generated, result, generation = yield (
+                'race', prompt, prompt_tokens, stream, on_update, scheduling, self.engine.library_timeout,
+                lambda: self.take_from_library(user_input, "slow", trace)
+            )
+            if result is not None:
+                # The generation has been cancelled; only what it cost so far is accounted
+                generation.add_done_callback(functools.partial(self._keep_late, resources, store=False))
+                for sample in samples:
+                    sample.add_done_callback(functools.partial(self._keep_late, resources))
+                return result
+            response, usage = generated
+        response, usage = yield from self._avoid_repeat(
+            prompt, prompt_tokens, stream, on_update, response, usage, samples, resources
+        )
+        trace.add_tokens(**usage)
+        return (yield ('call', self.apply_response, user_input, response, prompt_tokens, usage['cost_usd']))
+
+    def _turn(self, decision, on_update, stream):
+        """Steps of `play_turn`"""
+        user_input = decision or NEW_SITUATION_REQUEST
+        self.last_active = time.monotonic()
+        kind = "streamed" if stream else "blocking"
+        with trace_turn(kind, sink=self.traces, session=self.id, input=user_input[:80]) as trace:
+            if self.over_budget:
+                result = yield ('call', self.take_from_library, user_input, "budget", trace)
+                if result is not None:
+                    return result
+            return (yield from self._generate_turn(user_input, on_update, stream, trace))
+
+    def play_turn(self, decision=None, on_update=None, stream=True):
+        """Generate the next turn; `decision` None asks for a new situation"""
+        return _drive(self._turn(decision, on_update, stream), self.engine._io)
+
+    async def next_turn(self, decision=None, on_update=None, stream=True):
+        """Async `play_turn` for clients; pre-generated turns are used when ready, turns of
+        one session run one at a time, and a decision must be one of the current options
+        (InvalidDecision otherwise)"""
+        async with self._turn_lock:
+            decision = self.check_decision(decision)
+            # Waits for a speculative branch that is still running, so off the event loop
+            result = await asyncio.to_thread(self.take_prepared, decision)
+            if result is None:
+                result = await _adrive(self._turn(decision, on_update, stream), self.engine._aio)
+            self.prefetch()
+            return result
+
+    # -- pre-generated turns -------------------------------------------------
+
+    def pool_key(self):
+        return pool_key(self.resources, [event.character for event in self.events[-3:]])
+
+    def start_speculation(self):
+        """Pre-generate the follow-up turn for both options while the player reads"""
+        self.speculation.start(
+            self.turn,
+            self.decision_options,
+            self.question_history,
+            self.answer_history,
+            self.resources,
+            functools.partial(self.engine.generate, memory=self.memory, session=self.id)
+        )
+
+    def refill_pool(self):
+        """Top up pooled "new situation" turns for this session's current state"""
+        self.engine.pool.refill(
+            self.pool_key(),
+            # Pooled entries for one key must differ, so identical prompts are not coalesced
+            functools.partial(self.engine.generate, coalesce=False),
+            NEW_SITUATION_REQUEST,
+            list(self.question_history),
+            list(self.answer_history),
+            dict(self.resources)
+        )
+
+    def prefetch(self):
+        """Start whatever pre-generation fits the current state"""
+        if self.decision_options:
+            if self.engine.speculation:
+                self.start_speculation()
+        else:
+            self.refill_pool()
+
+    def take_prepared(self, decision=None):
+        """Commit a pre-generated turn for this input; None if no matching one is ready"""
+        if decision is None or decision == NEW_SITUATION_REQUEST:
+            self.speculation.discard()
+            if not self.engine.pool.enabled:
+                return None
+            kind, user_input = "pooled", NEW_SITUATION_REQUEST
+            result = self.engine.pool.pop(self.pool_key())
+        else:
+            if not self.engine.speculation:
+                return None
+            kind, user_input = "speculative", decision
+            result = self.speculation.take(
+                self.turn, decision, self.question_history, self.answer_history, self.resources
+            )
+        if not result:
+            return None
+        if self._repeated(result[0]) is not None:
+            self.engine.response_stats['repeated_prepared'] += 1
+            return None
+        self.last_active = time.monotonic()
+        with trace_turn(kind, sink=self.traces, session=self.id, input=user_input[:80]):
+            return self.apply_response(user_input, *result)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine, configured from the environment on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = GameEngine(
+                prompt_budget=int(os.getenv("REALM_STORIES_PROMPT_BUDGET", "4000")),
+                campaign_memory=os.getenv("REALM_STORIES_CAMPAIGN_MEMORY", "1") != "0",
+                speculation=os.getenv("REALM_STORIES_SPECULATION", "0") == "1",
+                speculation_budget=int(os.getenv("REALM_STORIES_SPECULATION_BUDGET", "20")),
+                trace_turns=int(os.getenv("REALM_STORIES_TRACE_TURNS", "20")),
+                session_ttl=float(os.getenv("REALM_STORIES_SESSION_TTL", "3600")),
+                structured=os.getenv("REALM_STORIES_STRUCTURED", "0") == "1",
+                library=get_library() if os.getenv("REALM_STORIES_LIBRARY", "0") == "1" else None,
+                library_timeout=float(os.getenv("REALM_STORIES_LIBRARY_TIMEOUT", "0")),
+                cost_budget=float(os.getenv("REALM_STORIES_COST_BUDGET", "0")),
+                novelty_threshold=float(os.getenv("REALM_STORIES_NOVELTY_THRESHOLD", "0.5")),
+                novelty_retries=int(os.getenv("REALM_STORIES_NOVELTY_RETRIES", "1")),
+                novelty_samples=int(os.getenv("REALM_STORIES_NOVELTY_SAMPLES", "0"))
+            )
+        return _engine
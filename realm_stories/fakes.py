@@ -0,0 +1,172 @@
+"""Deterministic offline stand-ins for the OpenAI embeddings and chat model.
+
+Used by the benchmarks and simulators to drive the real game code without
+network access or cost. Both fakes can simulate provider latency.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+import numpy as np
+
+CHARACTERS = [
+    "Andre", "Bahri", "Clive", "Fleur", "Gunnar", "Logan",
+    "Mary", "Pete", "Regina", "Rita", "Sigmund", "Theobald",
+]
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeEmbeddings:
+    """Feature-hashing embeddings: texts sharing words get similar vectors (langchain's Embeddings interface)"""
+
+    def __init__(self, size=1536, latency=0.0, model="fake-embeddings"):
+        self.size = size
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+
+    def _embed(self, text):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.size
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+
+class FakeRateLimitError(Exception):
+    """Simulated provider rate limit; LLMClient retries it like openai's RateLimitError"""
+
+
+class FakeChatModel:
+    """Answers every prompt with a well-formed situation, optionally slowly.
+
+    The response is derived from a hash of the prompt, so the same prompt always
+    gets the same answer. `first_token_latency` and `token_latency` shape the
+    timing of streamed and blocking calls alike. `failure_rate` returns a
+    response without options, for exercising the parser fallbacks. With
+    `structured` the answers are JSON objects as asked for by
+    rules.STRUCTURED_PROMPT_TEMPLATE, and failures are broken JSON.
+    `error_rate` raises FakeRateLimitError before answering, for exercising
+    the client's retries.
+    """
+
+    retryable_errors = (FakeRateLimitError,)
+    rate_limit_errors = (FakeRateLimitError,)
+
+    def __init__(self, first_token_latency=0.0, token_latency=0.0, failure_rate=0.0, seed=0,
+                 structured=False, error_rate=0.0):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.structured = structured
+        self.error_rate = error_rate
+        self._errors = random.Random(seed)
+        self.calls = 0
+
+    def respond(self, prompt):
+        digest = hashlib.md5(f"{self.seed}:{prompt}".encode()).digest()
+        rng = random.Random(digest)
+        character = rng.choice(CHARACTERS)
+        topic = rng.choice(["Geld", "Essen", "Waffen", "ein Fest", "Münzen", "Rüstung", "Nahrung"])
+        situation = (
+            f"Chief, ich brauche deine Hilfe. Es geht um {topic} für die Stadt. "
+            f"Was sollen wir tun?"
+        )
+        if self.structured:
+            options = [
+                f"Ja, wir investieren in {topic}.",
+                f"Nein, dafür fehlt uns {rng.choice(['Geld', 'Zeit', 'Essen'])}.",
+            ]
+            response = json.dumps(
+                {'character': character, 'situation': situation, 'options': options}, ensure_ascii=False
+            )
+            if rng.random() < self.failure_rate:
+                broken = [
+                    response[:rng.randrange(len(response))],
+                    response.replace(options[0], options[0] * 4),
+                    json.dumps({'character': character, 'situation': situation}, ensure_ascii=False),
+                ]
+                return rng.choice(broken)
+            return response
+        if rng.random() < self.failure_rate:
+            return f"{character} murmelt etwas Unverständliches über {topic}."
+        return (
+            f"SITUATION: **{character}**: {situation}\n\n"
+            f"OPTIONEN:\n"
+            f"A) Ja, wir investieren in {topic}.\n"
+            f"B) Nein, dafür fehlt uns {rng.choice(['Geld', 'Zeit', 'Essen'])}.\n"
+        )
+
+    def _tokens(self, text):
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _call(self):
+        self.calls += 1
+        if self.error_rate and self._errors.random() < self.error_rate:
+            raise FakeRateLimitError("Rate limit reached (simulated)")
+
+    def predict(self, prompt, callbacks=None, **kwargs):
+        self._call()
+        response = self.respond(prompt)
+        time.sleep(self.first_token_latency + self.token_latency * len(self._tokens(response)))
+        return response
+
+    def stream(self, prompt, **kwargs):
+        self._call()
+        time.sleep(self.first_token_latency)
+        for token in self._tokens(self.respond(prompt)):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield token
+
+    async def apredict(self, prompt, callbacks=None, **kwargs):
+        self._call()
+        response = self.respond(prompt)
+        await asyncio.sleep(self.first_token_latency + self.token_latency * len(self._tokens(response)))
+        return response
+
+    async def astream(self, prompt, **kwargs):
+        self._call()
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._tokens(self.respond(prompt)):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield token
+
+
+class RecordedChatModel(FakeChatModel):
+    """Replays responses recorded from the real model (JSON lines with a "response" key).
+
+    Each prompt maps to one of the recorded responses by hash, so runs are
+    repeatable while still covering everything the model actually said.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        with open(path, 'r', encoding='utf-8') as f:
+            self.responses = [json.loads(line)['response'] for line in f if line.strip()]
+        if not self.responses:
+            raise ValueError(f"No recorded responses in {path}")
+
+    def respond(self, prompt):
+        digest = hashlib.md5(f"{self.seed}:{prompt}".encode()).digest()
+        return self.responses[int.from_bytes(digest[:8], 'little') % len(self.responses)]
@@ -0,0 +1,46 @@
+"""Compact per-turn records of a game.
+
+Each model response is parsed exactly once into a TurnEvent. The history panel
+renders from these records a page at a time, so a rerun costs the same no
+matter how long the game has been running, and the raw responses only need to
+be kept for the few turns that go back into the prompt.
+"""
+from dataclasses import dataclass, field
+
+# Raw responses kept for the prompt history; older turns live on as TurnEvents
+RAW_HISTORY_LIMIT = 3
+
+
+@dataclass(slots=True)
+class TurnEvent:
+    """One situation and what the player decided in it"""
+    character: str
+    situation: str
+    options: tuple
+    decision: str = None
+    resource_delta: dict = field(default_factory=dict)
+    prompt_tokens: dict = None
+
+
+def record_turn(events, user_input, character, situation, options, prompt_tokens=None):
+    """Close the previous event with the player's input and append the new situation"""
+    if events:
+        events[-1].decision = user_input
+    event = TurnEvent(character, situation, tuple(options), prompt_tokens=prompt_tokens)
+    events.append(event)
+    return event
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def completed_page(events, page, page_size=10):
+    """Completed events (all but the current one) of a page, newest first.
+
+    Returns (event number, event) pairs; page 1 holds the most recent events.
+    """
+    completed = len(events) - 1
+    end = completed - (page - 1) * page_size
+    start = max(0, end - page_size)
+    return [(i + 1, events[i]) for i in range(end - 1, start - 1, -1)]
@@ -0,0 +1,370 @@
+"""Process-wide registry for the game knowledge base.
+
+Streamlit re-executes app.py on every interaction, so anything defined there is
+rebuilt per rerun. This module is imported once per server process and keeps
+the (memory-mapped) index open for all sessions.
+
+langchain is imported on first use (the embeddings when the index is
+loaded, usually by the warm-up thread; Document with the first search), so
+importing this module stays cheap.
+
+Searches go through a BM25 index over the same chunks first
+(realm_stories.lexical_index): queries it answers decisively skip the query
+embedding and the vector search, the others get both rankings fused.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from realm_stories.chunking import CHUNKING_VERSION, split_game_rules
+from realm_stories.embedding_cache import CachedEmbeddings, normalize_query, query_embedding_cache
+from realm_stories.lexical_index import HybridRetriever, reciprocal_rank_fusion
+from realm_stories.mapped_index import MappedKnowledgeBase, write_index
+from realm_stories.tracing import span
+
+DB_FILENAME = "realm_stories_db"
+RULES_HASH_FILENAME = "hash.txt"
+
+
+def cached_openai_embeddings():
+    """OpenAI embeddings whose query vectors go through the shared cache"""
+    from langchain.embeddings.openai import OpenAIEmbeddings
+    return CachedEmbeddings(OpenAIEmbeddings(), query_embedding_cache)
+
+
+def rules_hash(game_content):
+    """Return the md5 hash used to detect changes of the game rules or the chunking"""
+    return hashlib.md5((CHUNKING_VERSION + game_content).encode()).hexdigest()
+
+
+def chunk_hash(text, metadata):
+    """Content hash of one chunk; unchanged chunks keep their embedding across rebuilds"""
+    payload = json.dumps([text, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def load_previous_vectors(db_filename=DB_FILENAME):
+    """Map chunk hash -> vector of the index currently on disk (empty if unknown)"""
+    try:
+        knowledge_base = MappedKnowledgeBase(db_filename, None)
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {chunk: knowledge_base.vectors[i] for i, chunk in enumerate(knowledge_base.chunk_hashes)}
+
+
+def build_knowledge_base(game_content, embeddings, db_filename=DB_FILENAME):
+    """Build the index, embedding only chunks whose content hash is new.
+
+    Returns the knowledge base and counts of reused, re-embedded and removed chunks.
+    """
+    # One chunk per character, story arc and dialog situation
+    chunks, metadatas = split_game_rules(game_content)
+    hashes = [chunk_hash(text, metadata) for text, metadata in zip(chunks, metadatas)]
+
+    previous = load_previous_vectors(db_filename)
+    missing = [i for i, chunk in enumerate(hashes) if chunk not in previous]
+    new_vectors = embeddings.embed_documents([chunks[i] for i in missing]) if missing else []
+    vectors = [previous.get(chunk) for chunk in hashes]
+    for i, vector in zip(missing, new_vectors):
+        vectors[i] = vector
+
+    write_index(db_filename, chunks, metadatas, np.array(vectors, dtype=np.float32), hashes)
+    knowledge_base = MappedKnowledgeBase(db_filename, embeddings.embed_query)
+
+    stats = {
+        'reused': len(chunks) - len(missing),
+        'embedded': len(missing),
+        'removed': len(set(previous) - set(hashes)),
+    }
+    return knowledge_base, stats
+
+
+def load_or_build_knowledge_base(game_content, embeddings, db_filename=DB_FILENAME,
+                                 rules_hash_filename=RULES_HASH_FILENAME, build=True):
+    """Load the knowledge base from disk or rebuild it if the rules have changed.
+
+    Returns the knowledge base and the rebuild statistics (None if it was loaded).
+    With `build=False` a missing or outdated index raises instead of being rebuilt.
+    """
+    current_rules_hash = rules_hash(game_content)
+
+    try:
+        if os.path.exists(db_filename) and os.path.exists(rules_hash_filename):
+            with open(rules_hash_filename, 'r') as f:
+                stored_hash = f.read().strip()
+            if stored_hash == current_rules_hash:
+                # Hash matches, try to load existing database
+                try:
+                    knowledge_base = MappedKnowledgeBase(db_filename, embeddings.embed_query)
+                    print("Game DB found with matching rules hash: loading...")
+                    return knowledge_base, None
+                except Exception as e:
+                    print(f"Failed to load existing database: {e}")
+            else:
+                print("Game rules have changed, updating knowledge base...")
+        else:
+            print("No existing database or hash file found...")
+    except Exception as e:
+        print(f"Error checking existing database: {e}")
+
+    if not build:
+        raise RuntimeError(f"No usable knowledge base at {db_filename} and rebuilding is disabled")
+    print("Creating new game knowledge base...")
+    knowledge_base, stats = build_knowledge_base(game_content, embeddings, db_filename)
+
+    # Save the hash of current rules
+    with open(rules_hash_filename, 'w') as f:
+        f.write(current_rules_hash)
+    print(
+        f"Game knowledge base created successfully: {stats['reused']} chunks reused, "
+        f"{stats['embedded']} re-embedded, {stats['removed']} removed"
+    )
+    return knowledge_base, stats
+
+
+def matches_filter(metadata, metadata_filter):
+    """True if every filter key equals the metadata value (or is one of a list of values)"""
+    for key, value in metadata_filter.items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if metadata.get(key) not in value:
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+
+def search_chunks(knowledge_base, query, k, metadata_filter=None, retriever=None, embedded=None):
+    """Return (chunk id, text, metadata) of the k chunks closest to the query.
+
+    With a HybridRetriever, a decisive BM25 match answers without embedding
+    the query; otherwise the BM25 and vector rankings are fused. The query
+    embedding, if one was computed, is appended to the list `embedded`.
+    """
+    accept = None
+    if metadata_filter:
+        accept = lambda i: matches_filter(knowledge_base.metadata(i), metadata_filter)  # noqa: E731
+    ranking = lexical = None
+    if retriever is not None:
+        with span("lexical") as active:
+            path, lexical, certainty = retriever.decide(query, k, accept)
+            active.attrs.update(path=path, confidence=round(certainty, 3))
+            if path == "lexical":
+                ranking = lexical
+                saved = retriever.skipped_vector_search()
+                active.attrs['saved_ms'] = round(saved * 1000, 3) if saved is not None else None
+
+    if ranking is None:
+        started = time.perf_counter()
+        with span("embed"):
+            embedding = knowledge_base.embedding_function(query)
+        if embedded is not None:
+            embedded.append(embedding)
+        # The index holds a few hundred chunks at most, so a filtered search simply ranks all of them
+        with span("search", k=k):
+            if retriever is None:
+                ranking = knowledge_base.rank(embedding, None if metadata_filter else k)
+            else:
+                vector = knowledge_base.rank(embedding, None if metadata_filter else retriever.depth)
+                ranking = reciprocal_rank_fusion(lexical, vector)
+        if retriever is not None:
+            retriever.vector_latency.add(time.perf_counter() - started)
+
+    chunks = []
+    for i in ranking:
+        if accept is not None and not accept(i):
+            continue
+        chunks.append((knowledge_base.chunk_id(i), knowledge_base.text(i), knowledge_base.metadata(i)))
+        if len(chunks) == k:
+            break
+    return tuple(chunks)
+
+
+class RetrievalCache:
+    """Bounded LRU of retrieval results keyed by (index version, query, k)"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            chunks = self._entries.get(key)
+            if chunks is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return chunks
+
+    def put(self, key, chunks):
+        with self._lock:
+            self._entries[key] = chunks
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class KnowledgeBaseRegistry:
+    """Holds one loaded knowledge base per process and shares it between sessions.
+
+    The rules hash is only recomputed when the rules text differs from the one
+    the current index was loaded for, so the common path is a string compare.
+    """
+
+    def __init__(self, db_filename=DB_FILENAME, rules_hash_filename=RULES_HASH_FILENAME,
+                 embeddings_factory=cached_openai_embeddings, hybrid=True, lexical_threshold=0.9,
+                 read_only=False):
+        self.db_filename = db_filename
+        self.rules_hash_filename = rules_hash_filename
+        self.embeddings_factory = embeddings_factory
+        # BM25 next to the vector search (realm_stories.lexical_index); a query whose
+        # top chunks cover `lexical_threshold` of its terms skips the embedding
+        self.hybrid = hybrid
+        self.lexical_threshold = lexical_threshold
+        # Only map an index built elsewhere, e.g. by the parent of self-play workers
+        self.read_only = read_only
+        self._retriever = None
+        self._lock = threading.RLock()
+        self._warm_thread = None
+        self._knowledge_base = None
+        self._rules = None
+        self._rules_hash = None
+        self.load_count = 0
+        self.last_build = None
+        self.retrieval_cache = RetrievalCache()
+
+    @property
+    def version(self):
+        """Rules hash of the currently loaded index, or None if nothing is loaded"""
+        return self._rules_hash
+
+    def get(self, game_content):
+        """Return the knowledge base for the given rules, loading it at most once"""
+        knowledge_base = self._knowledge_base
+        if knowledge_base is not None and game_content == self._rules:
+            return knowledge_base
+
+        with self._lock:
+            if self._knowledge_base is not None and game_content == self._rules:
+                return self._knowledge_base
+            current_hash = rules_hash(game_content)
+            if self._knowledge_base is not None and current_hash == self._rules_hash:
+                self._rules = game_content
+                return self._knowledge_base
+            return self._load(game_content, current_hash)
+
+    def search(self, game_content, query, k=3, metadata_filter=None):
+        """Return the k most relevant chunks as documents, memoized per index version.
+
+        `metadata_filter` restricts the result, e.g. {'type': 'character'} or
+        {'character': ['Bahri', 'Sigmund']}. A cache hit skips both the query
+        embedding and the vector search, and so does a decisive BM25 match.
+        """
+        return self.search_with_embedding(game_content, query, k, metadata_filter)[0]
+
+    def search_with_embedding(self, game_content, query, k=3, metadata_filter=None):
+        """`search`, plus the query embedding if this search computed one (else None)"""
+        with span("kb_load") as active:
+            load_count = self.load_count
+            knowledge_base = self.get(game_content)
+            active.attrs['loaded'] = self.load_count != load_count
+        filter_key = tuple(sorted(
+            (key, tuple(value) if isinstance(value, (list, set, frozenset)) else value)
+            for key, value in (metadata_filter or {}).items()
+        ))
+        key = (self._rules_hash, normalize_query(query), k, filter_key)
+        with span("retrieval_cache") as active:
+            chunks = self.retrieval_cache.get(key)
+            active.attrs['hit'] = chunks is not None
+        embedded = []
+        if chunks is None:
+            chunks = search_chunks(knowledge_base, query, k, metadata_filter, self._retriever, embedded)
+            self.retrieval_cache.put(key, chunks)
+        from langchain.docstore.document import Document
+        return [
+            Document(page_content=text, metadata={**metadata, 'id': chunk_id})
+            for chunk_id, text, metadata in chunks
+        ], embedded[0] if embedded else None
+
+    def reload(self, game_content):
+        """Drop the in-memory index and load it again from disk (hot reload)"""
+        with self._lock:
+            self._knowledge_base = None
+            self._rules = None
+            self._rules_hash = None
+            return self._load(game_content, rules_hash(game_content))
+
+    def warm(self, game_content):
+        """Load the index in a background thread so the first turn finds it ready"""
+        with self._lock:
+            if self._knowledge_base is not None or self._warm_thread is not None:
+                return self._warm_thread
+            self._warm_thread = threading.Thread(
+                target=self._warm, args=(game_content,),
+                name="knowledge-base-warmup", daemon=True
+            )
+            self._warm_thread.start()
+            return self._warm_thread
+
+    def _warm(self, game_content):
+        try:
+            self.get(game_content)
+        except Exception as e:
+            print(f"Warming the knowledge base failed: {e}")
+        finally:
+            self._warm_thread = None
+
+    def _load(self, game_content, current_hash):
+        self.retrieval_cache.clear()
+        knowledge_base, build_stats = load_or_build_knowledge_base(
+            game_content, self.embeddings_factory(),
+            db_filename=self.db_filename,
+            rules_hash_filename=self.rules_hash_filename,
+            build=not self.read_only
+        )
+        if build_stats is not None:
+            self.last_build = build_stats
+        self._retriever = HybridRetriever(knowledge_base, self.lexical_threshold) if self.hybrid else None
+        self._knowledge_base = knowledge_base
+        self._rules = game_content
+        self._rules_hash = current_hash
+        self.load_count += 1
+        return knowledge_base
+
+    def retrieval_stats(self):
+        """Retrieval cache hits and misses, and the paths of the searches that missed it"""
+        retriever = self._retriever
+        return {
+            'cache_hits': self.retrieval_cache.hits,
+            'cache_misses': self.retrieval_cache.misses,
+            **(retriever.stats() if retriever is not None else {}),
+        }
+
+
+# One registry per server process, shared by all Streamlit sessions
+registry = KnowledgeBaseRegistry(
+    hybrid=os.getenv("REALM_STORIES_HYBRID", "1") != "0",
+    lexical_threshold=float(os.getenv("REALM_STORIES_LEXICAL_THRESHOLD", "0.9"))
+)
+
+
+if __name__ == '__main__':
+    # Build or verify the index ahead of the first request, e.g. during deployment
+    from dotenv import load_dotenv
+    from realm_stories.rules import GAME_RULES
+
+    load_dotenv()
+    registry.get(GAME_RULES)
+    print(f"Knowledge base ready (rules hash {registry.version})")
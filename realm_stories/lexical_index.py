@@ -0,0 +1,213 @@
+"""BM25 index over the knowledge base chunks, and its fusion with the vector search.
+
+Most player queries name a character ("Sigmund", "Fleur") or a keyword
+("Steuern", "Tribut", "Hexe") that a handful of chunks contain verbatim. An
+inverted index finds those exactly and in microseconds, without the query
+embedding the vector search needs.
+
+The index is built in memory from the chunks of the loaded knowledge base, so
+it always matches realm_stories_db. `HybridRetriever.decide` then picks one
+of two paths per query:
+
+- "lexical": the BM25 top k contain the query's key terms (the character
+  and story arc names it mentions, or else all of its terms, weighted by
+  idf) and at least one term is specific to a few chunks, so the BM25
+  ranking is the answer and no embedding is requested;
+- "hybrid": BM25 and vector ranking are merged with reciprocal rank fusion,
+  score = sum of 1 / (RRF_K + rank) over both lists.
+
+The retriever keeps the latency of recent vector searches, so every lexical
+answer is credited with the time it saved.
+"""
+import functools
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from realm_stories.metrics import LatencyTracker
+
+RRF_K = 60
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[^\W_]+")
+# Function words of the rules and the player inputs ("Erzähl mir von ..."); they match every chunk
+STOP_WORDS = frozenset("""
+aber alle als also am an auch auf aus bei bin bis bist da damit dann das dass dein deine dem den der des dich die
+dies diese dir doch du durch ein eine einem einen einer eines er erzähl erzähle es etwas für hab habe haben hat
+hatte ich ihm ihn ihr im in ist ja jetzt kann kein keine mal man mein meine mich mir mit muss nach nicht noch nun
+nur ob oder sehr sein seine sich sie sind so soll über um und uns unser unsere vom von vor war was weil wenn wer
+wie wir wird wo zu zum zur
+""".split())
+_SUFFIXES = ("ern", "en", "er", "es", "e", "n", "s")
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """Strip one common German inflection suffix ("Steuern" and "Steuer" share a term)"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Stemmed, lower-cased words without stop words; underscores split dialog keys"""
+    return [stem(word) for word in _TOKEN.findall(text.casefold()) if word not in STOP_WORDS and len(word) > 1]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of texts; positions match the knowledge base"""
+
+    def __init__(self, texts, k1=K1, b=B):
+        self.count = len(texts)
+        documents = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(terms.values()) for terms in documents], dtype=np.float32)
+        average = float(lengths.mean()) if self.count else 0.0
+        self._terms = {}
+        term_ids, positions, frequencies = [], [], []
+        for position, terms in enumerate(documents):
+            for term, frequency in terms.items():
+                term_ids.append(self._terms.setdefault(term, len(self._terms)))
+                positions.append(position)
+                frequencies.append(frequency)
+        # Postings of term t are positions[starts[t]:starts[t + 1]], with their precomputed
+        # BM25 weights alongside, so a query only adds array slices
+        term_ids = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        counts = np.bincount(term_ids, minlength=len(self._terms))
+        self._starts = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        self._idf = np.log1p((self.count - counts + 0.5) / (counts + 0.5)).tolist()
+        self._positions = np.array(positions, dtype=np.int64)[order]
+        frequencies = np.array(frequencies, dtype=np.float32)[order]
+        norm = k1 * (1.0 - b + b * lengths[self._positions] / average) if self.count else 0.0
+        idf = np.array(self._idf, dtype=np.float32)[term_ids[order]]
+        self._weights = idf * frequencies * (k1 + 1.0) / (frequencies + norm)
+
+    @classmethod
+    def from_knowledge_base(cls, knowledge_base):
+        return cls([knowledge_base.text(i) for i in range(len(knowledge_base))])
+
+    def __len__(self):
+        return self.count
+
+    def idf(self, document_frequency):
+        return math.log(1.0 + (self.count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def match(self, query, key_terms=frozenset()):
+        """(BM25 scores, term coverage, specificity) of every position for the query.
+
+        Coverage is the idf-weighted share of the query terms a chunk contains,
+        counting only the query terms in `key_terms` if there are any; terms no
+        chunk contains count with the highest possible idf. Specificity is the
+        highest idf of a query term that some chunk contains.
+        """
+        terms = set(tokenize(query))
+        keys = terms & key_terms or terms
+        scores = np.zeros(self.count, dtype=np.float32)
+        covered = np.zeros(self.count, dtype=np.float32)
+        total = specificity = 0.0
+        for term in terms:
+            term_id = self._terms.get(term)
+            if term_id is None:
+                total += self.idf(0) if term in keys else 0.0
+                continue
+            idf = self._idf[term_id]
+            postings = slice(self._starts[term_id], self._starts[term_id + 1])
+            positions = self._positions[postings]
+            scores[positions] += self._weights[postings]
+            if term in keys:
+                covered[positions] += idf
+                total += idf
+            specificity = max(specificity, idf)
+        return scores, covered / total if total else covered, specificity
+
+    def rank(self, query, k=None):
+        """(positions with a score above 0, best first; their scores)"""
+        scores = self.match(query)[0]
+        order = ranked(scores)
+        if k is not None:
+            order = order[:k]
+        return order, scores[order].tolist()
+
+
+def ranked(scores):
+    """Positions with a score above 0, best first"""
+    matched = np.flatnonzero(scores)
+    return matched[np.argsort(-scores[matched], kind='stable')].tolist()
+
+
+def reciprocal_rank_fusion(*rankings, rrf_k=RRF_K):
+    """Positions of all rankings ordered by their summed reciprocal rank"""
+    fused = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            fused[position] = fused.get(position, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(fused, key=lambda position: -fused[position])
+
+
+class HybridRetriever:
+    """Lexical ranking of one knowledge base and the decision whether the vector search is needed.
+
+    A query takes the lexical path when each of its top k BM25 chunks covers
+    at least `threshold` of its key terms (see `BM25Index.match`; the names
+    of characters and story arcs in the chunk metadata are key terms) and one
+    term has an idf of at least `min_idf` (1.5: it is in fewer than about a
+    fifth of the chunks, unlike "Nein" or "Stadt"). A threshold above 1
+    disables the lexical path.
+    """
+
+    def __init__(self, knowledge_base, threshold=0.9, min_idf=1.5, depth=20):
+        self.lexical = BM25Index.from_knowledge_base(knowledge_base)
+        names = set()
+        for i in range(len(knowledge_base)):
+            metadata = knowledge_base.metadata(i)
+            names.update(filter(None, (metadata.get('character'), metadata.get('arc'))))
+        self.key_terms = frozenset(term for name in names for term in tokenize(name))
+        self.threshold = threshold
+        self.min_idf = min_idf
+        # Entries of the lexical ranking that take part in the fusion
+        self.depth = depth
+        self.paths = Counter()
+        # Seconds of recent embeddings plus vector searches, the cost a lexical answer avoids
+        self.vector_latency = LatencyTracker()
+        self.saved_seconds = 0.0
+
+    def decide(self, query, k, accept=None):
+        """(path, ranking, confidence) for a query.
+
+        On the lexical path the ranking is the answer (at most k positions);
+        on the hybrid path it is the lexical ranking to fuse with the vector
+        ranking. `accept` filters positions, e.g. by metadata.
+        """
+        scores, coverage, specificity = self.lexical.match(query, self.key_terms)
+        # Chunks covering more of the key terms first ("Andre braucht Hilfe" wants Andre), BM25 within
+        order = sorted(ranked(scores), key=lambda i: -coverage[i])
+        if accept is not None:
+            order = [i for i in order if accept(i)]
+        # Chunks matching none of the key terms are not part of a lexical answer ("Hexe" is in two chunks)
+        top = [i for i in order[:k] if coverage[i] > 0]
+        certainty = float(coverage[top].min()) if top else 0.0
+        if top and specificity >= self.min_idf and certainty >= self.threshold:
+            path, ranking = "lexical", top
+        else:
+            path, ranking = "hybrid", order[:self.depth]
+        self.paths[path] += 1
+        return path, ranking, certainty
+
+    def skipped_vector_search(self):
+        """Seconds a lexical answer saved: the median recent vector search (None before the first one)"""
+        saved = self.vector_latency.percentile(0.5)
+        if saved is not None:
+            self.saved_seconds += saved
+        return saved
+
+    def stats(self):
+        vector_p50 = self.vector_latency.percentile(0.5)
+        return {
+            'paths': dict(self.paths),
+            'vector_p50_ms': vector_p50 * 1000 if vector_p50 is not None else None,
+            'saved_ms': self.saved_seconds * 1000,
+        }
@@ -0,0 +1,477 @@
+"""Long-lived, connection-pooled LLM client shared by all sessions.
+
+All calls run on one background event loop with a shared aiohttp session, so
+connections to the provider are reused across turns and sessions. Every call
+has a deadline, retryable provider errors are retried with jittered backoff,
+and streamed calls can be hedged: if the first attempt has not produced a
+token within the observed p95 time to first token, a second request is fired
+and whichever answers first wins.
+
+Every attempt first passes the process-wide rate limiter
+(realm_stories.rate_limiter). Identical prompts that are already in flight are
+coalesced: later callers share the first caller's response instead of paying
+for a second one.
+
+openai, aiohttp, requests and langchain's ChatOpenAI are imported when the
+first client is built, not with this module: together they are most of the
+startup time of the server, and a client with a fake model never needs them.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from realm_stories.metrics import LatencyTracker
+from realm_stories.rate_limiter import INTERACTIVE, RateLimiter, Request
+
+def _openai_errors():
+    """(retryable, rate limit) error types of openai and aiohttp"""
+    import aiohttp
+    import openai.error
+    retryable = (
+        openai.error.Timeout,
+        openai.error.APIError,
+        openai.error.APIConnectionError,
+        openai.error.RateLimitError,
+        openai.error.ServiceUnavailableError,
+        openai.error.TryAgain,
+        aiohttp.ClientError,
+    )
+    return retryable, (openai.error.RateLimitError,)
+
+
+def _run_loop(loop):
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+async def _next_or_none(agen):
+    try:
+        return await agen.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def _close_abandoned_stream(task):
+    """Close the stream of a hedged attempt that lost the race but still got a token"""
+    if not task.cancelled() and task.exception() is None:
+        asyncio.ensure_future(task.result()[1].aclose())
+
+
+def _retrieve_exception(task):
+    # Coalesced requests may finish after every caller gave up; don't log that as unhandled
+    if not task.cancelled():
+        task.exception()
+
+
+class _SharedStream:
+    """Fans one provider stream out to every caller that asked for the same prompt"""
+
+    def __init__(self, request):
+        self.request = request
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.consumers = 0
+        self.task = None
+        self._changed = asyncio.Condition()
+
+    async def produce(self, source):
+        try:
+            async for chunk in source:
+                async with self._changed:
+                    self.chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            await source.aclose()
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def consume(self):
+        """Replay the chunks so far, then follow the stream; the last consumer to
+        leave stops the provider stream"""
+        self.consumers += 1
+        position = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: position < len(self.chunks) or self.done)
+                if position < len(self.chunks):
+                    position += 1
+                    yield self.chunks[position - 1]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+        finally:
+            self.consumers -= 1
+            if self.consumers == 0 and not self.done:
+                self.task.cancel()
+
+
+class LLMClient:
+    """Async chat client with deadlines, retries and optional hedging.
+
+    The sync methods (`predict`, `stream`) are thin bridges onto the client's
+    event loop so Streamlit callbacks and worker threads can use them directly.
+    """
+
+    def __init__(self, model_name="gpt-4.1-mini", temperature=1.5, deadline=60.0,
+                 max_retries=2, backoff=0.5, hedge=True, hedge_after=4.0,
+                 min_hedge_samples=20, pool_size=32, llm=None, limiter=None,
+                 completion_reserve=300):
+        # `llm` replaces the ChatOpenAI model, e.g. with realm_stories.fakes.FakeChatModel
+        self._openai = llm is None
+        if self._openai:
+            from langchain.chat_models import ChatOpenAI
+            llm = ChatOpenAI(
+                model_name=model_name, temperature=temperature,
+                request_timeout=deadline, max_retries=0
+            )
+            retryable, rate_limited = _openai_errors()
+        else:
+            # Other models (e.g. the fakes) name their own errors
+            retryable = getattr(llm, 'retryable_errors', ())
+            rate_limited = getattr(llm, 'rate_limit_errors', ())
+        self.llm = llm
+        self.retryable_errors = (*retryable, asyncio.TimeoutError)
+        self.rate_limit_errors = tuple(rate_limited)
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.min_hedge_samples = min_hedge_samples
+        self.pool_size = pool_size
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        # Completion tokens charged against the token bucket up front
+        self.completion_reserve = completion_reserve
+        self.first_token_latency = LatencyTracker()
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.coalesced = 0
+        self._predictions = {}
+        self._streams = {}
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._lock = threading.Lock()
+
+        if self._openai:
+            import openai
+            import requests
+
+            # Sync requests share one pooled HTTP session as well
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            openai.requestssession = session
+
+    # -- event loop ----------------------------------------------------------
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=_run_loop, args=(self._loop,), name="llm-client", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def _run(self, coroutine, timeout=None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        return future.result(timeout)
+
+    async def _use_session(self):
+        # openai reads the aiohttp session from a context variable per task
+        if not self._openai:
+            return
+        import aiohttp
+        import openai
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size)
+            )
+        openai.aiosession.set(self._session)
+
+    def hedge_threshold(self):
+        """Seconds to wait for a first token before firing a hedged request"""
+        if len(self.first_token_latency) < self.min_hedge_samples:
+            return self.hedge_after
+        return self.first_token_latency.percentile(0.95)
+
+    def estimate_tokens(self, prompt):
+        """Rough token cost of a request for the limiter (prompt plus expected completion)"""
+        return len(prompt) // 4 + self.completion_reserve
+
+    async def _backoff(self, attempt, deadline_at, error=None):
+        delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+        remaining = deadline_at - time.monotonic()
+        if delay >= remaining:
+            raise asyncio.TimeoutError("LLM deadline exceeded while backing off")
+        if isinstance(error, self.rate_limit_errors):
+            # The provider disagrees with our buckets; hold everyone back, not just this call
+            self.limiter.throttle(delay)
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def _acquire(self, request, deadline_at):
+        await asyncio.wait_for(self.limiter.acquire(request), deadline_at - time.monotonic())
+
+    # -- async interface -----------------------------------------------------
+
+    async def apredict(self, prompt, deadline=None, callbacks=None, priority=INTERACTIVE,
+                       session=None, coalesce=True):
+        """Return the full completion, retrying retryable errors until the deadline.
+
+        `priority` and `session` decide the place in the rate limiter queue. With
+        `coalesce`, a caller asking for a prompt that is already in flight gets
+        that response (its `callbacks` then see no token usage).
+        """
+        await self._use_session()
+        deadline = deadline or self.deadline
+        in_flight = self._predictions.get(prompt) if coalesce else None
+        if in_flight is not None:
+            task, request = in_flight
+            request.promote(priority)
+            self.coalesced += 1
+        else:
+            request = Request(priority, session, self.estimate_tokens(prompt))
+            task = asyncio.ensure_future(
+                self._apredict(prompt, time.monotonic() + deadline, callbacks, request)
+            )
+            task.add_done_callback(_retrieve_exception)
+            if coalesce:
+                self._predictions[prompt] = (task, request)
+                task.add_done_callback(lambda _: self._predictions.pop(prompt, None))
+        return await asyncio.wait_for(asyncio.shield(task), deadline)
+
+    async def _apredict(self, prompt, deadline_at, callbacks, request):
+        attempt = 0
+        while True:
+            try:
+                await self._acquire(request, deadline_at)
+                return await asyncio.wait_for(
+                    self.llm.apredict(prompt, callbacks=callbacks), deadline_at - time.monotonic()
+                )
+            except self.retryable_errors as e:
+                if attempt >= self.max_retries:
+                    raise
+                await self._backoff(attempt, deadline_at, e)
+                attempt += 1
+
+    async def _first_chunk(self, prompt, request=None, deadline_at=None):
+        """Open a stream and wait for its first chunk; returns (chunk, stream).
+
+        Pass `request` to go through the rate limiter first.
+        """
+        if request is not None:
+            await self._acquire(request, deadline_at)
+        stream = self.llm.astream(prompt)
+        started = time.monotonic()
+        try:
+            chunk = await stream.__anext__()
+        except asyncio.CancelledError:
+            # Lost to a hedge or hit the deadline: the latency was at least this long,
+            # and without these samples the hedge threshold would keep dropping
+            self.first_token_latency.add(time.monotonic() - started)
+            raise
+        self.first_token_latency.add(time.monotonic() - started)
+        return chunk, stream
+
+    async def _open_stream(self, prompt, timeout, request):
+        """First chunk of the fastest attempt, hedging a slow first attempt.
+
+        The caller has already passed the limiter for the first attempt.
+        """
+        primary = asyncio.ensure_future(self._first_chunk(prompt))
+        if not self.hedge:
+            return await asyncio.wait_for(primary, timeout)
+
+        threshold = min(self.hedge_threshold(), timeout)
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if done:
+            return primary.result()
+
+        self.hedged += 1
+        deadline_at = time.monotonic() + timeout - threshold
+        backup = asyncio.ensure_future(self._first_chunk(prompt, request, deadline_at))
+        pending = {primary, backup}
+        winner = None
+        error = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, deadline_at - time.monotonic()),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task
+                else:
+                    # Both attempts answered at once, drop the second stream
+                    await task.result()[1].aclose()
+        for task in pending:
+            task.add_done_callback(_close_abandoned_stream)
+            task.cancel()
+        if winner is None:
+            raise error or asyncio.TimeoutError("No first token before the deadline")
+        if winner is backup:
+            self.hedge_wins += 1
+        return winner.result()
+
+    async def astream(self, prompt, deadline=None, priority=INTERACTIVE, session=None, coalesce=True):
+        """Yield message chunks; retries and hedging apply until the first token.
+
+        `priority`, `session` and `coalesce` work as for `apredict`; a coalesced
+        caller first gets the chunks streamed so far.
+        """
+        await self._use_session()
+        shared = self._streams.get(prompt) if coalesce else None
+        if shared is not None and not shared.done:
+            shared.request.promote(priority)
+            self.coalesced += 1
+        else:
+            shared = _SharedStream(Request(priority, session, self.estimate_tokens(prompt)))
+            shared.task = asyncio.ensure_future(
+                shared.produce(self._astream(prompt, deadline, shared.request))
+            )
+            if coalesce:
+                self._streams[prompt] = shared
+                shared.task.add_done_callback(
+                    lambda _: self._streams.pop(prompt, None) if self._streams.get(prompt) is shared else None
+                )
+        consumer = shared.consume()
+        try:
+            async for chunk in consumer:
+                yield chunk
+        finally:
+            await consumer.aclose()
+
+    async def _astream(self, prompt, deadline, request):
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            try:
+                await self._acquire(request, deadline_at)
+                chunk, stream = await self._open_stream(prompt, deadline_at - time.monotonic(), request)
+                break
+            except (StopAsyncIteration, *self.retryable_errors) as e:
+                if attempt >= self.max_retries:
+                    raise
+                await self._backoff(attempt, deadline_at, e)
+                attempt += 1
+
+        try:
+            yield chunk
+            while True:
+                remaining = deadline_at - time.monotonic()
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    # -- sync bridges --------------------------------------------------------
+
+    def predict(self, prompt, deadline=None, callbacks=None, **scheduling):
+        return self._run(self.apredict(prompt, deadline=deadline, callbacks=callbacks, **scheduling))
+
+    def stream(self, prompt, deadline=None, **scheduling):
+        """Blocking iterator over the chunks of `astream`; closing it cancels the request"""
+        agen = self.astream(prompt, deadline=deadline, **scheduling)
+        try:
+            while True:
+                chunk = self._run(_next_or_none(agen))
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self._run(agen.aclose())
+
+    # -- bridges for other event loops ----------------------------------------
+
+    async def _await_on_loop(self, coroutine):
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        )
+
+    async def predict_from_loop(self, prompt, deadline=None, callbacks=None, **scheduling):
+        """`apredict` for callers running their own event loop (e.g. the game server)"""
+        return await self._await_on_loop(
+            self.apredict(prompt, deadline=deadline, callbacks=callbacks, **scheduling)
+        )
+
+    async def stream_from_loop(self, prompt, deadline=None, **scheduling):
+        """`astream` for callers running their own event loop; closing it cancels the request"""
+        agen = self.astream(prompt, deadline=deadline, **scheduling)
+        try:
+            while True:
+                chunk = await self._await_on_loop(_next_or_none(agen))
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await self._await_on_loop(agen.aclose())
+
+    def close(self):
+        """Close pooled connections and stop the event loop; call once no requests are in flight"""
+        if self._loop is None:
+            return
+        if self._session is not None:
+            self._run(self._session.close())
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+        self._thread = None
+
+    def stats(self):
+        return {
+            'retries': self.retries,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'coalesced': self.coalesced,
+            'first_token_p95': self.first_token_latency.percentile(0.95),
+            'limiter': self.limiter.stats(),
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(create=True):
+    """Process-wide client, configured from the environment on first use.
+
+    With `create=False` returns None instead of building it (e.g. for /health).
+    """
+    global _client
+    if not create:
+        return _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(
+                deadline=float(os.getenv("REALM_STORIES_LLM_DEADLINE", "60")),
+                max_retries=int(os.getenv("REALM_STORIES_LLM_RETRIES", "2")),
+                hedge=os.getenv("REALM_STORIES_LLM_HEDGE", "0") == "1",
+                limiter=RateLimiter(
+                    requests_per_minute=int(os.getenv("REALM_STORIES_LLM_RPM", "500")),
+                    tokens_per_minute=int(os.getenv("REALM_STORIES_LLM_TPM", "200000")),
+                    max_queue=int(os.getenv("REALM_STORIES_LLM_QUEUE", "256"))
+                )
+            )
+        return _client
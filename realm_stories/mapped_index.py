@@ -0,0 +1,168 @@
+"""Pickle-free, memory-mapped storage for the knowledge base.
+
+Layout of the index folder:
+
+    manifest.json      count, dimension, the content hash of every chunk and
+                       the name of the data directory below
+    data-*/vectors.npy float32 matrix (count x dimension), memory-mapped
+    data-*/norms.npy   squared L2 norm of every vector, memory-mapped
+    data-*/offsets.npy int64 byte offsets into chunks.bin (text and metadata per chunk)
+    data-*/chunks.bin  UTF-8 blob of chunk texts followed by their JSON metadata
+
+Every write goes into a new data directory, and replacing the manifest is the
+single commit point: a reader sees either the old or the new index as a whole,
+never files of both. The previous data directory is kept for readers that
+have just read the old manifest; older ones are removed.
+
+Opening an index only maps the files, so process start takes milliseconds and
+all worker processes share the same pages from the OS page cache. Texts and
+metadata are decoded only for the chunks a search actually returns. With a few
+hundred chunks an exact scan over the mapped matrix is cheaper than building
+an in-memory FAISS index per process.
+"""
+import json
+import mmap
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+MANIFEST_FILENAME = "manifest.json"
+VECTORS_FILENAME = "vectors.npy"
+NORMS_FILENAME = "norms.npy"
+OFFSETS_FILENAME = "offsets.npy"
+CHUNKS_FILENAME = "chunks.bin"
+DATA_PREFIX = "data-"
+FORMAT_VERSION = 2
+
+# Files of the previous FAISS + pickle format, removed when an index is written
+LEGACY_FILENAMES = ("index.faiss", "index.pkl", "chunks.json")
+
+
+def _replace(folder, filename, write):
+    """Write a file next to its final name and swap it in atomically"""
+    path = os.path.join(folder, filename)
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _current_data(folder):
+    try:
+        return read_manifest(folder).get('data')
+    except (OSError, ValueError):
+        return None
+
+
+def write_index(folder, texts, metadatas, vectors, chunk_hashes):
+    """Write chunks and their vectors in the memory-mappable format"""
+    os.makedirs(folder, exist_ok=True)
+    previous = _current_data(folder)
+    name = DATA_PREFIX + uuid.uuid4().hex[:12]
+    # Staged under another name, so a concurrent writer's cleanup leaves it alone
+    staging = os.path.join(folder, f".{name}.tmp")
+    os.makedirs(staging)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+    blob = bytearray()
+    offsets = [0]
+    for text in texts:
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+    for metadata in metadatas:
+        blob += json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+        offsets.append(len(blob))
+
+    np.save(os.path.join(staging, VECTORS_FILENAME), vectors)
+    np.save(os.path.join(staging, NORMS_FILENAME), np.einsum('ij,ij->i', vectors, vectors))
+    np.save(os.path.join(staging, OFFSETS_FILENAME), np.array(offsets, dtype=np.int64))
+    with open(os.path.join(staging, CHUNKS_FILENAME), 'wb') as f:
+        f.write(bytes(blob))
+    os.rename(staging, os.path.join(folder, name))
+    manifest = {
+        'format': FORMAT_VERSION,
+        'data': name,
+        'count': len(texts),
+        'dimension': int(vectors.shape[1]) if len(texts) else 0,
+        'chunk_hashes': list(chunk_hashes),
+    }
+    _replace(folder, MANIFEST_FILENAME, lambda f: f.write(json.dumps(manifest).encode('utf-8')))
+
+    keep = {name, previous}
+    for entry in os.listdir(folder):
+        if entry.startswith(DATA_PREFIX) and entry not in keep:
+            # Mapped files stay readable after the unlink on POSIX; elsewhere the next write retries
+            shutil.rmtree(os.path.join(folder, entry), ignore_errors=True)
+    for filename in LEGACY_FILENAMES:
+        try:
+            os.remove(os.path.join(folder, filename))
+        except FileNotFoundError:
+            pass
+
+
+def read_manifest(folder):
+    with open(os.path.join(folder, MANIFEST_FILENAME), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported index format {manifest.get('format')}")
+    return manifest
+
+
+class MappedKnowledgeBase:
+    """Read-only view of an index folder; vectors and texts stay memory-mapped"""
+
+    def __init__(self, folder, embedding_function):
+        self.folder = folder
+        self.embedding_function = embedding_function
+        manifest = read_manifest(folder)
+        self.chunk_hashes = manifest['chunk_hashes']
+        self.count = manifest['count']
+        if self.count:
+            data = os.path.join(folder, manifest['data'])
+            self.vectors = np.load(os.path.join(data, VECTORS_FILENAME), mmap_mode='r')
+            self.norms = np.load(os.path.join(data, NORMS_FILENAME), mmap_mode='r')
+            self._offsets = np.load(os.path.join(data, OFFSETS_FILENAME), mmap_mode='r')
+            with open(os.path.join(data, CHUNKS_FILENAME), 'rb') as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.vectors = np.zeros((0, manifest['dimension']), dtype=np.float32)
+            self.norms = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return self.count
+
+    def _decode(self, start, end):
+        return self._blob[int(self._offsets[start]):int(self._offsets[end])].decode('utf-8')
+
+    def text(self, i):
+        return self._decode(i, i + 1)
+
+    def metadata(self, i):
+        return json.loads(self._decode(self.count + i, self.count + i + 1))
+
+    def chunk_id(self, i):
+        """Content hash of the chunk, stable across rebuilds"""
+        return self.chunk_hashes[i]
+
+    def rank(self, embedding, k=None):
+        """Chunk positions ordered by L2 distance to the embedding (all of them if k is None)"""
+        if not self.count:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        distances = self.norms - 2.0 * (self.vectors @ query) + float(query @ query)
+        if k is None or k >= self.count:
+            order = np.argsort(distances)
+        else:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            order = nearest[np.argsort(distances[nearest])]
+        return order.tolist()
+
+    def similarity_search(self, query, k=4):
+        """Langchain-style search returning documents"""
+        from langchain.docstore.document import Document
+        return [
+            Document(page_content=self.text(i), metadata=self.metadata(i))
+            for i in self.rank(self.embedding_function(query), k)
+        ]
@@ -0,0 +1,21 @@
+"""Small in-process metrics shared by the LLM client and the rate limiter."""
+from collections import deque
+
+
+class LatencyTracker:
+    """Sliding window of latencies with a percentile estimate"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, q):
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
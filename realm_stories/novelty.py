@@ -0,0 +1,157 @@
+"""Near-duplicate detection for generated situations.
+
+The prompt asks the model not to repeat itself or the CSV examples, but it
+only sees the last three turns. Every new situation is therefore checked
+against the example situations of the rules and all earlier situations of
+the session before it is shown.
+
+Texts are reduced to sets of character 5-gram shingles. A 96-value MinHash
+signature is split into 32 bands of 3 values; texts sharing any band are
+candidates (pairs with Jaccard similarity 0.5 are found with probability
+0.99, unrelated texts rarely), and the candidates are verified with the
+exact shingle sets. A check takes a few hundred microseconds at most,
+whatever the length of the game.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from realm_stories.chunking import dialog_examples
+from realm_stories.content_packs import default_rules
+
+SHINGLE_SIZE = 5
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Multiply-shift hashing: (a * x + b) mod 2**64, upper 32 bits; a is odd
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 1 << 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_NON_WORD = re.compile(r"\W+")
+
+# Parallel samples of a turn (GameEngine novelty_samples) run here
+executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="novelty-samples")
+
+AVOID_NOTE = "Diese Situation gab es schon. Erzähle eine ganz andere, mit einem anderen Problem:\n{situation}\n"
+
+
+def shingles(text):
+    """Character 5-grams of the lower-cased words of a text"""
+    text = f" {_NON_WORD.sub(' ', text.casefold()).strip()} "
+    # hash() is salted per process, which is fine for an index that lives in memory
+    if len(text) <= SHINGLE_SIZE:
+        return frozenset([hash(text) & 0xFFFFFFFF])
+    return frozenset(hash(text[i:i + SHINGLE_SIZE]) & 0xFFFFFFFF for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def signature(shingle_set):
+    """MinHash signature of a shingle set"""
+    values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+    hashed = np.multiply.outer(_A, values)
+    hashed += _B[:, None]
+    hashed >>= _SHIFT
+    return hashed.min(axis=1)
+
+
+def example_situations(rules=None):
+    """Character lines of the CSV examples (default: of the content pack), joined per situation"""
+    situations = []
+    for group in dialog_examples(default_rules() if rules is None else rules):
+        lines = [dialog for _, character, dialog, *_ in group['rows'] if character and character != 'Chief']
+        if lines:
+            situations.append(" ".join(lines))
+    return situations
+
+
+def avoid_prompt(prompt, situation):
+    """The prompt with a note to avoid `situation`, placed before its closing label line"""
+    head, _, label = prompt.rstrip("\n").rpartition("\n")
+    return f"{head}\n\n{AVOID_NOTE.format(situation=situation)}\n{label}\n"
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of situation texts.
+
+    A text counts as a near-duplicate of a stored one if their Jaccard
+    similarity reaches `threshold`, or if the shorter one is contained in the
+    other to `containment` (a repeated example with a sentence added). An
+    index created with `base` also finds the texts stored in the base, so the
+    examples are indexed once per process and every session adds its own.
+    """
+
+    def __init__(self, threshold=0.5, containment=0.8, base=None):
+        self.threshold = threshold
+        self.containment = containment
+        self.base = base
+        self._texts = []
+        self._shingles = []
+        self._bands = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self._texts)
+
+    def child(self):
+        """An empty index on top of this one, e.g. for one session"""
+        return NearDuplicateIndex(self.threshold, self.containment, base=self)
+
+    def add(self, text):
+        shingle_set = shingles(text)
+        keys = self._band_keys(signature(shingle_set))
+        position = len(self._texts)
+        self._texts.append(text)
+        self._shingles.append(shingle_set)
+        for band, key in zip(self._bands, keys):
+            band.setdefault(key, []).append(position)
+
+    def extend(self, texts):
+        for text in texts:
+            self.add(text)
+        return self
+
+    @staticmethod
+    def _band_keys(values):
+        return list(zip(*[iter(values.tolist())] * ROWS))
+
+    def _best(self, shingle_set, keys):
+        best_similarity, best_text = 0.0, None
+        candidates = set()
+        for band, key in zip(self._bands, keys):
+            candidates.update(band.get(key, ()))
+        for position in candidates:
+            other = self._shingles[position]
+            overlap = len(shingle_set & other)
+            jaccard = overlap / (len(shingle_set) + len(other) - overlap)
+            contained = overlap / min(len(shingle_set), len(other))
+            if contained >= self.containment:
+                jaccard = max(jaccard, self.threshold)
+            if jaccard > best_similarity:
+                best_similarity, best_text = jaccard, self._texts[position]
+        if self.base is not None:
+            similarity, text = self.base._best(shingle_set, keys)
+            if similarity > best_similarity:
+                best_similarity, best_text = similarity, text
+        return best_similarity, best_text
+
+    def nearest(self, text):
+        """(similarity, stored text) of the most similar candidate; (0.0, None) if there is none"""
+        shingle_set = shingles(text)
+        return self._best(shingle_set, self._band_keys(signature(shingle_set)))
+
+    def duplicate_of(self, text):
+        """The stored text that `text` nearly duplicates, or None"""
+        similarity, match = self.nearest(text)
+        return match if similarity >= self.threshold else None
+
+
+_examples = None
+
+
+def example_index(threshold=0.5):
+    """Index of the CSV example situations, built once per process and threshold"""
+    global _examples
+    if _examples is None or _examples.threshold != threshold:
+        _examples = NearDuplicateIndex(threshold).extend(example_situations())
+    return _examples
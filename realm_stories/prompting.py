@@ -0,0 +1,139 @@
+"""Token-budgeted prompt assembly.
+
+The game prompt template is compiled once: its literal text is split from the
+placeholders and counted with tiktoken up front. Per turn only the variable
+sections are counted, and retrieved context and history are added in priority
+order until the token budget is used up. The per-section token counts are
+returned with the prompt so every turn can record how big its prompt was.
+"""
+import string
+import threading
+
+import tiktoken
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+DEFAULT_ENCODING = "o200k_base"
+
+
+def load_encoding(model_name=DEFAULT_MODEL):
+    """tiktoken encoding for the model, or None if it cannot be loaded (e.g. offline)"""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        print(f"Could not load tiktoken encoding, estimating tokens instead: {e}")
+        return None
+
+
+class PromptAssembler:
+    """Compiled prompt template that fills context and history up to a token budget"""
+
+    def __init__(self, template, budget=4000, model_name=DEFAULT_MODEL):
+        self.template = template
+        self.budget = budget
+        self.encoding = load_encoding(model_name)
+        self._parts = []
+        static_text = []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            self._parts.append((literal, field))
+            static_text.append(literal)
+        self.static_tokens = self.count("".join(static_text))
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.encoding is None:
+            # Rough estimate for German prose when no encoding is available
+            return len(text) // 4 + 1
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _fill(self, context_chunks, history_pairs, memory_texts, available):
+        """Pick context chunks and history pairs in priority order within `available` tokens.
+
+        Priority alternates between the next best context chunk and the next most
+        recent history pair, starting with the top context chunk. Long-term memory
+        texts come last.
+        """
+        history_texts = [f"Spieler: {q}\nAntwort: {a}" for q, a in history_pairs]
+        candidates = []
+        for i in range(max(len(context_chunks), len(history_texts))):
+            if i < len(context_chunks):
+                candidates.append(('context', i, context_chunks[i]))
+            if i < len(history_texts):
+                # Most recent pair first
+                index = len(history_texts) - 1 - i
+                candidates.append(('history', index, history_texts[index]))
+        candidates.extend(('memory', i, text) for i, text in enumerate(memory_texts))
+
+        chosen = {'context': [], 'history': [], 'memory': []}
+        tokens = {'context': 0, 'history': 0, 'memory': 0}
+        dropped = 0
+        for section, index, text in candidates:
+            # +1 for the newline joining the entries
+            cost = self.count(text) + 1
+            if cost > available:
+                dropped += 1
+                continue
+            available -= cost
+            tokens[section] += cost
+            chosen[section].append((index, text))
+
+        context = "\n".join(text for _, text in sorted(chosen['context']))
+        # Long-term memory reads best before the most recent turns
+        history = "\n".join(
+            [text for _, text in sorted(chosen['memory'])] + [text for _, text in sorted(chosen['history'])]
+        )
+        return context, history, tokens, dropped
+
+    def assemble(self, context_chunks, history_pairs, resources, question, budget=None, memory_texts=()):
+        """Return (prompt, token_counts) for one turn"""
+        budget = budget or self.budget
+        values = {
+            'wealth': resources['wealth'],
+            'happiness': resources['happiness'],
+            'food': resources['food'],
+            'weapons': resources['weapons'],
+            'question': question,
+        }
+        resource_tokens = sum(self.count(str(values[key])) for key in ('wealth', 'happiness', 'food', 'weapons'))
+        question_tokens = self.count(question)
+        available = budget - self.static_tokens - resource_tokens - question_tokens
+
+        context, history, tokens, dropped = self._fill(context_chunks, history_pairs, memory_texts, available)
+        values['context'] = context
+        values['game_history'] = history
+
+        prompt = "".join(
+            literal + (str(values[field]) if field is not None else "")
+            for literal, field in self._parts
+        )
+        token_counts = {
+            'static': self.static_tokens,
+            'context': tokens['context'],
+            'history': tokens['history'],
+            'memory': tokens['memory'],
+            'resources': resource_tokens,
+            'question': question_tokens,
+            'dropped': dropped,
+            'budget': budget,
+        }
+        token_counts['total'] = (
+            token_counts['static'] + token_counts['context'] + token_counts['history']
+            + token_counts['memory'] + resource_tokens + question_tokens
+        )
+        return prompt, token_counts
+
+
+_assemblers = {}
+_assemblers_lock = threading.Lock()
+
+
+def get_assembler(template, budget=4000):
+    """Compiled assembler for this template, shared across reruns and sessions"""
+    key = (template, budget)
+    with _assemblers_lock:
+        assembler = _assemblers.get(key)
+        if assembler is None:
+            assembler = _assemblers[key] = PromptAssembler(template, budget=budget)
+        return assembler
@@ -0,0 +1,186 @@
+"""Process-wide request scheduling for the LLM provider.
+
+Requests and tokens per minute are limited with two token buckets shared by
+all sessions, so bursts queue up here instead of coming back as 429s. Waiting
+requests are released by priority (an interactive click before prefetching
+before background summaries) and, within a priority, round-robin across
+sessions, so one busy player cannot starve the others. Low-priority work is
+refused once the queue is full, which is the signal for prefetchers to back
+off. The limiter runs on the LLM client's event loop and is not thread-safe.
+"""
+import asyncio
+import itertools
+import time
+
+from realm_stories.metrics import LatencyTracker
+
+INTERACTIVE = 0
+PREFETCH = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', PREFETCH: 'prefetch', BACKGROUND: 'background'}
+
+
+class QueueFull(Exception):
+    """The limiter queue is full; non-interactive work should be dropped or retried later"""
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second up to `per_minute`"""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = clock()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` is available (0 if it is now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def drain(self):
+        self.level = min(self.level, 0.0)
+
+
+class Request:
+    """Who is asking and how much; shared by all attempts of one logical request"""
+    __slots__ = ('priority', 'session', 'tokens')
+
+    def __init__(self, priority=INTERACTIVE, session=None, tokens=0):
+        self.priority = priority
+        self.session = session
+        self.tokens = tokens
+
+    def promote(self, priority):
+        """Raise the priority, e.g. when an interactive request joins a prefetch"""
+        self.priority = min(self.priority, priority)
+
+
+class _Waiter:
+    __slots__ = ('request', 'future', 'enqueued', 'seq')
+
+    def __init__(self, request, future, seq, enqueued):
+        self.request = request
+        self.future = future
+        self.enqueued = enqueued
+        self.seq = seq
+
+
+class RateLimiter:
+    """Token-bucket limiter with priority classes and per-session round-robin.
+
+    `requests_per_minute` or `tokens_per_minute` of 0 disables that bucket.
+    `clock` replaces time.monotonic, e.g. in tests.
+    """
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=200000, max_queue=256,
+                 clock=time.monotonic):
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self.max_queue = max_queue
+        self._waiting = []
+        self._seq = itertools.count()
+        self._turn = itertools.count()
+        self._last_served = {}
+        self._paused_until = 0.0
+        self._timer = None
+        self.queue_time = {priority: LatencyTracker() for priority in PRIORITY_NAMES}
+        self.rejected = 0
+        self.throttled = 0
+
+    def __len__(self):
+        return len(self._waiting)
+
+    async def acquire(self, request):
+        """Wait until the request may be sent.
+
+        Raises QueueFull for non-interactive requests when the queue is full.
+        Cancelling the caller (e.g. on a deadline) removes it from the queue.
+        """
+        if request.priority > INTERACTIVE and len(self._waiting) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(f"{len(self._waiting)} LLM requests are already queued")
+        waiter = _Waiter(
+            request, asyncio.get_running_loop().create_future(), next(self._seq), self.clock()
+        )
+        self._waiting.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiting:
+                self._waiting.remove(waiter)
+                self._dispatch()
+            raise
+        self.queue_time[min(request.priority, BACKGROUND)].add(self.clock() - waiter.enqueued)
+
+    def throttle(self, seconds):
+        """Hold all requests back, e.g. after the provider answered 429"""
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain()
+
+    def _next_waiter(self):
+        # Highest priority first, then the session served longest ago, then FIFO
+        return min(
+            self._waiting,
+            key=lambda w: (w.request.priority, self._last_served.get(w.request.session, -1), w.seq)
+        )
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting:
+            waiter = self._next_waiter()
+            now = self.clock()
+            delay = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(waiter.request.tokens, now) if self.tokens else 0.0,
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            if self.requests:
+                self.requests.take(1, now)
+            if self.tokens:
+                self.tokens.take(waiter.request.tokens, now)
+            self._waiting.remove(waiter)
+            if waiter.request.session is not None:
+                self._last_served[waiter.request.session] = next(self._turn)
+                if len(self._last_served) > 10000:
+                    # Forget long-gone sessions; only the relative order of recent ones matters
+                    self._last_served.clear()
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+
+    def stats(self):
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for waiter in list(self._waiting):
+            queued[PRIORITY_NAMES[min(waiter.request.priority, BACKGROUND)]] += 1
+        return {
+            'queued': queued,
+            'queue_time_p50': {
+                PRIORITY_NAMES[p]: tracker.percentile(0.5) for p, tracker in self.queue_time.items()
+            },
+            'queue_time_p95': {
+                PRIORITY_NAMES[p]: tracker.percentile(0.95) for p, tracker in self.queue_time.items()
+            },
+            'rejected': self.rejected,
+            'throttled': self.throttled,
+        }
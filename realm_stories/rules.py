@@ -0,0 +1,116 @@
+"""Game content: the turn prompt, the resource rules and the rules text.
+
+Kept apart from app.py so the Streamlit app, the game engine and the server
+share one copy without importing Streamlit. The rules text (GAME_RULES) is
+read from the configured content pack (realm_stories.content_packs) on
+first access instead of living here as a literal.
+"""
+from realm_stories import content_packs
+
+NEW_SITUATION_REQUEST = "Erzähle mir von einer neuen Situation in der Stadt, die eine Entscheidung erfordert."
+
+
+def __getattr__(name):
+    # GAME_RULES is loaded on demand, so importing the templates does not read the pack
+    if name == 'GAME_RULES':
+        return content_packs.default_rules()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+GAME_PROMPT_TEMPLATE = """
+Du bist der Game Master für Realm Stories. Verwende die folgenden Informationen als Grundlage:
+
+# Spielregeln:
+- Wähle 1 zufälligen Charakter.
+- Der Charakter erklärt dem Spieler ein Bedürfnis oder ein Problem.
+- Biete 2 Entscheidungsoptionen aus Sicht des Spielers (wörtliche Rede).
+- Variiere die ausgewählten Charaktere und erfinde ständig neue lösbare Probleme. Sie sollten sich nicht wiederhohlen.
+- Wiederhole keine Situationen aus den Finetuning-Textbeispielen.
+- In jeder dritten Situation soll ein anderer Charakter auf eine kürzliche Entscheidung des Spielers in eines der letzten Ereignisse reagieren, positiv oder negativ, mit einer Folgefrage.
+
+# Wichtige Einschränkungen:
+- Die Geschichte wird ausschließlich durch Erzählungen der Charaktere erzählt ("tell, don't show")
+- Erfinde KEINE neuen Hauptcharaktere
+- Entferne KEINE Hauptcharaktere (z.B. durch Tod)
+- Der Spieler soll regelmäßig Entscheidungen treffen müssen
+- Die Entscheidungen des Spielers verändern den Verlauf nur leicht oder gar nicht
+
+# Textbeispiele:
+- In deinem Finetuning befinden sich einige Textbeispiele formatiert wie CSV.
+    - Alle Zeilen, deren KEY identisch oder ähnlich ist, gehören zu einer SITUATION.
+    - Nach dem KEY folgt, welcher CHARAKTER gerade spricht, und danach der gesprochene DIALOG.
+    - Wenn CHARAKTER="Chief", dann ist das eine Gesprächsoption des Spielers.
+    - Verstehe, welche Dialog-Zeilen zusammengehören (zur selben SITUATION) und wie die Interaktion zwischen dem CHARAKTER und dem Spieler funktioniert.
+
+{context}
+
+# Letzte Ereignisse:
+{game_history}
+
+# Aktuelle Ressourcen:
+- Vermögen: {wealth}
+- Zufriedenheit: {happiness}
+- Nahrung: {food}
+- Waffen: {weapons}
+
+Spieleranfrage: {question}
+
+WICHTIG: Deine Antwort muss EXAKT diesem Format folgen:
+
+SITUATION: **[Charaktername]**: [Beschreibung der Situation durch einen Charakter, 2-3 Sätze]
+
+OPTIONEN:
+A) [Erste Entscheidungsoption, max 50 Zeichen]
+B) [Zweite Entscheidungsoption, max 50 Zeichen]
+
+Halte dich strikt an die Spielregeln und erfinde keine neuen Hauptcharaktere.
+Die Optionen sollen kurz und klar sein, damit sie auf Buttons passen.
+
+Antwort:
+"""
+
+# The same prompt for the structured output mode (realm_stories.structured):
+# the model answers with one JSON object instead of the SITUATION/OPTIONEN lines
+STRUCTURED_PROMPT_TEMPLATE = GAME_PROMPT_TEMPLATE.replace(
+    """WICHTIG: Deine Antwort muss EXAKT diesem Format folgen:
+
+SITUATION: **[Charaktername]**: [Beschreibung der Situation durch einen Charakter, 2-3 Sätze]
+
+OPTIONEN:
+A) [Erste Entscheidungsoption, max 50 Zeichen]
+B) [Zweite Entscheidungsoption, max 50 Zeichen]
+""",
+    """WICHTIG: Antworte NUR mit einem JSON-Objekt in genau dieser Form, ohne weiteren Text:
+
+{{"character": "[Charaktername]", "situation": "[Beschreibung der Situation durch einen Charakter, 2-3 Sätze]", "options": ["[Erste Entscheidungsoption, max 50 Zeichen]", "[Zweite Entscheidungsoption, max 50 Zeichen]"]}}
+"""
+).replace("Antwort:\n", "JSON:\n")
+
+# Every resource stays within these bounds
+RESOURCE_BOUNDS = {
+    'wealth': (0, 100),
+    'food': (0, 100),
+    'weapons': (0, 100),
+    'happiness': (0, 100),
+}
+
+# Every game starts with a random amount from these (inclusive) ranges
+INITIAL_RESOURCES = {
+    'wealth': (50, 80),
+    'food': (30, 30),
+    'weapons': (30, 30),
+    'happiness': (30, 30),
+}
+
+# Resource effects of the Chief's decisions. A rule fires once per decision if
+# any of its keywords occurs and changes its resource by a random amount from
+# `range`, scaled by the weight of the strongest matching keyword. Keywords
+# match case-insensitively at the start of a word ("Rüstungen"); a leading "*"
+# also matches inside a word ("Goldmünzen"). So "essen" changes no food in
+# "stattdessen" or "vergessen", unlike the substring checks this table replaced.
+RESOURCE_EFFECTS = [
+    {'resource': 'wealth', 'range': (-10, 5), 'keywords': {'*geld': 1.0, '*münzen': 1.0}},
+    {'resource': 'food', 'range': (-5, 10), 'keywords': {'essen': 1.0, '*nahrung': 1.0}},
+    {'resource': 'weapons', 'range': (-5, 10), 'keywords': {'*waffen': 1.0, '*rüstung': 1.0}},
+    {'resource': 'happiness', 'range': (5, 15), 'keywords': {'fest': 1.0, 'feiern': 1.0}},
+]
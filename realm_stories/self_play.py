@@ -0,0 +1,338 @@
+"""Headless self-play for balancing runs.
+
+Plays many complete games on the real game engine in a process pool. An agent
+picks option A or B by policy, and the model is either the fake one from
+realm_stories.fakes, responses recorded from the real model, or the real
+model itself. Every turn becomes one row of a Parquet file (resources after
+the turn, deltas, character, parse failure), and a per-policy summary with
+character frequencies and parse-failure rates is printed as JSON.
+
+    python -m realm_stories.self_play --games 1000 --turns 50 --policy random --policy greedy
+    python -m realm_stories.self_play --llm real --games 20 --record responses.jsonl
+    python -m realm_stories.self_play --llm recorded --recording responses.jsonl --games 2000
+
+Games with the same number share their seed across policies, so policies are
+compared on the same sequence of random draws.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from realm_stories.engine import GameEngine, is_parse_failure, update_resources
+from realm_stories.fakes import FakeChatModel, FakeEmbeddings, RecordedChatModel
+from realm_stories.knowledge_base import (
+    DB_FILENAME, RULES_HASH_FILENAME, KnowledgeBaseRegistry, cached_openai_embeddings
+)
+from realm_stories.llm_client import LLMClient
+from realm_stories.rate_limiter import RateLimiter
+from realm_stories.rules import GAME_RULES
+from realm_stories.situation_pool import SituationPool
+
+RESOURCES = ('wealth', 'food', 'weapons', 'happiness')
+
+SCHEMA = pa.schema([
+    ('policy', pa.string()),
+    ('game', pa.int32()),
+    ('seed', pa.int64()),
+    ('turn', pa.int16()),
+    ('option', pa.int8()),
+    ('decision', pa.string()),
+    ('character', pa.string()),
+    ('parse_failed', pa.bool_()),
+    ('error', pa.string()),
+    *[(name, pa.int16()) for name in RESOURCES],
+    *[(f"d_{name}", pa.int16()) for name in RESOURCES],
+    ('prompt_tokens', pa.int32()),
+    ('latency_ms', pa.float32()),
+])
+
+
+# -- policies ----------------------------------------------------------------
+
+def always_a(turn, options, resources, rng):
+    return 0
+
+
+def always_b(turn, options, resources, rng):
+    return 1
+
+
+def random_choice(turn, options, resources, rng):
+    return rng.randrange(len(options))
+
+
+def alternate(turn, options, resources, rng):
+    return turn % len(options)
+
+
+def greedy(turn, options, resources, rng):
+    """Pick the option whose (simulated) effect leaves the weakest resource strongest"""
+    state = random.getstate()
+    outcomes = []
+    for option in options:
+        after = dict(resources)
+        update_resources(option, after)
+        outcomes.append(min(after.values()))
+    # The lookahead must not change the random draws of the real turn
+    random.setstate(state)
+    best = max(outcomes)
+    return rng.choice([i for i, outcome in enumerate(outcomes) if outcome == best])
+
+
+POLICIES = {
+    'a': always_a,
+    'b': always_b,
+    'random': random_choice,
+    'alternate': alternate,
+    'greedy': greedy,
+}
+
+
+# -- worker processes --------------------------------------------------------
+
+_worker = {}
+
+
+def _init_worker(config):
+    """Build one engine per worker process"""
+    load_dotenv()
+    if config['llm'] == 'real':
+        llm = None
+    else:
+        if config['llm'] == 'recorded':
+            model = RecordedChatModel(config['recording'])
+        else:
+            model = FakeChatModel(failure_rate=config['failure_rate'], structured=config['structured'])
+        llm = LLMClient(llm=model, hedge=False, limiter=RateLimiter(0, 0))
+    # The parent has built the index; workers only map it and never write to it
+    registry = knowledge_base_registry(config['kb_dir'], config['llm'], read_only=True)
+    _worker['engine'] = GameEngine(
+        registry=registry, llm=llm, pool=SituationPool(depth=0), campaign_memory=config['memory'],
+        structured=config['structured'], novelty_threshold=config['novelty_threshold']
+    )
+    _worker['stream'] = config['stream']
+    _worker['record'] = config['record']
+
+
+def play_game(spec):
+    """Play one game; returns its rows as columns (plus raw responses when recording)"""
+    game, policy_name, turns, seed = spec
+    engine = _worker['engine']
+    policy = POLICIES[policy_name]
+    # update_resources draws from the module-level RNG
+    random.seed(seed)
+    rng = random.Random(seed)
+    model = engine.llm.llm
+    if hasattr(model, 'seed'):
+        model.seed = seed
+
+    session = engine.new_session()
+    columns = {field.name: [] for field in SCHEMA}
+    responses = []
+    decision, option = None, -1
+    for turn in range(turns):
+        started = time.perf_counter()
+        error = None
+        try:
+            result = session.play_turn(decision, stream=_worker['stream'])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            result = None
+
+        columns['policy'].append(policy_name)
+        columns['game'].append(game)
+        columns['seed'].append(seed)
+        columns['turn'].append(turn)
+        columns['option'].append(option)
+        columns['decision'].append(decision)
+        columns['error'].append(error)
+        columns['latency_ms'].append((time.perf_counter() - started) * 1000)
+        if result is None:
+            columns['character'].append(None)
+            columns['parse_failed'].append(False)
+            for name in RESOURCES:
+                columns[name].append(session.resources[name])
+                columns[f"d_{name}"].append(0)
+            columns['prompt_tokens'].append(0)
+            break
+
+        columns['character'].append(result.character)
+        columns['parse_failed'].append(is_parse_failure(result.character, result.situation))
+        for name in RESOURCES:
+            columns[name].append(result.resources[name])
+            columns[f"d_{name}"].append(result.resource_changes.get(name, 0))
+        columns['prompt_tokens'].append((session.events[-1].prompt_tokens or {}).get('total', 0))
+        if _worker['record']:
+            responses.append(session.answer_history[-1])
+
+        option = policy(turn, result.options, result.resources, rng)
+        decision = result.options[option]
+    return columns, responses
+
+
+# -- summary -----------------------------------------------------------------
+
+class Summary:
+    """Per-policy aggregates, collected while the rows stream to disk"""
+
+    def __init__(self):
+        self.games = Counter()
+        self.turns = Counter()
+        self.parse_failures = Counter()
+        self.errors = Counter()
+        self.characters = defaultdict(Counter)
+        self.final = defaultdict(lambda: defaultdict(float))
+        self.depleted = defaultdict(Counter)
+
+    def add(self, columns):
+        policy = columns['policy'][0]
+        self.games[policy] += 1
+        self.turns[policy] += len(columns['turn'])
+        self.parse_failures[policy] += sum(columns['parse_failed'])
+        self.errors[policy] += sum(error is not None for error in columns['error'])
+        self.characters[policy].update(c for c in columns['character'] if c is not None)
+        for name in RESOURCES:
+            self.final[policy][name] += columns[name][-1]
+            if 0 in columns[name]:
+                self.depleted[policy][name] += 1
+
+    def to_dict(self):
+        result = {}
+        for policy, games in self.games.items():
+            turns = self.turns[policy]
+            result[policy] = {
+                'games': games,
+                'turns': turns,
+                'parse_failure_rate': self.parse_failures[policy] / turns if turns else 0.0,
+                'error_rate': self.errors[policy] / turns if turns else 0.0,
+                'mean_final': {name: self.final[policy][name] / games for name in RESOURCES},
+                'games_depleted': {name: self.depleted[policy][name] / games for name in RESOURCES},
+                'character_frequency': {
+                    name: count / turns for name, count in self.characters[policy].most_common()
+                },
+            }
+        return result
+
+
+def knowledge_base_registry(folder, llm, read_only=False):
+    """Registry for the players of a run.
+
+    The real model uses the app's index (realm_stories_db) with the real
+    embeddings, so its chunks are not embedded again; the fakes use an index
+    with fake embeddings in the temporary `folder`.
+    """
+    if llm == 'real':
+        paths, embeddings_factory = (DB_FILENAME, RULES_HASH_FILENAME), cached_openai_embeddings
+    else:
+        paths = os.path.join(folder, "db"), os.path.join(folder, "hash.txt")
+        embeddings_factory = FakeEmbeddings
+    return KnowledgeBaseRegistry(
+        *paths,
+        embeddings_factory=embeddings_factory,
+        hybrid=os.getenv("REALM_STORIES_HYBRID", "1") != "0",
+        lexical_threshold=float(os.getenv("REALM_STORIES_LEXICAL_THRESHOLD", "0.9")),
+        read_only=read_only
+    )
+
+
+def prepare_knowledge_base(folder, llm):
+    """Build or update the index once in the parent, so every worker only maps it"""
+    knowledge_base_registry(folder, llm).get(GAME_RULES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=100, help="games per policy")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--policy", action='append', choices=sorted(POLICIES),
+                        help="repeat to compare policies (default: random)")
+    parser.add_argument("--llm", choices=['fake', 'recorded', 'real'], default='fake')
+    parser.add_argument("--recording", help="JSON lines of recorded responses for --llm recorded")
+    parser.add_argument("--record", help="append every raw response to this JSON lines file")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of broken fake responses")
+    parser.add_argument("--memory", action='store_true', help="enable the campaign memory")
+    parser.add_argument("--stream", action='store_true', help="stream responses like the app does")
+    parser.add_argument("--structured", action='store_true', help="JSON responses with field repair")
+    # Off by default: all situations of the fake model come from one template and look alike
+    parser.add_argument("--novelty-threshold", type=float, default=0.0,
+                        help="regenerate situations repeating earlier ones (0: off)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-games", type=int, default=200, help="games per Parquet row group")
+    parser.add_argument("--output", default="self_play.parquet")
+    args = parser.parse_args(argv)
+    if args.llm == 'recorded' and not args.recording:
+        parser.error("--llm recorded needs --recording")
+
+    load_dotenv()
+    policies = args.policy or ['random']
+    workers = max(1, args.workers)
+    if args.llm == 'real':
+        # Every worker has its own limiter; split the provider limits between them
+        for name, default in (("REALM_STORIES_LLM_RPM", "500"), ("REALM_STORIES_LLM_TPM", "200000")):
+            os.environ[name] = str(max(1, int(os.getenv(name, default)) // workers))
+    specs = [
+        (game, policy, args.turns, args.seed + game)
+        for policy in policies for game in range(args.games)
+    ]
+
+    summary = Summary()
+    started = time.perf_counter()
+    batch = {field.name: [] for field in SCHEMA}
+    batch_games = 0
+    record_file = open(args.record, 'a', encoding='utf-8') if args.record else None
+    context = multiprocessing.get_context("spawn")
+    # Only the fakes need an index of their own, removed after the run
+    kb_context = (
+        contextlib.nullcontext() if args.llm == 'real' else tempfile.TemporaryDirectory(prefix="realm-self-play-")
+    )
+    with kb_context as kb_dir:
+        prepare_knowledge_base(kb_dir, args.llm)
+        config = {
+            'llm': args.llm, 'recording': args.recording, 'failure_rate': args.failure_rate,
+            'memory': args.memory, 'stream': args.stream, 'record': bool(args.record), 'kb_dir': kb_dir,
+            'structured': args.structured, 'novelty_threshold': args.novelty_threshold,
+        }
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(config,)) as pool, pq.ParquetWriter(args.output, SCHEMA) as writer:
+            chunksize = max(1, len(specs) // (workers * 16))
+            for columns, responses in pool.map(play_game, specs, chunksize=chunksize):
+                summary.add(columns)
+                for name, values in columns.items():
+                    batch[name].extend(values)
+                batch_games += 1
+                if batch_games >= args.batch_games:
+                    writer.write_table(pa.table(batch, schema=SCHEMA))
+                    batch = {field.name: [] for field in SCHEMA}
+                    batch_games = 0
+                if record_file is not None:
+                    record_file.writelines(
+                        json.dumps({'response': r}, ensure_ascii=False) + "\n" for r in responses
+                    )
+            if batch_games:
+                writer.write_table(pa.table(batch, schema=SCHEMA))
+    if record_file is not None:
+        record_file.close()
+
+    report = {
+        'games': len(specs),
+        'seconds': round(time.perf_counter() - started, 2),
+        'output': args.output,
+        'policies': summary.to_dict(),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
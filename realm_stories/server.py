@@ -0,0 +1,195 @@
+"""Thin HTTP/WebSocket server on top of the game engine.
+
+Lets the mobile client and load tests play without Streamlit's full-script
+rerun per interaction:
+
+    python -m realm_stories.server --port 8080
+
+Turn traces are logged as JSON lines to stderr, or to --log-file.
+
+    POST   /sessions                 start a game, returns its state; {"player": "..."}
+                                     keeps library situations unique across games
+    GET    /sessions/{id}            current state
+    POST   /sessions/{id}/turns      {"decision": "..."}, one of the current options,
+                                     or {} for a new situation
+    DELETE /sessions/{id}            end a game
+    GET    /sessions/{id}/ws         WebSocket: send {"decision": ...}, receive
+                                     {"type": "partial", ...} while the situation
+                                     streams and {"type": "turn", ...} when done
+    GET    /health                   session count, LLM queue and latency stats,
+                                     structured response outcomes, situation library,
+                                     content pack, retrieval paths (lexical/hybrid)
+"""
+import argparse
+import json
+import logging
+
+from aiohttp import WSMsgType, web
+from dotenv import load_dotenv
+
+from realm_stories.engine import InvalidDecision, get_engine
+
+ENGINE_KEY = web.AppKey("engine", object)
+
+
+def error(status, message):
+    return web.json_response({'error': message}, status=status)
+
+
+def session_or_404(request):
+    try:
+        return request.app[ENGINE_KEY].get_session(request.match_info['session_id'])
+    except KeyError:
+        raise web.HTTPNotFound(
+            text=json.dumps({'error': "unknown session"}), content_type='application/json'
+        )
+
+
+def bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({'error': message}), content_type='application/json')
+
+
+def string_field(body, name):
+    """`body[name]` as a non-empty string or None; ValueError for anything but a JSON object
+    with a string there"""
+    if not isinstance(body, dict):
+        raise ValueError("expected a JSON object")
+    value = body.get(name)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value or None
+
+
+async def read_field(request, name):
+    if not request.can_read_body:
+        return None
+    try:
+        return string_field(await request.json(), name)
+    except json.JSONDecodeError:
+        raise bad_request("invalid JSON")
+    except ValueError as e:
+        raise bad_request(str(e))
+
+
+async def health(request):
+    engine = request.app[ENGINE_KEY]
+    return web.json_response({
+        'status': "ok",
+        'sessions': engine.session_count,
+        'llm': engine.llm_stats(),
+        'responses': dict(engine.response_stats),
+        'library': engine.library.stats() if engine.library is not None else None,
+        'retrieval': engine.registry.retrieval_stats(),
+        'content': {'name': engine.content_pack.name, 'version': engine.content_pack.version}
+        if engine.content_pack is not None else None,
+    })
+
+
+async def create_session(request):
+    player = await read_field(request, 'player')
+    session = request.app[ENGINE_KEY].create_session(player=player)
+    session.prefetch()
+    return web.json_response(session.state(), status=201)
+
+
+async def get_session_state(request):
+    return web.json_response(session_or_404(request).state())
+
+
+async def delete_session(request):
+    session = session_or_404(request)
+    request.app[ENGINE_KEY].close_session(session.id)
+    return web.Response(status=204)
+
+
+async def play_turn(request):
+    session = session_or_404(request)
+    decision = await read_field(request, 'decision')
+    try:
+        result = await session.next_turn(decision)
+    except InvalidDecision as e:
+        return error(400, str(e))
+    except Exception as e:
+        print(f"Turn of session {session.id} failed: {e}")
+        return error(502, str(e))
+    return web.json_response({'session_id': session.id, **result.to_dict()})
+
+
+async def turn_socket(request):
+    session = session_or_404(request)
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+
+    async for message in ws:
+        if message.type != WSMsgType.TEXT:
+            continue
+        try:
+            decision = string_field(json.loads(message.data), 'decision')
+        except json.JSONDecodeError:
+            await ws.send_json({'type': "error", 'error': "invalid JSON"})
+            continue
+        except ValueError as e:
+            await ws.send_json({'type': "error", 'error': str(e)})
+            continue
+
+        sent = {}
+
+        async def send_partial(parser):
+            partial = {'character': parser.live_character, 'situation': parser.situation}
+            if partial != sent:
+                sent.update(partial)
+                await ws.send_json({'type': "partial", **partial})
+
+        try:
+            result = await session.next_turn(decision, on_update=send_partial)
+        except InvalidDecision as e:
+            await ws.send_json({'type': "error", 'error': str(e)})
+            continue
+        except Exception as e:
+            print(f"Turn of session {session.id} failed: {e}")
+            await ws.send_json({'type': "error", 'error': str(e)})
+            continue
+        await ws.send_json({'type': "turn", 'session_id': session.id, **result.to_dict()})
+    return ws
+
+
+def build_app(engine=None):
+    app = web.Application()
+    app[ENGINE_KEY] = engine or get_engine()
+    app.router.add_get('/health', health)
+    app.router.add_post('/sessions', create_session)
+    app.router.add_get('/sessions/{session_id}', get_session_state)
+    app.router.add_delete('/sessions/{session_id}', delete_session)
+    app.router.add_post('/sessions/{session_id}/turns', play_turn)
+    app.router.add_get('/sessions/{session_id}/ws', turn_socket)
+    return app
+
+
+def setup_logging(log_file=None):
+    """Send the turn traces ('Realm Stories.trace', INFO) to stderr or a file"""
+    logger = logging.getLogger('Realm Stories')
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler()
+        handler.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+    return logger
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Realm Stories game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--log-file", help="write the turn traces here instead of stderr")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    setup_logging(args.log_file)
+    engine = get_engine()
+    engine.warm()
+    web.run_app(build_app(engine), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,536 @@
+"""Persistent library of generated situations, shared by all players.
+
+Every parsed situation is kept in a local sqlite file together with its
+character, the resource profile it was generated for (see
+situation_pool.resource_bucket) and an embedding of its text. When the model
+is slow or a session has used up its cost budget, the engine serves a
+compatible situation from the library instead: same resource profile give or
+take one bucket, a character the player has not just talked to, and never
+one the player has seen before. The seen list is a table with a unique key,
+so that guarantee also holds across server processes sharing the file.
+
+Everything works offline. Texts are embedded with a feature-hashing embedder
+(word and character trigram features, no model), which is good enough to
+find near-duplicates: a new situation too similar to a stored one is not
+stored again. Search goes through a NumPy inverted-file index. When the
+library is full, the least recently used situations are evicted.
+"""
+import asyncio
+import contextvars
+import hashlib
+import inspect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from realm_stories.situation_pool import resource_bucket
+
+LIBRARY_FILENAME = "realm_stories_library.sqlite"
+
+# Generations raced against the library by blocking turns (GameSession.play_turn) run here
+executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="situation-library")
+# Situations stored outside of a turn (generations that lost a race) are written here
+library_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="situation-library-writer")
+
+
+def situation_digest(character, situation):
+    """Identity of a situation, independent of whitespace and case"""
+    text = unicodedata.normalize("NFC", f"{character}\n{situation}").lower()
+    return hashlib.sha1(" ".join(text.split()).encode('utf-8')).hexdigest()
+
+
+def resource_profile(resources):
+    """Resource buckets as a list, in the (sorted) order of resource_bucket"""
+    return [bucket for _, bucket in resource_bucket(resources)]
+
+
+class HashingEmbedder:
+    """Offline text embedding: signed feature hashing of words and character trigrams"""
+
+    def __init__(self, dimension=256):
+        self.dimension = dimension
+
+    def embed(self, text):
+        text = " ".join(unicodedata.normalize("NFC", text).lower().split())
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        padded = f" {text} "
+        features = text.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            # crc32 rather than hash(), which differs between processes
+            code = zlib.crc32(feature.encode('utf-8'))
+            vector[code % self.dimension] += 1.0 if code & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """Inverted-file ANN index over unit vectors (NumPy only).
+
+    Up to `train_size` rows every search is an exact scan. Beyond that the
+    rows are clustered with a few rounds of spherical k-means into about
+    sqrt(rows) lists, and a search only scores the rows in the `probes` lists
+    whose centroids are closest to the query. The clustering is redone each
+    time the index has doubled since the last one.
+    """
+
+    def __init__(self, dimension, train_size=1024, probes=8, seed=0):
+        self.dimension = dimension
+        self.train_size = train_size
+        self.probes = probes
+        self.count = 0
+        self.vectors = np.zeros((64, dimension), dtype=np.float32)
+        self.alive = np.zeros(64, dtype=bool)
+        self.centroids = None
+        self._lists = []
+        self._trained_rows = 0
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return int(self.alive[:self.count].sum())
+
+    def add(self, vector):
+        """Store a vector; returns its row"""
+        if self.count == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.alive = np.concatenate([self.alive, np.zeros_like(self.alive)])
+        row = self.count
+        self.vectors[row] = vector
+        self.alive[row] = True
+        self.count += 1
+        if self.centroids is not None:
+            self._lists[int(np.argmax(self.centroids @ vector))].append(row)
+        if self.count >= self.train_size and self.count >= 2 * self._trained_rows:
+            self.train()
+        return row
+
+    def remove(self, row):
+        self.alive[row] = False
+
+    def compact(self):
+        """Drop removed rows; returns the old row of every kept row"""
+        kept = np.flatnonzero(self.alive[:self.count])
+        vectors = self.vectors[kept]
+        self.count = 0
+        self.vectors = np.zeros((max(64, 2 * len(kept)), self.dimension), dtype=np.float32)
+        self.alive = np.zeros(len(self.vectors), dtype=bool)
+        self.vectors[:len(kept)] = vectors
+        self.alive[:len(kept)] = True
+        self.count = len(kept)
+        self.centroids, self._lists, self._trained_rows = None, [], 0
+        if self.count >= self.train_size:
+            self.train()
+        return kept
+
+    def train(self, rounds=6):
+        """Cluster the current rows into inverted lists"""
+        rows = np.flatnonzero(self.alive[:self.count])
+        lists = max(1, int(np.sqrt(len(rows))))
+        vectors = self.vectors[rows]
+        centroids = vectors[self._rng.choice(len(rows), size=lists, replace=False)]
+        for _ in range(rounds):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their old centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self._lists = [[] for _ in range(lists)]
+        for row, cluster in zip(rows.tolist(), assignment.tolist()):
+            self._lists[cluster].append(row)
+        self._trained_rows = self.count
+
+    def search(self, query, k=1, mask=None, probes=None):
+        """Rows most similar to `query` as (row, cosine similarity), best first.
+
+        `mask` (one bool per row) restricts the result. If the probed lists hold
+        fewer than k allowed rows, all rows are scanned.
+        """
+        if self.centroids is not None:
+            probes = min(probes or self.probes, len(self._lists))
+            nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+            rows = np.fromiter(
+                (row for cluster in nearest for row in self._lists[cluster]), dtype=np.int64
+            )
+            rows = self._allowed(rows, mask)
+            if len(rows) < k:
+                rows = self._allowed(np.arange(self.count), mask)
+        else:
+            rows = self._allowed(np.arange(self.count), mask)
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ query
+        if len(rows) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best])]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def _allowed(self, rows, mask):
+        allowed = self.alive[rows]
+        if mask is not None:
+            allowed &= mask[rows]
+        return rows[allowed]
+
+
+class SituationLibrary:
+    """sqlite store of situations, with the vectors and filters kept in memory"""
+
+    def __init__(self, path=LIBRARY_FILENAME, max_entries=5000, duplicate_threshold=0.9,
+                 profile_slack=1, embedder=None, train_size=1024, probes=8):
+        self.path = path
+        self.max_entries = max_entries
+        self.duplicate_threshold = duplicate_threshold
+        self.profile_slack = profile_slack
+        self.embedder = embedder or HashingEmbedder()
+        self.index = VectorIndex(self.embedder.dimension, train_size=train_size, probes=probes)
+        self._lock = threading.RLock()
+        self._connection = None
+        # Per index row
+        self._digests = []
+        self._characters = np.zeros(0, dtype=np.int32)
+        self._profiles = np.zeros((0, 4), dtype=np.int8)
+        self._uses = np.zeros(0, dtype=np.int64)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self._rows = {}
+        self._character_codes = {}
+        self._seen = OrderedDict()
+        self._loaded = False
+        self.counters = Counter()
+
+    # -- storage -------------------------------------------------------------
+
+    def _db(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS situations ("
+                " digest TEXT PRIMARY KEY,"
+                " character TEXT NOT NULL,"
+                " situation TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " profile TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " uses INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS situations_character ON situations (character)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " player TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " PRIMARY KEY (player, digest))"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        rows = self._db().execute(
+            "SELECT digest, character, situation, profile, vector, last_used, uses FROM situations"
+        ).fetchall()
+        reembedded = []
+        for digest, character, situation, profile, blob, last_used, uses in rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if len(vector) != self.embedder.dimension:
+                # Written with another embedder; the text is still there
+                vector = self.embedder.embed(f"{character}: {situation}")
+                reembedded.append((vector.tobytes(), digest))
+            self._append(digest, character, json.loads(profile), vector, last_used, uses)
+        if reembedded:
+            self._db().executemany("UPDATE situations SET vector = ? WHERE digest = ?", reembedded)
+            self._db().commit()
+        self._loaded = True
+
+    def _append(self, digest, character, profile, vector, last_used, uses=0):
+        row = self.index.add(vector)
+        self._digests.append(digest)
+        code = self._character_codes.setdefault(character, len(self._character_codes))
+        if row >= len(self._characters):
+            size = max(64, 2 * len(self._characters))
+            self._characters = np.resize(self._characters, size)
+            self._profiles = np.resize(self._profiles, (size, 4))
+            self._uses = np.resize(self._uses, size)
+            self._last_used = np.resize(self._last_used, size)
+        self._characters[row] = code
+        self._profiles[row] = profile
+        self._uses[row] = uses
+        self._last_used[row] = last_used
+        self._rows[digest] = row
+        return row
+
+    def _seen_by(self, player):
+        seen = self._seen.get(player)
+        if seen is None:
+            seen = {digest for digest, in self._db().execute(
+                "SELECT digest FROM seen WHERE player = ?", (player,)
+            )}
+            self._seen[player] = seen
+            while len(self._seen) > 1024:
+                self._seen.popitem(last=False)
+        self._seen.move_to_end(player)
+        return seen
+
+    def _mark_seen(self, player, digest):
+        """Record that the player saw a situation; False if they had already seen it"""
+        cursor = self._db().execute("INSERT OR IGNORE INTO seen (player, digest) VALUES (?, ?)", (player, digest))
+        self._seen_by(player).add(digest)
+        return cursor.rowcount == 1
+
+    # -- adding --------------------------------------------------------------
+
+    def add(self, character, situation, response, resources, player=None):
+        """Store a parsed situation unless it (nearly) duplicates a stored one.
+
+        `player` has seen it, so it will never be served to them. Returns
+        True if a new entry was stored.
+        """
+        digest = situation_digest(character, situation)
+        vector = self.embedder.embed(f"{character}: {situation}")
+        now = time.time()
+        with self._lock:
+            try:
+                self._ensure_loaded()
+                duplicate = digest if digest in self._rows else None
+                if duplicate is None and len(self.index):
+                    nearest = self.index.search(vector, k=1)
+                    if nearest and nearest[0][1] >= self.duplicate_threshold:
+                        duplicate = self._digests[nearest[0][0]]
+                if duplicate is not None:
+                    self.counters['duplicates'] += 1
+                    if player is not None:
+                        self._mark_seen(player, duplicate)
+                        self._db().commit()
+                    return False
+
+                profile = resource_profile(resources)
+                self._db().execute(
+                    "INSERT OR REPLACE INTO situations (digest, character, situation, response, profile,"
+                    " vector, created, last_used, uses) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (digest, character, situation, response, json.dumps(profile), vector.tobytes(), now, now)
+                )
+                if player is not None:
+                    self._mark_seen(player, digest)
+                self._append(digest, character, profile, vector, now)
+                self.counters['added'] += 1
+                if len(self.index) > self.max_entries:
+                    self._evict()
+                self._db().commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Situation library write failed: {e}")
+                return False
+
+    def _evict(self):
+        """Remove the least recently used tenth of the library"""
+        rows = np.flatnonzero(self.index.alive[:self.index.count])
+        count = len(rows) - self.max_entries + self.max_entries // 10
+        oldest = rows[np.argsort(self._last_used[rows], kind='stable')[:count]]
+        digests = [self._digests[row] for row in oldest.tolist()]
+        # Seen rows stay, so an evicted situation that is generated again is still not repeated
+        self._db().executemany("DELETE FROM situations WHERE digest = ?", [(d,) for d in digests])
+        for row, digest in zip(oldest.tolist(), digests):
+            self.index.remove(row)
+            del self._rows[digest]
+        self.counters['evicted'] += len(digests)
+        if self.index.count > 2 * len(self.index):
+            self._compact()
+
+    def _compact(self):
+        kept = self.index.compact()
+        self._digests = [self._digests[row] for row in kept.tolist()]
+        self._characters = self._characters[kept]
+        self._profiles = self._profiles[kept]
+        self._uses = self._uses[kept]
+        self._last_used = self._last_used[kept]
+        self._rows = {digest: row for row, digest in enumerate(self._digests)}
+
+    # -- serving -------------------------------------------------------------
+
+    def take(self, player, resources, recent_characters=(), query=None, reason="fallback", candidates=8,
+             accept=None):
+        """Response text of a compatible situation the player has never seen, or None.
+
+        With a `query` (e.g. the player's decision) the most similar situation
+        wins; otherwise the least used one. `accept(response)` can reject
+        candidates, which then count as seen.
+        """
+        with self._lock:
+            try:
+                self._ensure_loaded()
+                count = self.index.count
+                mask = self.index.alive[:count].copy()
+                if self.profile_slack is not None:
+                    profile = np.array(resource_profile(resources), dtype=np.int8)
+                    mask &= np.abs(self._profiles[:count] - profile).max(axis=1) <= self.profile_slack
+                codes = [self._character_codes[c] for c in recent_characters if c in self._character_codes]
+                if codes:
+                    mask &= ~np.isin(self._characters[:count], codes)
+                seen = [self._rows[d] for d in self._seen_by(player) if d in self._rows]
+                mask[seen] = False
+
+                if query:
+                    rows = [row for row, _ in self.index.search(self.embedder.embed(query), candidates, mask)]
+                else:
+                    allowed = np.flatnonzero(mask)
+                    order = np.lexsort((self._last_used[allowed], self._uses[allowed]))
+                    rows = allowed[order[:candidates]].tolist()
+
+                for row in rows:
+                    digest = self._digests[row]
+                    # Checked against the table, which other processes write as well
+                    if not self._mark_seen(player, digest):
+                        continue
+                    found = self._db().execute(
+                        "SELECT response FROM situations WHERE digest = ?", (digest,)
+                    ).fetchone()
+                    if found is None:
+                        # Evicted by another process
+                        continue
+                    if accept is not None and not accept(found[0]):
+                        continue
+                    now = time.time()
+                    self._db().execute(
+                        "UPDATE situations SET uses = uses + 1, last_used = ? WHERE digest = ?", (now, digest)
+                    )
+                    self._db().commit()
+                    self._uses[row] += 1
+                    self._last_used[row] = now
+                    self.counters[f'served_{reason}'] += 1
+                    return found[0]
+                self._db().commit()
+                self.counters[f'missed_{reason}'] += 1
+                return None
+            except sqlite3.Error as e:
+                print(f"Situation library lookup failed: {e}")
+                return None
+
+    def stats(self):
+        """Size and add/serve counters"""
+        with self._lock:
+            try:
+                self._ensure_loaded()
+            except sqlite3.Error as e:
+                print(f"Situation library load failed: {e}")
+            return {'size': len(self.index), 'characters': len(self._character_codes), **self.counters}
+
+
+def race(generate, on_update, timeout, fallback):
+    """Run `generate(on_update, cancel_event)` in the executor; if no update or result
+    has come back within `timeout` seconds, return `fallback()` instead when it is not None.
+
+    Updates are handed back to the calling thread, so `on_update` runs where the
+    caller expects it (e.g. in Streamlit's script thread). Once the fallback has
+    won, `cancel_event` is set and no further update is forwarded. Returns
+    (result of generate or None, fallback result or None, future of generate).
+    """
+    updates = queue.Queue()
+    abandoned = threading.Event()
+
+    def forward(parser):
+        if abandoned.is_set():
+            return
+        handled = threading.Event()
+        updates.put(('update', parser, handled))
+        # Wait so the parser is not fed while the caller reads it
+        while not handled.wait(0.05):
+            if abandoned.is_set():
+                return
+
+    def run():
+        try:
+            return generate(forward, abandoned)
+        finally:
+            updates.put(('done', None, None))
+
+    # The copied context keeps the spans of the generation in the caller's trace
+    future = executor.submit(contextvars.copy_context().run, run)
+    deadline = time.monotonic() + timeout
+    waiting = True
+    while True:
+        try:
+            kind, parser, handled = updates.get(timeout=max(0.0, deadline - time.monotonic()) if waiting else None)
+        except queue.Empty:
+            waiting = False
+            result = fallback()
+            if result is not None:
+                abandoned.set()
+                return None, result, future
+            continue
+        if kind == 'done':
+            return future.result(), None, future
+        waiting = False
+        try:
+            if on_update is not None:
+                on_update(parser)
+        finally:
+            handled.set()
+
+
+async def arace(generate, on_update, timeout, fallback):
+    """`race` on the event loop: `generate(on_update)` returns a coroutine,
+    `on_update` may be a coroutine function and the blocking `fallback` runs in a thread.
+
+    While the fallback runs, updates are held back and only the latest one is
+    forwarded if the generation wins, so a client never sees text of a
+    situation that is then replaced. A generation that loses is cancelled.
+    """
+    arrived = asyncio.Event()
+    held = {'holding': False, 'parser': None}
+
+    def forward(parser):
+        arrived.set()
+        if held['holding']:
+            held['parser'] = parser
+        elif on_update is not None:
+            return on_update(parser)
+
+    generation = asyncio.ensure_future(generate(forward))
+    first = asyncio.ensure_future(arrived.wait())
+    await asyncio.wait({generation, first}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    first.cancel()
+    if not arrived.is_set() and not generation.done():
+        held['holding'] = True
+        result = await asyncio.to_thread(fallback)
+        if result is not None:
+            generation.cancel()
+            return None, result, generation
+        held['holding'] = False
+        if held['parser'] is not None and on_update is not None:
+            update = on_update(held['parser'])
+            if inspect.isawaitable(update):
+                await update
+    return await generation, None, generation
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_library():
+    """Process-wide library, configured from the environment on first use"""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = SituationLibrary(
+                path=os.getenv("REALM_STORIES_LIBRARY_PATH", LIBRARY_FILENAME),
+                max_entries=int(os.getenv("REALM_STORIES_LIBRARY_SIZE", "5000")),
+                duplicate_threshold=float(os.getenv("REALM_STORIES_LIBRARY_DUPLICATE", "0.9"))
+            )
+        return _library
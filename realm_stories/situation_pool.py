@@ -0,0 +1,140 @@
+"""Warm pool of pre-generated "new situation" turns.
+
+The "🎲 Neue Situation erleben" request text never changes; the only inputs that
+vary are the recent history and the resources. Entries are therefore pooled by
+a coarse resource bucket and the set of recently seen characters, and any
+session whose state falls into the same key can take one instantly.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def resource_bucket(resources, width=25):
+    """Coarse view of the resources, e.g. wealth 0-24 / 25-49 / 50-74 / 75-100"""
+    return tuple(sorted((name, min(value, 99) // width) for name, value in resources.items()))
+
+
+def pool_key(resources, recent_characters):
+    return resource_bucket(resources), frozenset(recent_characters)
+
+
+class SituationPool:
+    """Per-key queues of ready responses, refilled in the background"""
+
+    def __init__(self, depth=2, ttl=600, refill_concurrency=2):
+        self.depth = depth
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, refill_concurrency), thread_name_prefix="situation-pool"
+        )
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._in_flight = {}
+        self._swept = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.generated = 0
+
+    @property
+    def enabled(self):
+        return self.depth > 0
+
+    def _fresh_entries(self, key, now):
+        """Unexpired entries of a key; keys without entries are dropped, not created"""
+        entries = self._entries.get(key)
+        if entries is None:
+            return deque()
+        while entries and now - entries[0][0] > self.ttl:
+            entries.popleft()
+            self.expired += 1
+        if not entries:
+            del self._entries[key]
+        return entries
+
+    def _sweep(self, now):
+        """Expire entries of keys nobody asks for anymore, at most once per ttl"""
+        if now - self._swept < self.ttl:
+            return
+        self._swept = now
+        for key in list(self._entries):
+            self._fresh_entries(key, now)
+
+    def pop(self, key):
+        """Return a pooled generation result for this key, or None if none is ready"""
+        with self._lock:
+            entries = self._fresh_entries(key, time.monotonic())
+            if entries:
+                self.hits += 1
+                response = entries.popleft()[1]
+                if not entries:
+                    del self._entries[key]
+                return response
+            self.misses += 1
+            return None
+
+    def refill(self, key, generate, *args):
+        """Schedule enough background generations to bring the key back to `depth`.
+
+        `generate(*args)` runs in a worker thread; falsy results are not pooled.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._sweep(now)
+            entries = self._fresh_entries(key, now)
+            missing = self.depth - len(entries) - self._in_flight.get(key, 0)
+            if missing <= 0:
+                return
+            self._in_flight[key] = self._in_flight.get(key, 0) + missing
+        for _ in range(missing):
+            self._executor.submit(self._generate, key, generate, args)
+
+    def _generate(self, key, generate, args):
+        try:
+            response = generate(*args)
+        except Exception as e:
+            print(f"Pre-generating a situation failed: {e}")
+            response = None
+        with self._lock:
+            self._in_flight[key] -= 1
+            if not self._in_flight[key]:
+                del self._in_flight[key]
+            if response:
+                self._entries.setdefault(key, deque()).append((time.monotonic(), response))
+                self.generated += 1
+
+    def stats(self):
+        """Return pool size and hit-rate metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': sum(len(entries) for entries in self._entries.values()),
+                'in_flight': sum(self._in_flight.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'generated': self.generated,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, configured from the environment on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SituationPool(
+                depth=int(os.getenv("REALM_STORIES_POOL_DEPTH", "0")),
+                ttl=float(os.getenv("REALM_STORIES_POOL_TTL", "600")),
+                refill_concurrency=int(os.getenv("REALM_STORIES_POOL_CONCURRENCY", "2"))
+            )
+        return _pool
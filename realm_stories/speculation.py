@@ -0,0 +1,102 @@
+"""Speculative generation of the two possible follow-up turns.
+
+While the player reads a situation the only possible next inputs are the two
+decision options. Both branches are generated in the background from a
+snapshot of the game state; the branch the player picks is committed and the
+other one is cancelled.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by all sessions of this server process
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculation")
+
+
+def state_fingerprint(question_history, answer_history, resources):
+    """Cheap identity of the game state a speculative turn was generated from"""
+    return (
+        len(question_history),
+        tuple(question_history[-1:]),
+        tuple(answer_history[-1:]),
+        tuple(sorted(resources.items())),
+    )
+
+
+class SpeculativeTurns:
+    """Background generations for the options of one session's current round"""
+
+    def __init__(self, max_turns=20):
+        self.max_turns = max_turns
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self._round = None
+        self._fingerprint = None
+        self._branches = {}
+
+    @property
+    def budget_left(self):
+        return self.max_turns - self.started
+
+    def start(self, round_key, options, question_history, answer_history, resources, generate):
+        """Start generating every option of this round, at most once per round.
+
+        `generate(user_input, question_history, answer_history, resources, cancel_event)`
+        runs in a worker thread and must not touch the Streamlit session state.
+        """
+        if round_key == self._round:
+            return
+        self.discard()
+        self._round = round_key
+        if self.budget_left < len(options):
+            return
+
+        # Copy the state so the branches see exactly what process_user_input would see
+        question_history = list(question_history)
+        answer_history = list(answer_history)
+        resources = dict(resources)
+        self._fingerprint = state_fingerprint(question_history, answer_history, resources)
+        for option in options:
+            cancel_event = threading.Event()
+            future = executor.submit(
+                generate, option, question_history, answer_history, resources, cancel_event
+            )
+            self._branches[option] = (future, cancel_event)
+            self.started += 1
+
+    def take(self, round_key, option, question_history, answer_history, resources, timeout=None):
+        """Return the result of `generate` for the chosen option or None.
+
+        The other branches are cancelled. A branch that is still running is
+        awaited, since it has a head start on a fresh request.
+        """
+        future, cancel_event = self._branches.pop(option, (None, None))
+        matches = (
+            future is not None
+            and round_key == self._round
+            and self._fingerprint == state_fingerprint(question_history, answer_history, resources)
+        )
+        self.discard()
+        if not matches:
+            if future is not None:
+                cancel_event.set()
+                future.cancel()
+            self.misses += 1
+            return None
+        try:
+            response = future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Speculative turn failed: {e}")
+            response = None
+        if response:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return response
+
+    def discard(self):
+        """Cancel all outstanding branches of the current round"""
+        for future, cancel_event in self._branches.values():
+            cancel_event.set()
+            future.cancel()
+        self._branches = {}
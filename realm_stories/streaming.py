@@ -0,0 +1,165 @@
+"""Incremental parsing of streamed game master responses.
+
+The model answers in the fixed format
+
+    SITUATION: **[Charaktername]**: [Situation]
+
+    OPTIONEN:
+    A) [Option]
+    B) [Option]
+
+The parser below consumes the response chunk by chunk so the UI can show the
+character and the situation while tokens arrive, and tells the caller to stop
+the stream as soon as option B is complete.
+"""
+import inspect
+
+
+def split_situation_line(line):
+    """Split the text after 'SITUATION:' into (character or None, situation)"""
+    full_situation_line = line.replace('SITUATION:', '').strip()
+    if '**:' in full_situation_line:
+        parts = full_situation_line.split('**:', 1)
+        return parts[0].replace('**', '').strip(), parts[1].strip()
+    return None, full_situation_line
+
+
+class IncrementalSituationParser:
+    """Line based state machine over a streamed response.
+
+    Complete lines are parsed exactly once; only the trailing partial line is
+    looked at again on every update to show the situation text while it grows.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._partial = ""
+        self._in_situation = False
+        self._situation_lines = []
+        self.character = None
+        self.options = []
+        self.complete = False
+
+    @property
+    def text(self):
+        """The raw response consumed so far (up to the end of option B once complete)"""
+        return "".join(self._chunks)
+
+    @property
+    def live_character(self):
+        """Character name as soon as it has been streamed, even mid-line"""
+        partial = self._partial.strip()
+        if self.character is None and partial.startswith('SITUATION:'):
+            return split_situation_line(partial)[0]
+        return self.character
+
+    @property
+    def situation(self):
+        """Situation text seen so far, including the line that is still streaming"""
+        lines = list(self._situation_lines)
+        partial = self._partial.strip()
+        if partial.startswith('SITUATION:'):
+            character, situation = split_situation_line(partial)
+            # Hide the half streamed '**Name' until the name is complete
+            lines = [situation if character is not None or not situation.startswith('**') else ""]
+        elif self._in_situation and partial and not 'OPTIONEN:'.startswith(partial) \
+                and not partial.startswith(('OPTIONEN:', 'A)', 'B)')):
+            lines.append(partial)
+        return " ".join(line for line in lines if line)
+
+    def feed(self, chunk):
+        """Consume a chunk of the response; returns True once both options are complete"""
+        if self.complete or not chunk:
+            return self.complete
+        self._partial += chunk
+        while '\n' in self._partial and not self.complete:
+            line, self._partial = self._partial.split('\n', 1)
+            self._chunks.append(line + '\n')
+            self._consume(line.strip())
+        return self.complete
+
+    def finish(self):
+        """Consume the trailing line once the stream has ended"""
+        if not self.complete and self._partial:
+            line, self._partial = self._partial, ""
+            self._chunks.append(line)
+            self._consume(line.strip())
+        return self.complete
+
+    def _consume(self, line):
+        if line.startswith('SITUATION:'):
+            self._in_situation = True
+            character, situation = split_situation_line(line)
+            if character is not None:
+                self.character = character
+            self._situation_lines = [situation]
+            return
+
+        if line.startswith('OPTIONEN:'):
+            self._in_situation = False
+            return
+
+        if self._in_situation and line:
+            self._situation_lines.append(line)
+
+        if line.startswith(('A)', 'B)')):
+            self.options.append(line[2:].strip())
+            if len(self.options) >= 2:
+                self._in_situation = False
+                self._partial = ""
+                self.complete = True
+
+
+def stream_response(chunks, parser, on_update=None, stop_event=None):
+    """Feed message chunks into the parser and stop reading once it is complete.
+
+    Closing the generator early ends the underlying HTTP stream, so the model
+    stops generating as soon as option B is on screen. Setting `stop_event`
+    abandons the stream and returns what has been consumed so far.
+    """
+    try:
+        for chunk in chunks:
+            if stop_event is not None and stop_event.is_set():
+                break
+            parser.feed(getattr(chunk, 'content', chunk))
+            if on_update is not None:
+                on_update(parser)
+            if parser.complete:
+                break
+        else:
+            parser.finish()
+            if on_update is not None:
+                on_update(parser)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+    return parser.text
+
+
+async def astream_response(chunks, parser, on_update=None, stop_event=None):
+    """`stream_response` for async chunk iterators; `on_update` may be a coroutine function"""
+    try:
+        async for chunk in chunks:
+            if stop_event is not None and stop_event.is_set():
+                break
+            parser.feed(getattr(chunk, 'content', chunk))
+            if on_update is not None:
+                await _call(on_update, parser)
+            if parser.complete:
+                break
+        else:
+            parser.finish()
+            if on_update is not None:
+                await _call(on_update, parser)
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+    return parser.text
+
+
+async def _call(callback, parser):
+    result = callback(parser)
+    if inspect.isawaitable(result):
+        await result
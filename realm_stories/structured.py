@@ -0,0 +1,293 @@
+"""Structured (JSON) game master responses, validated field by field.
+
+In this mode the model answers with one JSON object (see SITUATION_SCHEMA).
+`validate` checks it in one pass: json.loads in C, then a single look at
+each field. The result is the valid fields plus the problem of every field
+that is missing or invalid, so a cheap repair request can ask for exactly
+those fields instead of regenerating the whole turn. Broken JSON (cut off,
+unescaped quotes, chatter around it) is salvaged with the same incremental
+scanner that shows the situation while it streams.
+
+Validated turns are stored in the line format of the free text mode
+(`to_text`), so history, pooling and parse_ai_response work unchanged.
+"""
+import json
+
+MAX_OPTION_LENGTH = 50
+MAX_CHARACTER_LENGTH = 60
+FIELDS = ('character', 'situation', 'options')
+
+SITUATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'character': {'type': 'string', 'minLength': 1, 'maxLength': MAX_CHARACTER_LENGTH},
+        'situation': {'type': 'string', 'minLength': 1},
+        'options': {
+            'type': 'array',
+            'items': {'type': 'string', 'minLength': 1, 'maxLength': MAX_OPTION_LENGTH},
+            'minItems': 2,
+            'maxItems': 2,
+        },
+    },
+    'required': list(FIELDS),
+}
+
+# Keys the model uses when it drifts into German or other names
+KEY_ALIASES = {
+    'charakter': 'character', 'name': 'character', 'speaker': 'character',
+    'beschreibung': 'situation', 'text': 'situation',
+    'optionen': 'options', 'choices': 'options', 'entscheidungen': 'options',
+}
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+
+
+def _clean_option(option):
+    option = option.strip()
+    # "A) Ja" or "A: Ja" when the model mixes both formats
+    if len(option) > 2 and option[0] in 'AB' and option[1] in '):.':
+        option = option[2:].strip()
+    return option
+
+
+def check_fields(data):
+    """Normalize a decoded response; returns (valid fields, {field: problem})"""
+    fields, problems = {}, {}
+    if not isinstance(data, dict):
+        return fields, {field: "missing" for field in FIELDS}
+    for key, value in data.items():
+        key = key.lower() if isinstance(key, str) else key
+        key = KEY_ALIASES.get(key, key)
+        if key in FIELDS and key not in fields:
+            fields[key] = value
+
+    character = fields.pop('character', None)
+    if not isinstance(character, str) or not character.replace('*', '').strip():
+        problems['character'] = "missing" if character is None else "empty or not a string"
+    elif len(character.replace('*', '').strip()) > MAX_CHARACTER_LENGTH:
+        problems['character'] = f"longer than {MAX_CHARACTER_LENGTH} characters"
+    else:
+        fields['character'] = character.replace('*', '').strip()
+
+    situation = fields.pop('situation', None)
+    if not isinstance(situation, str) or not situation.strip():
+        problems['situation'] = "missing" if situation is None else "empty or not a string"
+    else:
+        fields['situation'] = situation.strip()
+
+    options = fields.pop('options', None)
+    if isinstance(options, dict):
+        # {"A": "...", "B": "..."}
+        options = list(options.values())
+    if not isinstance(options, list) or len(options) < 2:
+        problems['options'] = "missing" if options is None else "fewer than two options"
+    elif not all(isinstance(option, str) for option in options[:2]):
+        problems['options'] = "options must be strings"
+    else:
+        options = [_clean_option(option) for option in options[:2]]
+        if not all(options):
+            problems['options'] = "empty option"
+        elif any(len(option) > MAX_OPTION_LENGTH for option in options):
+            problems['options'] = f"option longer than {MAX_OPTION_LENGTH} characters: " + json.dumps(
+                options, ensure_ascii=False
+            )
+        else:
+            fields['options'] = options
+    return fields, problems
+
+
+def validate(text):
+    """Validate a structured response; returns (valid fields, {field: problem})"""
+    start = text.find('{')
+    end = text.rfind('}')
+    if start != -1 and end > start:
+        try:
+            return check_fields(json.loads(text[start:end + 1]))
+        except (json.JSONDecodeError, RecursionError):
+            pass
+    if start == -1:
+        return {}, {field: "missing" for field in FIELDS}
+    # Cut off or malformed: take whatever complete values the scanner finds
+    scanner = IncrementalJsonParser()
+    scanner.feed(text[start:])
+    scanner.finish()
+    return check_fields(scanner.values())
+
+
+def is_valid(fields, problems):
+    return not problems and all(field in fields for field in FIELDS)
+
+
+def _one_line(value):
+    # parse_ai_response reads the format line by line, so a value must not span lines
+    return " ".join(str(value).split())
+
+
+def to_text(fields):
+    """The validated turn in the line format of the free text mode"""
+    return (
+        f"SITUATION: **{_one_line(fields['character'])}**: {_one_line(fields['situation'])}\n\n"
+        f"OPTIONEN:\n"
+        f"A) {_one_line(fields['options'][0])}\n"
+        f"B) {_one_line(fields['options'][1])}\n"
+    )
+
+
+def repair_prompt(fields, problems, response):
+    """Short prompt asking only for the fields in `problems`"""
+    wanted = {field: SITUATION_SCHEMA['properties'][field] for field in problems}
+    lines = [
+        "Die folgende Antwort eines Game Masters für das Spiel \"Realm Stories\" ist unvollständig "
+        "oder ungültig.",
+        "",
+        "Fehlerhafte Antwort:",
+        response.strip()[:1500] or "(leer)",
+        "",
+    ]
+    if fields:
+        lines += ["Gültige Felder (nicht ändern, nur als Kontext):", json.dumps(fields, ensure_ascii=False), ""]
+    lines += [
+        "Probleme:",
+        *[f"- {field}: {problem}" for field, problem in problems.items()],
+        "",
+        "Gib NUR ein JSON-Objekt mit genau diesen Feldern zurück, passend zur Situation:",
+        json.dumps(wanted, ensure_ascii=False),
+    ]
+    if 'options' in problems:
+        lines.append(f"Jede Option höchstens {MAX_OPTION_LENGTH} Zeichen, kurz genug für einen Button.")
+    lines += ["", "JSON:"]
+    return "\n".join(lines)
+
+
+def merge_repair(fields, problems, repair_response):
+    """Take the repaired fields from `repair_response`; returns (fields, remaining problems)"""
+    repaired, repair_problems = validate(repair_response)
+    fields = dict(fields)
+    remaining = {}
+    for field, problem in problems.items():
+        if field in repaired:
+            fields[field] = repaired[field]
+        else:
+            remaining[field] = repair_problems.get(field, problem)
+    return fields, remaining
+
+
+class IncrementalJsonParser:
+    """Streaming scanner for the response object, with the interface of
+    streaming.IncrementalSituationParser.
+
+    Every character is looked at once. Top-level string values and the
+    strings of the options array are collected as they arrive, so the
+    situation can be shown while it streams, and the stream can stop as soon
+    as the object is closed.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = None
+        self._buffer = []
+        self._key = None
+        self._expect_key = False
+        self._array_key = None
+        self._values = {}
+        self.options = []
+        self.complete = False
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    @property
+    def character(self):
+        value = self._values.get('character')
+        return value.replace('*', '').strip() if isinstance(value, str) else None
+
+    @property
+    def live_character(self):
+        return self.character
+
+    @property
+    def situation(self):
+        """Situation text seen so far, including the part that is still streaming"""
+        if self._in_string and self._key == 'situation' and self._array_key is None and not self._expect_key:
+            return "".join(self._buffer).strip()
+        value = self._values.get('situation')
+        return value.strip() if isinstance(value, str) else ""
+
+    def values(self):
+        """Complete values scanned so far, keyed like the JSON object"""
+        values = dict(self._values)
+        if self.options:
+            values.setdefault('options', list(self.options))
+        return values
+
+    def feed(self, chunk):
+        """Consume a chunk of the response; returns True once the object is closed"""
+        if self.complete or not chunk:
+            return self.complete
+        for index, char in enumerate(chunk):
+            self._consume(char)
+            if self.complete:
+                self._chunks.append(chunk[:index + 1])
+                return True
+        self._chunks.append(chunk)
+        return False
+
+    def finish(self):
+        return self.complete
+
+    def _consume(self, char):
+        if self._in_string:
+            if self._escape is not None:
+                self._escape += char
+                if self._escape[0] != 'u':
+                    self._buffer.append(_ESCAPES.get(self._escape, self._escape))
+                    self._escape = None
+                elif len(self._escape) == 5:
+                    try:
+                        self._buffer.append(chr(int(self._escape[1:], 16)))
+                    except ValueError:
+                        pass
+                    self._escape = None
+            elif char == '\\':
+                self._escape = ""
+            elif char == '"':
+                self._in_string = False
+                self._end_string("".join(self._buffer))
+            else:
+                self._buffer.append(char)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._buffer = []
+        elif char == '{':
+            self._depth += 1
+            self._expect_key = True
+        elif char == '}':
+            self._depth -= 1
+            if self._depth <= 0:
+                self.complete = True
+        elif char == '[':
+            if self._depth == 1 and self._key is not None:
+                self._array_key = self._key
+        elif char == ']':
+            self._array_key = None
+        elif char == ',':
+            if self._depth == 1 and self._array_key is None:
+                self._expect_key = True
+        elif char == ':':
+            self._expect_key = False
+
+    def _end_string(self, value):
+        if self._depth != 1:
+            return
+        if self._expect_key:
+            key = value.lower()
+            self._key = KEY_ALIASES.get(key, key)
+        elif self._array_key == 'options':
+            self.options.append(value)
+        elif self._array_key is None and self._key is not None:
+            self._values.setdefault(self._key, value)
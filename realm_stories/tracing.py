@@ -0,0 +1,128 @@
+"""Lightweight per-turn tracing.
+
+A turn is wrapped in `trace_turn`, and every stage inside it (knowledge base
+load, query embedding, vector search, prompt build, LLM call, parsing,
+resource update) in a `span`. The active trace lives in a context variable, so
+the stages deeper down (e.g. in the knowledge base registry) record themselves
+without the trace being passed around, and `span` is a no-op outside a turn.
+Finished traces are written as one JSON log line each and kept for the debug
+panel.
+"""
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import time
+
+logger = logging.getLogger('Realm Stories.trace')
+logger.setLevel(logging.INFO)
+
+_current = contextvars.ContextVar('realm_stories_trace', default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """One timed stage of a turn"""
+    __slots__ = ('name', 'start_ms', 'duration_ms', 'attrs', '_started')
+
+    def __init__(self, name, started, attrs):
+        self.name = name
+        self._started = time.perf_counter()
+        self.start_ms = (self._started - started) * 1000
+        self.duration_ms = None
+        self.attrs = attrs
+
+    def mark(self, name):
+        """Record the time since the span started, e.g. the first streamed token"""
+        self.attrs[name] = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start_ms': round(self.start_ms, 3),
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            **self.attrs,
+        }
+
+
+class TurnTrace:
+    """All spans of one turn, plus its token usage"""
+
+    def __init__(self, kind, **attrs):
+        self.id = next(_ids)
+        self.kind = kind
+        self.attrs = attrs
+        self.spans = []
+        self.tokens = {}
+        self.error = None
+        self.timestamp = time.time()
+        self.total_ms = None
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        span = Span(name, self._started, attrs)
+        self.spans.append(span)
+        try:
+            yield span
+        finally:
+            span.duration_ms = (time.perf_counter() - span._started) * 1000
+
+    def add_tokens(self, **counts):
+        for key, value in counts.items():
+            self.tokens[key] = self.tokens.get(key, 0) + value
+
+    def stage_ms(self):
+        """Total duration per stage name"""
+        totals = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + (span.duration_ms or 0.0)
+        return totals
+
+    def to_dict(self):
+        return {
+            'trace_id': self.id,
+            'kind': self.kind,
+            'timestamp': round(self.timestamp, 3),
+            'total_ms': round(self.total_ms, 3) if self.total_ms is not None else None,
+            'error': self.error,
+            'tokens': self.tokens,
+            'spans': [span.to_dict() for span in self.spans],
+            **self.attrs,
+        }
+
+
+@contextlib.contextmanager
+def trace_turn(kind, sink=None, **attrs):
+    """Trace the enclosed turn, log it on exit and append it to `sink` (e.g. a deque)"""
+    trace = TurnTrace(kind, **attrs)
+    token = _current.set(trace)
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        trace.total_ms = (time.perf_counter() - trace._started) * 1000
+        logger.info(json.dumps(trace.to_dict(), ensure_ascii=False, default=str))
+        if sink is not None:
+            sink.append(trace)
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Time a stage of the active turn; does nothing outside of `trace_turn`"""
+    trace = _current.get()
+    if trace is None:
+        # Detached span so callers can set attributes unconditionally
+        yield Span(name, time.perf_counter(), attrs)
+        return
+    with trace.span(name, **attrs) as active:
+        yield active
+
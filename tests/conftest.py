@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from realm_stories.engine import GameEngine
+from realm_stories.fakes import FakeChatModel, FakeEmbeddings
+from realm_stories.knowledge_base import KnowledgeBaseRegistry
+from realm_stories.llm_client import LLMClient
+from realm_stories.rate_limiter import RateLimiter
+from realm_stories.situation_pool import SituationPool
+
+
+@pytest.fixture(scope="session")
+def registry(tmp_path_factory):
+    """Registry on an index built once with fake embeddings"""
+    folder = tmp_path_factory.mktemp("kb")
+    return KnowledgeBaseRegistry(
+        os.path.join(folder, "db"), os.path.join(folder, "hash.txt"), embeddings_factory=FakeEmbeddings
+    )
+
+
+@pytest.fixture
+def engine(registry):
+    """Offline engine: fake model, no pool, memory, library or repeat check"""
+    llm = LLMClient(llm=FakeChatModel(), hedge=False, limiter=RateLimiter(0, 0))
+    yield GameEngine(
+        registry=registry, llm=llm, pool=SituationPool(depth=0), campaign_memory=False, novelty_threshold=0
+    )
+    llm.close()
@@ -0,0 +1,36 @@
+from realm_stories.campaign_memory import CampaignMemory
+from realm_stories.engine import initial_resources
+from realm_stories.fakes import FakeEmbeddings
+
+
+def folded_memory(embeddings):
+    memory = CampaignMemory(summarize=lambda prompt: "Der Chief hat Waffen gekauft.", embeddings=embeddings,
+                            relevant_decisions=1)
+    memory._fold(["Bahri: Der Schmied will Gold -> Chief: Ja, wir kaufen Waffen.",
+                  "Mary: Die Ernte ist schlecht -> Chief: Verteilt Brot."], 2)
+    return memory
+
+
+def test_memory_uses_the_retrieval_embedding_only():
+    embeddings = FakeEmbeddings()
+    memory = folded_memory(embeddings)
+    calls = embeddings.calls
+    assert memory.prompt_sections(None) == ["Bisher: Der Chief hat Waffen gekauft."]
+    sections = memory.prompt_sections(embeddings._embed("Brot für die Ernte"))
+    assert sections[1] == "Frühere Entscheidung: Mary: Die Ernte ist schlecht -> Chief: Verteilt Brot."
+    assert embeddings.calls == calls
+
+
+def test_cached_retrieval_adds_no_embedding_call(engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(FakeEmbeddings, 'embed_query', lambda self, text: calls.append(text) or self._embed(text))
+    memory = folded_memory(FakeEmbeddings())
+    query = "Wir verteilen Brot an die Bauern."
+    engine.registry.retrieval_cache.clear()
+    engine.build_prompt(query, [], [], initial_resources(), memory)
+    # One embedding at most (none if BM25 decides), shared with the memory
+    assert calls in ([], [query])
+    before = list(calls)
+    prompt, _ = engine.build_prompt(query, [], [], initial_resources(), memory)
+    assert calls == before
+    assert "Bisher: Der Chief hat Waffen gekauft." in prompt
@@ -0,0 +1,42 @@
+import csv
+import io
+
+from realm_stories import economy, novelty
+from realm_stories.chunking import _csv_line, dialog_examples, split_game_rules
+
+
+def test_dialog_rows_round_trip_through_csv():
+    row = ["Fest_1", "Bahri", 'Er ruft "Hoch lebe der Chief", dann trinkt er.']
+    assert next(csv.reader(io.StringIO(_csv_line(row)))) == row
+    assert _csv_line(["Fest_1", "Chief", "Ja."]) == "Fest_1,Chief,Ja."
+
+
+RULES = """# Textbeispiele (CSV-Format)
+KEY,CHARAKTER,DIALOG
+fleur_invests_1,Fleur,Investierst du in mein Geschäft?
+fleur_invests_yes,Chief,"Ja, ich investiere."
+fleur_invests_no,Chief,Nein.
+fleur_invests_double_down_1,Fleur,Noch einmal?
+fleur_invests_double_down_2,Fleur,Nur ein bisschen mehr Kapital.
+fleur_invests_double_down_yes,Chief,Okay.
+fleur_invests_double_down_no,Chief,Lieber nicht.
+diego_spotted_logan_1,Diego,Logan lagert im Wald.
+diego_spotted_logan_wealth,Chief,Wir sparen Geld.
+diego_spotted_logan_food,Chief,Wir lagern Vorräte.
+"""
+
+
+def test_chunks_repeat_check_and_economy_key_situations_alike():
+    keys = [metadata['situation'] for metadata in split_game_rules(RULES)[1]]
+    assert keys == ["fleur_invests", "fleur_invests_double_down", "diego_spotted_logan"]
+    assert [group['key'] for group in dialog_examples(RULES)] == keys
+    assert novelty.example_situations(RULES) == [
+        "Investierst du in mein Geschäft?",
+        "Noch einmal? Nur ein bisschen mehr Kapital.",
+        "Logan lagert im Wald.",
+    ]
+    assert economy.example_situations(RULES) == [
+        ("Ja, ich investiere.", "Nein."),
+        ("Okay.", "Lieber nicht."),
+        ("Wir sparen Geld.", "Wir lagern Vorräte."),
+    ]
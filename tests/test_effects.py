@@ -0,0 +1,34 @@
+import random
+
+from realm_stories.effects import EffectTable, default_table
+
+
+def fired(text, table=default_table):
+    return set(table.changes(text, random.Random(0)))
+
+
+def test_keywords_without_star_match_at_word_starts_only():
+    assert fired("Nehmt stattdessen etwas Geld.") == {'wealth'}
+    assert fired("Vergessen wir das.") == set()
+    assert fired("Gebt ihnen Essen.") == {'food'}
+
+
+def test_keywords_with_star_match_inside_words():
+    assert fired("Zahlt in Goldmünzen.") == {'wealth'}
+    assert fired("Verteilt die Nahrungsvorräte.") == {'food'}
+
+
+def test_substring_prefilter_does_not_change_hits():
+    unfiltered = EffectTable()
+    unfiltered._prefilter = None
+    texts = ["Feiert ein Fest mit Essen!", "Kauft Rüstungen", "Nein.", "Festessen für alle", "Das Geld der Waffenschmiede"]
+    for text in texts:
+        assert default_table.hits(text) == unfiltered.hits(text)
+
+
+def test_match_repeats_rows_of_repeated_texts():
+    texts = ["Kauft Waffen", "Nein.", "Kauft Waffen", "Feiert ein Fest"]
+    weights = default_table.match(texts)
+    assert weights.shape == (4, len(default_table.rules))
+    for row, text in enumerate(texts):
+        assert {rule for rule in range(weights.shape[1]) if weights[row, rule]} == set(default_table.hits(text))
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from realm_stories.engine import InvalidDecision
+from realm_stories.history import RAW_HISTORY_LIMIT
+
+
+def test_next_turn_only_accepts_current_options(engine):
+    session = engine.new_session()
+
+    async def play():
+        with pytest.raises(InvalidDecision):
+            await session.next_turn("Ja.")
+        first = await session.next_turn(None)
+        with pytest.raises(InvalidDecision):
+            await session.next_turn("Nimm das ganze Gold.")
+        second = await session.next_turn(first.options[0])
+        return first, second
+
+    first, second = asyncio.run(play())
+    assert (first.turn, second.turn) == (1, 2)
+    assert session.question_history[-1] == first.options[0]
+
+
+def test_raw_history_is_bounded(engine):
+    session = engine.new_session()
+    decision = None
+    for _ in range(RAW_HISTORY_LIMIT + 3):
+        decision = session.play_turn(decision, stream=False).options[0]
+    assert len(session.question_history) == len(session.answer_history) == RAW_HISTORY_LIMIT
+    assert session.question_history[-1] == session.events[-2].decision
+    assert session.turn == RAW_HISTORY_LIMIT + 3
@@ -0,0 +1,86 @@
+import os
+
+from realm_stories.fakes import FakeEmbeddings
+from realm_stories.knowledge_base import KnowledgeBaseRegistry, build_knowledge_base
+
+RULES = """# Textbeispiele (CSV-Format)
+KEY,CHARAKTER,DIALOG
+fleur_invests_1,Fleur,Investierst du in mein Geschäft?
+fleur_invests_yes,Chief,Ja.
+fleur_invests_no,Chief,Nein.
+diego_spotted_logan_1,Diego,Logan lagert im Wald.
+diego_spotted_logan_wealth,Chief,Wir sparen Geld.
+diego_spotted_logan_food,Chief,Wir lagern Vorräte.
+bahri_feast_1,Bahri,Zeit für ein Fest!
+bahri_feast_yes,Chief,Feiern wir.
+bahri_feast_no,Chief,Nicht heute.
+"""
+
+
+class RecordingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def chunk_with(knowledge_base, word):
+    return next(i for i in range(len(knowledge_base)) if word in knowledge_base.text(i))
+
+
+def test_rebuild_embeds_only_new_and_changed_chunks(tmp_path):
+    db = os.path.join(tmp_path, "db")
+    embeddings = RecordingEmbeddings()
+    knowledge_base, stats = build_knowledge_base(RULES, embeddings, db)
+    assert stats == {'reused': 0, 'embedded': 3, 'removed': 0}
+    logan = chunk_with(knowledge_base, "Logan")
+    logan_vector = knowledge_base.vectors[logan].copy()
+
+    changed = (
+        RULES.replace("Zeit für ein Fest!", "Zeit für ein großes Fest!")
+        .replace("fleur_invests_1,Fleur,Investierst du in mein Geschäft?\n", "")
+        .replace("fleur_invests_yes,Chief,Ja.\nfleur_invests_no,Chief,Nein.\n", "")
+        + "rita_sells_bread_1,Rita,Brot gefällig?\n"
+        + "rita_sells_bread_yes,Chief,Gern.\nrita_sells_bread_no,Chief,Nein danke.\n"
+    )
+    embeddings.embedded.clear()
+    knowledge_base, stats = build_knowledge_base(changed, embeddings, db)
+    assert stats == {'reused': 1, 'embedded': 2, 'removed': 2}
+    assert len(embeddings.embedded) == 2
+    assert any("großes Fest" in text for text in embeddings.embedded)
+    assert any("Brot" in text for text in embeddings.embedded)
+    # The unchanged chunk keeps its vector without being embedded again
+    logan = chunk_with(knowledge_base, "Logan")
+    assert (knowledge_base.vectors[logan] == logan_vector).all()
+
+    embeddings.embedded.clear()
+    _, stats = build_knowledge_base(changed, embeddings, db)
+    assert stats == {'reused': 3, 'embedded': 0, 'removed': 0}
+    assert embeddings.embedded == []
+
+
+def test_retrieval_cache_is_dropped_on_reload_and_rules_change(tmp_path):
+    registry = KnowledgeBaseRegistry(
+        os.path.join(tmp_path, "db"), os.path.join(tmp_path, "hash.txt"), embeddings_factory=FakeEmbeddings
+    )
+    query = "Logan im Wald"
+    first = registry.search(RULES, query)
+    assert registry.search(RULES, query) == first
+    assert (registry.retrieval_cache.hits, registry.retrieval_cache.misses) == (1, 1)
+
+    registry.reload(RULES)
+    assert registry.search(RULES, query) == first
+    assert (registry.retrieval_cache.hits, registry.retrieval_cache.misses) == (1, 2)
+
+    version = registry.version
+    changed = RULES.replace("Logan lagert im Wald.", "Logan lagert im dunklen Wald.")
+    docs = registry.search(changed, query)
+    assert registry.version != version
+    assert (registry.retrieval_cache.hits, registry.retrieval_cache.misses) == (1, 3)
+    # Entries of the old index are dropped, not just left unused
+    assert len(registry.retrieval_cache._entries) == 1
+    assert "dunklen Wald" in docs[0].page_content
+    assert all("Logan lagert im Wald." not in doc.page_content for doc in docs)
@@ -0,0 +1,58 @@
+from realm_stories.lexical_index import HybridRetriever
+
+CHUNKS = [
+    ("Sigmund ist der Schmied der Stadt.", {'character': "Sigmund"}),
+    ("Fleur handelt mit Stoffen in der Stadt.", {'character': "Fleur"}),
+    ("Bahri feiert gern Feste in der Stadt.", {'character': "Bahri"}),
+    ("Rita backt Brot für die Stadt.", {'character': "Rita"}),
+    ("Logan plündert die Stadt.", {'character': "Logan"}),
+    ("Die Hexe wohnt am Rand der Stadt.", {'type': "lore"}),
+    ("Regina verwaltet die Steuern der Stadt.", {'character': "Regina"}),
+    ("Gunnar bewacht die Stadt.", {'character': "Gunnar"}),
+]
+
+
+class KnowledgeBase:
+    """The parts of MappedKnowledgeBase the retriever reads"""
+
+    def __len__(self):
+        return len(CHUNKS)
+
+    def text(self, i):
+        return CHUNKS[i][0]
+
+    def metadata(self, i):
+        return CHUNKS[i][1]
+
+
+def test_specific_fully_covered_queries_skip_the_vector_search():
+    retriever = HybridRetriever(KnowledgeBase())
+    assert retriever.decide("Erzähl mir von Sigmund", 3) == ("lexical", [0], 1.0)
+    # Without a name in the query every term is a key term
+    assert retriever.decide("Hexe", 3) == ("lexical", [5], 1.0)
+    # Names outweigh other words: the Hexe chunk does not dilute the answer about Sigmund
+    assert retriever.decide("Sigmund und die Hexe", 3) == ("lexical", [0], 1.0)
+    assert retriever.paths == {'lexical': 3}
+
+
+def test_vague_or_partly_covered_queries_are_fused():
+    retriever = HybridRetriever(KnowledgeBase())
+    # In every chunk: covered, but not specific
+    path, ranking, certainty = retriever.decide("Stadt", 3)
+    assert (path, certainty) == ("hybrid", 1.0)
+    assert sorted(ranking) == list(range(len(CHUNKS)))
+    # No chunk names both characters
+    path, ranking, certainty = retriever.decide("Sigmund und Fleur", 3)
+    assert (path, sorted(ranking), certainty) == ("hybrid", [0, 1], 0.5)
+    assert retriever.decide("Drachen", 3) == ("hybrid", [], 0.0)
+    assert retriever.paths == {'hybrid': 3}
+
+
+def test_threshold_and_filter_decide_the_path():
+    knowledge_base = KnowledgeBase()
+    assert HybridRetriever(knowledge_base, threshold=0.5).decide("Sigmund und Fleur", 3)[0] == "lexical"
+    assert HybridRetriever(knowledge_base, threshold=1.01).decide("Sigmund", 3)[0] == "hybrid"
+    retriever = HybridRetriever(knowledge_base)
+    assert retriever.decide("Sigmund", 3, accept=lambda i: i != 0)[0] == "hybrid"
+    # Filtered out chunks are not part of the ranking to fuse either
+    assert retriever.decide("Sigmund Fleur", 3, accept=lambda i: i != 0)[:2] == ("hybrid", [1])
@@ -0,0 +1,42 @@
+import pytest
+
+from realm_stories.fakes import FakeChatModel, FakeRateLimitError
+from realm_stories.llm_client import LLMClient
+from realm_stories.rate_limiter import RateLimiter
+
+
+def fake_client(model, **options):
+    return LLMClient(llm=model, hedge=False, backoff=0.001, limiter=RateLimiter(0, 0), **options)
+
+
+def test_fake_rate_limits_are_retried_and_throttle_the_limiter():
+    model = FakeChatModel(error_rate=0.5, seed=3)
+    client = fake_client(model, max_retries=10)
+    try:
+        for i in range(5):
+            assert client.predict(f"prompt {i}")
+            assert "".join(client.stream(f"stream {i}"))
+    finally:
+        client.close()
+    assert client.retries > 0
+    assert model.calls == 10 + client.retries
+    assert client.limiter.throttled == client.retries
+
+
+def test_retries_give_up_after_max_retries():
+    client = fake_client(FakeChatModel(error_rate=1.0), max_retries=2)
+    try:
+        with pytest.raises(FakeRateLimitError):
+            client.predict("prompt")
+    finally:
+        client.close()
+    assert client.retries == 2
+
+
+def test_close_stops_and_closes_the_loop():
+    client = fake_client(FakeChatModel())
+    client.predict("prompt")
+    loop, thread = client._loop, client._thread
+    client.close()
+    assert not thread.is_alive()
+    assert loop.is_closed()
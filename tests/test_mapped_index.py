@@ -0,0 +1,25 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from realm_stories import mapped_index
+
+
+def test_rewrites_swap_the_whole_index(tmp_path):
+    for i in range(3):
+        mapped_index.write_index(tmp_path, [f"Text {i}"], [{'i': i}], np.full((1, 2), i), [f"h{i}"])
+        index = mapped_index.MappedKnowledgeBase(tmp_path, None)
+        assert (index.text(0), index.metadata(0), index.chunk_id(0)) == (f"Text {i}", {'i': i}, f"h{i}")
+    # The current data directory and the one before it
+    assert len([name for name in os.listdir(tmp_path) if name.startswith(mapped_index.DATA_PREFIX)]) == 2
+
+
+def test_other_formats_are_rejected(tmp_path):
+    mapped_index.write_index(tmp_path, ["Text"], [{}], np.ones((1, 2)), ["h"])
+    manifest_path = tmp_path / mapped_index.MANIFEST_FILENAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.write_text(json.dumps({**manifest, 'format': 1}))
+    with pytest.raises(ValueError):
+        mapped_index.MappedKnowledgeBase(tmp_path, None)
@@ -0,0 +1,17 @@
+from realm_stories import novelty
+
+
+def test_short_and_empty_texts_are_indexed():
+    index = novelty.NearDuplicateIndex()
+    assert index.duplicate_of("") is None
+    assert index.duplicate_of("Ja.") is None
+    index.add("Ja.")
+    index.add("")
+    assert index.duplicate_of("ja") == "Ja."
+    assert index.duplicate_of("") == ""
+    assert index.duplicate_of("Nein.") is None
+
+
+def test_short_text_is_not_a_duplicate_of_a_long_one():
+    index = novelty.NearDuplicateIndex().extend(["Der Schmied verlangt mehr Eisen für die Waffen der Wache."])
+    assert index.duplicate_of("Ja.") is None
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from realm_stories.rate_limiter import (
+    BACKGROUND, INTERACTIVE, PREFETCH, QueueFull, RateLimiter, Request, TokenBucket
+)
+
+
+class Clock:
+    """Manually advanced stand-in for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+async def served_in_order(limiter, clock, requests):
+    """Queue `requests` on an empty bucket and release them one per second; returns the order"""
+    limiter.requests.level = 0
+    order = []
+
+    async def acquire(name, request):
+        await limiter.acquire(request)
+        order.append(name)
+
+    tasks = [asyncio.ensure_future(acquire(name, request)) for name, request in requests]
+    await asyncio.sleep(0)
+    assert len(limiter) == len(requests)
+    for served in range(1, len(requests) + 1):
+        clock.advance(1)
+        limiter._dispatch()
+        await asyncio.sleep(0)
+        assert len(order) == served
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_token_bucket_refills_continuously_up_to_capacity():
+    clock = Clock()
+    bucket = TokenBucket(60, clock)
+    bucket.take(60, clock())
+    assert bucket.wait_time(1, clock()) == pytest.approx(1.0)
+    clock.advance(0.25)
+    assert bucket.wait_time(1, clock()) == pytest.approx(0.75)
+    clock.advance(0.75)
+    assert bucket.wait_time(1, clock()) == 0.0
+    clock.advance(3600)
+    bucket.wait_time(1, clock())
+    assert bucket.level == 60
+    # More than the capacity waits for a full bucket instead of forever
+    bucket.take(60, clock())
+    assert bucket.wait_time(1000, clock()) == pytest.approx(60.0)
+
+
+def test_interactive_requests_go_before_prefetch_and_background():
+    clock = Clock()
+    limiter = RateLimiter(60, 0, clock=clock)
+    order = asyncio.run(served_in_order(limiter, clock, [
+        ('background', Request(BACKGROUND)),
+        ('prefetch', Request(PREFETCH)),
+        ('interactive', Request(INTERACTIVE)),
+    ]))
+    assert order == ['interactive', 'prefetch', 'background']
+
+
+def test_sessions_take_turns_within_a_priority():
+    clock = Clock()
+    limiter = RateLimiter(60, 0, clock=clock)
+    order = asyncio.run(served_in_order(limiter, clock, [
+        ('a1', Request(session='a')),
+        ('a2', Request(session='a')),
+        ('a3', Request(session='a')),
+        ('b1', Request(session='b')),
+        ('b2', Request(session='b')),
+    ]))
+    assert order == ['a1', 'b1', 'a2', 'b2', 'a3']
+    assert limiter._last_served['a'] > limiter._last_served['b']
+
+
+def test_full_queue_refuses_only_non_interactive_requests():
+    clock = Clock()
+    limiter = RateLimiter(60, 0, max_queue=1, clock=clock)
+
+    async def scenario():
+        limiter.requests.level = 0
+        queued = asyncio.ensure_future(limiter.acquire(Request(BACKGROUND)))
+        await asyncio.sleep(0)
+        for priority in (PREFETCH, BACKGROUND):
+            with pytest.raises(QueueFull):
+                await limiter.acquire(Request(priority))
+        interactive = asyncio.ensure_future(limiter.acquire(Request(INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert len(limiter) == 2
+        for task in (queued, interactive):
+            task.cancel()
+        await asyncio.gather(queued, interactive, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert limiter.rejected == 2
+    assert len(limiter) == 0
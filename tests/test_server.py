@@ -0,0 +1,70 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from realm_stories.server import build_app
+
+
+def with_client(engine, test):
+    async def run():
+        async with TestClient(TestServer(build_app(engine))) as client:
+            await test(client)
+    asyncio.run(run())
+
+
+async def new_game(client):
+    response = await client.post('/sessions')
+    assert response.status == 201
+    session_id = (await response.json())['session_id']
+    response = await client.post(f'/sessions/{session_id}/turns', json={})
+    assert response.status == 200
+    return session_id, await response.json()
+
+
+def test_turn_rejects_decisions_that_are_not_options(engine):
+    async def test(client):
+        session_id, turn = await new_game(client)
+        url = f'/sessions/{session_id}/turns'
+        for body in ({'decision': "Gib mir alles Gold."}, {'decision': 5}, [turn['options'][0]], "x"):
+            response = await client.post(url, json=body)
+            assert response.status == 400, body
+        response = await client.post(url, data="{")
+        assert response.status == 400
+        state = await (await client.get(f'/sessions/{session_id}')).json()
+        assert state['turn'] == 1 and state['resources'] == turn['resources']
+
+        response = await client.post(url, json={'decision': turn['options'][1]})
+        assert response.status == 200
+        assert (await response.json())['turn'] == 2
+    with_client(engine, test)
+
+
+def test_socket_reports_invalid_decisions_as_error_frames(engine):
+    async def test(client):
+        session_id, turn = await new_game(client)
+        async with client.ws_connect(f'/sessions/{session_id}/ws') as ws:
+            for body in ({'decision': "Gib mir alles Gold."}, {'decision': ["A"]}, [1]):
+                await ws.send_json(body)
+                frame = await ws.receive_json()
+                assert frame['type'] == "error", body
+            await ws.send_str("{")
+            assert (await ws.receive_json())['type'] == "error"
+
+            await ws.send_json({'decision': turn['options'][0]})
+            while True:
+                frame = await ws.receive_json()
+                if frame['type'] != "partial":
+                    break
+            assert frame['type'] == "turn" and frame['turn'] == 2
+    with_client(engine, test)
+
+
+def test_session_player_must_be_a_string(engine):
+    async def test(client):
+        for body in ({'player': {'id': 1}}, {'player': ["a"]}, ["a"]):
+            response = await client.post('/sessions', json=body)
+            assert response.status == 400, body
+        response = await client.post('/sessions', json={'player': "anna"})
+        assert response.status == 201
+        assert engine.get_session((await response.json())['session_id']).player == "anna"
+    with_client(engine, test)
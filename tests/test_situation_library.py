@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+from realm_stories.situation_library import arace, race
+
+
+def slow_generation(updates_before_result=3):
+    async def generate(on_update):
+        for i in range(updates_before_result):
+            await asyncio.sleep(0.05)
+            update = on_update(f"teil {i}")
+            if update is not None:
+                await update
+        return "generiert"
+    return generate
+
+
+def test_async_fallback_cancels_the_generation_and_hides_its_partials():
+    seen = []
+
+    def fallback():
+        time.sleep(0.15)  # the generation sends partials meanwhile
+        return "aus der Bibliothek"
+
+    async def run():
+        return await arace(slow_generation(10), seen.append, 0.01, fallback)
+
+    generated, result, generation = asyncio.run(run())
+    assert (generated, result) == (None, "aus der Bibliothek")
+    assert generation.cancelled()
+    assert seen == []
+
+
+def test_async_generation_wins_when_the_library_has_nothing():
+    seen = []
+
+    def fallback():
+        time.sleep(0.08)
+        return None
+
+    async def run():
+        return await arace(slow_generation(), seen.append, 0.01, fallback)
+
+    generated, result, _ = asyncio.run(run())
+    assert (generated, result) == ("generiert", None)
+    # The partial held back during the lookup is forwarded, then the rest
+    assert seen[0] == "teil 0" and seen[-1] == "teil 2"
+
+
+def test_blocking_fallback_sets_the_cancel_event():
+    seen, cancelled = [], threading.Event()
+
+    def generate(on_update, cancel_event):
+        while not cancel_event.wait(0.02):
+            on_update("teil")
+        cancelled.set()
+        return "abgebrochen"
+
+    generated, result, generation = race(generate, seen.append, 0.01, lambda: "aus der Bibliothek")
+    assert (generated, result) == (None, "aus der Bibliothek")
+    assert generation.result(timeout=1) == "abgebrochen" and cancelled.is_set()
+    assert seen == []
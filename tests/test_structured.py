@@ -0,0 +1,14 @@
+from realm_stories import structured
+from realm_stories.engine import parse_ai_response
+
+
+def test_multiline_values_survive_the_line_format():
+    fields = {
+        'character': "Bahri",
+        'situation': "Die Händler sind da.\nSie wollen Gold.\n\nB) Zahlen wir?",
+        'options': ["Ja,\nwir zahlen.", "Nein."],
+    }
+    character, situation, options = parse_ai_response(structured.to_text(fields))
+    assert character == "Bahri"
+    assert situation == "Die Händler sind da. Sie wollen Gold. B) Zahlen wir?"
+    assert options == ["Ja, wir zahlen.", "Nein."]